@@ -0,0 +1,245 @@
+"""
+recommend_product_with_brands 벤치마크 (합성 카탈로그 + 로컬 대역, 네트워크 없음)
+
+python bench_recommendation.py                                   # 1k 제품, Cross-Encoder 대역
+python bench_recommendation.py --products 1000 10000 100000 --requests 500 --concurrency 8
+python bench_recommendation.py --ce real --output bench/2026-10-18.json   # 실제 CE 모델 (CE_MODEL)
+python bench_recommendation.py --db-latency-ms 5 --embed-latency-ms 40    # 네트워크 왕복 지연 흉내
+
+제품 수마다 카탈로그/인덱스 로드 시간, 종단 간 p50/p95/p99 지연과 처리량, 단계별(GET /metrics와 같은 stage) 분위수를
+JSON으로 출력 → 실행 간 비교용 (git 커밋, 설정값, 환경 정보 포함)
+기본은 결과 캐시를 꺼서 매 요청이 전체 파이프라인을 거침 (임베딩/CE 점수 캐시는 서비스와 동일하게 동작)
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+# 대역만 사용하므로 실제 키가 없어도 실행 (설정 검증 통과용 기본값)
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+
+import config
+import recommendation_model_API as api
+from metrics import STAGE_SECONDS
+from standins import FakeCrossEncoder, SyntheticCatalog, install
+
+INTENTS = ["", "event", "weather"]
+SETTINGS = [
+    "EMBED_MODEL", "EMBED_DIM", "CATALOG_ENABLED", "ANN_INDEX_ENABLED", "VECTOR_STORE_DTYPE", "VECTOR_STORE_DIM",
+    "RETRIEVAL_POOL", "CANDIDATE_POOL", "CASCADE_ENABLED", "CASCADE_MAX_CE", "CE_BACKEND", "CE_BATCH_ENABLED",
+    "CE_MAX_WORKERS",
+]
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    ms = np.asarray(values) * 1000
+    return {
+        "count": len(values),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+class StageRecorder:
+    """STAGE_SECONDS.observe를 감싸 단계별 원시 표본 수집 (히스토그램 버킷으로는 분위수가 거침)"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._observe = STAGE_SECONDS.observe
+
+    def __enter__(self) -> "StageRecorder":
+        def observe(value: float, **labels: str) -> None:
+            self.samples[labels.get("stage", "")].append(value)
+            self._observe(value, **labels)
+
+        STAGE_SECONDS.observe = observe
+        return self
+
+    def __exit__(self, *exc) -> None:
+        del STAGE_SECONDS.observe  # 인스턴스 속성 제거 → 원래 메서드
+
+    def reset(self) -> None:
+        self.samples.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        out = {}
+        for stage, values in sorted(self.samples.items()):
+            out[stage] = {**percentiles(values), "total_sec": round(float(sum(values)), 4)}
+        return out
+
+
+def make_requests(data: SyntheticCatalog, n: int, brand_filter_rate: float, seed: int) -> List[Dict[str, Any]]:
+    """(user_id, target_brands, intent) 요청 목록 - 고객은 균등, intent는 3종 균등"""
+    rng = np.random.default_rng(seed)
+    users = data.user_ids
+    out = []
+    for _ in range(n):
+        brands = None
+        if rng.random() < brand_filter_rate:
+            brands = [str(b) for b in rng.choice(data.brands, size=int(rng.integers(1, 3)), replace=False)]
+        out.append({"user_id": users[int(rng.integers(0, len(users)))], "target_brands": brands,
+                    "intent": INTENTS[int(rng.integers(0, len(INTENTS)))]})
+    return out
+
+
+async def run_requests(requests: List[Dict[str, Any]], concurrency: int, top_k: int) -> Dict[str, Any]:
+    """closed-loop: concurrency개 워커가 요청 목록을 나눠 처리"""
+    latencies: List[float] = []
+    outcomes = {"ok": 0, "empty": 0, "errors": 0}
+    queue = iter(requests)
+
+    async def worker():
+        for req in queue:
+            started = time.perf_counter()
+            try:
+                result = await api.recommend_product_with_brands(
+                    req["user_id"], None, target_brands=req["target_brands"], top_k=top_k, intent=req["intent"]
+                )
+                outcomes["ok" if result else "empty"] += 1
+            except Exception:
+                outcomes["errors"] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(concurrency, 1))))
+    wall = time.perf_counter() - started
+    return {
+        **outcomes,
+        "wall_sec": round(wall, 4),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall > 0 else None,
+        **percentiles(latencies),
+    }
+
+
+async def bench_size(n_products: int, args, recorder: StageRecorder, work_dir: str) -> Dict[str, Any]:
+    from catalog import get_catalog
+    from vector_index import get_product_index
+
+    started = time.perf_counter()
+    data = SyntheticCatalog(n_products, args.customers, seed=args.seed)
+    generated = time.perf_counter() - started
+    ce = FakeCrossEncoder(args.ce_ms_per_pair) if args.ce == "fake" else None
+    sb, oa = install(data, args.db_latency_ms, args.embed_latency_ms, ce, work_dir)
+    api.RESULT_CACHE_ENABLED = args.result_cache
+
+    startup: Dict[str, Any] = {"generate_sec": round(generated, 3)}
+    if config.CATALOG_ENABLED:
+        started = time.perf_counter()
+        await get_catalog(sb, wait=True)
+        startup["catalog_load_sec"] = round(time.perf_counter() - started, 3)
+    if config.ANN_INDEX_ENABLED:
+        started = time.perf_counter()
+        index = await get_product_index(sb, wait=True)
+        startup["index_build_sec"] = round(time.perf_counter() - started, 3)
+        if index is not None and index._store is not None:
+            startup["index_resident_mb"] = round(index._store.nbytes / 1e6, 2)
+    if args.ce == "real":
+        started = time.perf_counter()
+        await api.warm_cross_encoder()
+        startup["ce_load_sec"] = round(time.perf_counter() - started, 3)
+
+    requests = make_requests(data, args.warmup + args.requests, args.brand_filter_rate, args.seed + 1)
+    await run_requests(requests[:args.warmup], args.concurrency, args.top_k)
+    recorder.reset()
+    calls_before = sum(sb.calls.values())
+    end_to_end = await run_requests(requests[args.warmup:], args.concurrency, args.top_k)
+    batcher = api._ce_batcher
+    if batcher is not None and batcher._worker is not None:
+        batcher._worker.cancel()  # 다음 제품 수에서는 새 CE 인스턴스 → 새 배처
+    return {
+        "products": n_products,
+        "customers": len(data.customers),
+        "startup": startup,
+        "end_to_end": end_to_end,
+        "stages": recorder.summary(),
+        "caches": {"result": api.get_result_cache_stats(), **api.get_ce_stats()},
+        "standin_calls": {
+            "supabase": sum(sb.calls.values()) - calls_before,
+            "embedding_requests": oa.embeddings.calls,
+            "ce_pairs": ce.pairs if ce is not None else None,
+        },
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+async def run(args) -> Dict[str, Any]:
+    report = {
+        "benchmark": "recommend_product_with_brands",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "params": {k: v for k, v in vars(args).items() if k != "output"},
+        "settings": {name: getattr(config, name) for name in SETTINGS},
+        "runs": [],
+    }
+    # 재채점용 원본 벡터 파일은 임시 디렉터리에 (서비스의 cache/ 파일을 덮어쓰지 않음)
+    with StageRecorder() as recorder, tempfile.TemporaryDirectory() as work_dir:
+        for n in args.products:
+            print(f"▶ products={n} requests={args.requests} concurrency={args.concurrency}", file=sys.stderr)
+            report["runs"].append(await bench_size(n, args, recorder, work_dir))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark for recommend_product_with_brands")
+    parser.add_argument("--products", type=int, nargs="+", default=[1000], help="제품 수 (여러 개면 순서대로 실행)")
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=300, help="측정 요청 수 (제품 수마다)")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--top-k", type=int, default=1)
+    parser.add_argument("--brand-filter-rate", type=float, default=0.3, help="브랜드 필터가 붙는 요청 비율")
+    parser.add_argument("--ce", choices=["fake", "real"], default="fake")
+    parser.add_argument("--ce-ms-per-pair", type=float, default=0.0, help="CE 대역의 쌍당 추론 시간")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--result-cache", action="store_true", help="추천 결과 캐시 사용")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON 저장 경로 (없으면 stdout)")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(sys.stderr):  # 로드 로그가 JSON 출력에 섞이지 않도록
+        report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"✅ saved {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
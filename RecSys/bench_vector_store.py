@@ -0,0 +1,122 @@
+"""
+압축 벡터 저장소 recall 벤치마크 (float32 전수 탐색 대비)
+
+python bench_vector_store.py                      # Supabase products_vector 임베딩 사용
+python bench_vector_store.py --synthetic 20000    # 합성 벡터 (앞쪽 차원에 분산이 몰린 Matryoshka 유사 분포)
+python bench_vector_store.py --k 30 100 --dims 1536 512 256 --json
+
+설정(dtype × 절단 차원 × 재채점)마다 recall@k, 상주 메모리, 질의 지연(p50/p95)을 출력
+질의는 제품 벡터에 잡음을 섞어 만듦 (실제 검색어 임베딩과 같은 분포는 아님)
+IVF 탐색 오차를 빼기 위해 전수 탐색으로만 비교 (저장소 자체의 근사 오차만 측정)
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from config import EMBED_DIM, EMBED_VECTOR_COL, PRODUCT_VECTOR_FK_COL, VECTOR_RESCORE_FACTOR
+from vector_store import DTYPES, QuantizedVectorStore, normalize
+
+
+def synthetic_vectors(n: int, dim: int = EMBED_DIM, seed: int = 0) -> np.ndarray:
+    """군집 + 차원별 분산 감소 (Matryoshka 학습 임베딩처럼 앞쪽 차원에 정보가 몰림)"""
+    rng = np.random.default_rng(seed)
+    scale = 1.0 / np.sqrt(1.0 + np.arange(dim) / 64.0)
+    centers = rng.normal(size=(max(1, n // 200), dim)) * scale
+    vecs = centers[rng.integers(0, len(centers), size=n)] + 0.5 * rng.normal(size=(n, dim)) * scale
+    return normalize(vecs.astype(np.float32))
+
+
+async def load_product_vectors() -> np.ndarray:
+    from catalog import fetch_all_rows
+    from recommendation_model_API import get_async_supabase
+    from vector_index import parse_embedding
+
+    sb = await get_async_supabase()
+    rows = await fetch_all_rows(
+        sb, "products_vector", f"{PRODUCT_VECTOR_FK_COL}, {EMBED_VECTOR_COL}", key_col=PRODUCT_VECTOR_FK_COL
+    )
+    vecs = [v for v in (parse_embedding(r.get(EMBED_VECTOR_COL)) for r in rows) if v is not None]
+    return normalize(np.vstack(vecs).astype(np.float32))
+
+
+def make_queries(vectors: np.ndarray, n: int, noise: float, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    base = vectors[rng.integers(0, len(vectors), size=n)]
+    return normalize(base + noise * rng.normal(size=base.shape).astype(np.float32) / np.sqrt(base.shape[1]))
+
+
+def run_config(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    exact: Dict[int, np.ndarray],
+    dtype: str,
+    dim: int,
+    rescore: bool,
+    factor: int,
+) -> Dict:
+    store = QuantizedVectorStore(vectors, dtype, dim, full=vectors if rescore else None)
+    rows = np.arange(len(vectors))
+    ks = sorted(exact)
+    hits = {k: 0 for k in ks}
+    latencies: List[float] = []
+    for qi, q in enumerate(queries):
+        started = time.perf_counter()
+        top, _ = store.search_rows(rows, q, ks[-1], factor)
+        latencies.append(time.perf_counter() - started)
+        for k in ks:
+            hits[k] += len(np.intersect1d(top[:k], exact[k][qi]))
+    ms = np.asarray(latencies) * 1000
+    return {
+        "dtype": dtype,
+        "dim": store.dim,
+        "rescore": rescore,
+        "resident_mb": round(store.nbytes / 1e6, 2),
+        "bytes_per_vector": round(store.nbytes / len(store), 1),
+        **{f"recall@{k}": round(hits[k] / (k * len(queries)), 4) for k in ks},
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall benchmark for the compact vector store")
+    parser.add_argument("--synthetic", type=int, default=0, help="합성 벡터 개수 (0이면 Supabase에서 로드)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.5, help="질의 생성 시 섞는 잡음 크기")
+    parser.add_argument("--k", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--dtypes", nargs="+", default=list(DTYPES), choices=DTYPES)
+    parser.add_argument("--dims", type=int, nargs="+", default=[EMBED_DIM, 1024, 512, 256])
+    parser.add_argument("--rescore-factor", type=int, default=VECTOR_RESCORE_FACTOR)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON 배열로 출력")
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.synthetic) if args.synthetic else asyncio.run(load_product_vectors())
+    queries = make_queries(vectors, args.queries, args.noise)
+
+    sims = queries @ vectors.T
+    exact = {k: np.argsort(-sims, axis=1)[:, :k] for k in args.k}
+
+    results = []
+    for dtype in args.dtypes:
+        for dim in args.dims:
+            for rescore in (False, True):
+                if rescore and dtype == "float32" and dim >= vectors.shape[1]:
+                    continue  # 원본과 동일
+                results.append(run_config(vectors, queries, exact, dtype, dim, rescore, args.rescore_factor))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"vectors={len(vectors)} queries={len(queries)} rescore_factor={args.rescore_factor}")
+    cols = list(results[0])
+    print(" | ".join(cols))
+    for r in results:
+        print(" | ".join(str(r[c]) for c in cols))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+RecSys 캐시 유틸리티
+- LRUCache: 크기 제한 인메모리 LRU (선택적 TTL)
+- EmbeddingCache: 쿼리 임베딩 2단 캐시 (메모리 LRU + 디스크 SQLite)
+- CEScoreCache: Cross-Encoder 점수 캐시 (쿼리 해시, 제품 ID, content 해시)
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+
+def text_hash(*parts: str) -> str:
+    """캐시 키용 해시 (sha256 hex)"""
+    h = hashlib.sha256()
+    for p in parts:
+        h.update((p or "").encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class LRUCache:
+    """스레드 안전한 크기 제한 LRU 캐시 (ttl을 주면 저장 후 ttl초가 지난 항목은 미스로 처리)"""
+
+    def __init__(
+        self,
+        maxsize: int,
+        on_evict: Optional[Callable[[Hashable], None]] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.maxsize = maxsize
+        self.on_evict = on_evict
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._expires: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                if self.ttl is not None and self._expires.get(key, 0.0) < time.monotonic():
+                    del self._data[key]
+                    self._expires.pop(key, None)
+                    self.expired += 1
+                    self.misses += 1
+                    return default
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            if self.ttl is not None:
+                self._expires[key] = time.monotonic() + self.ttl
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                evicted, _ = self._data.popitem(last=False)
+                self._expires.pop(evicted, None)
+                if self.on_evict:
+                    self.on_evict(evicted)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            self._expires.pop(key, None)
+            return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+
+
+class EmbeddingCache:
+    """
+    쿼리 임베딩 캐시
+    키: sha256(모델명 + 쿼리 텍스트)
+    1단: 메모리 LRU / 2단: SQLite 파일 (재시작 후에도 유지)
+    """
+
+    def __init__(self, model: str, maxsize: int, path: Optional[str] = None):
+        self.model = model
+        self.memory = LRUCache(maxsize)
+        self.disk_hits = 0
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_opened = not path  # 디스크 계층은 첫 사용 시 열기 (import만으로 파일이 생기지 않도록)
+        self._db_lock = threading.Lock()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._db_opened:
+            return self._db
+        with self._db_lock:
+            if not self._db_opened:
+                try:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    db = sqlite3.connect(self.path, check_same_thread=False)
+                    db.execute(
+                        "CREATE TABLE IF NOT EXISTS query_embeddings (key TEXT PRIMARY KEY, embedding BLOB NOT NULL)"
+                    )
+                    db.commit()
+                    self._db = db
+                except sqlite3.Error as e:
+                    print(f"⚠️ [EmbeddingCache] disk tier disabled: {e}")
+                self._db_opened = True
+        return self._db
+
+    def key(self, text: str) -> str:
+        return text_hash(self.model, text)
+
+    @property
+    def has_disk(self) -> bool:
+        return bool(self.path)
+
+    def get_memory(self, text: str) -> Optional[List[float]]:
+        """메모리 계층만 조회 (이벤트 루프에서 호출 가능)"""
+        return self.memory.get(self.key(text))
+
+    def get_disk(self, texts: Sequence[str]) -> Dict[str, List[float]]:
+        """디스크 계층 일괄 조회 (SQLite - 스레드에서 호출), 찾은 항목은 메모리에 올림"""
+        db = self._connect()
+        if db is None or not texts:
+            return {}
+        keys = {self.key(t): t for t in texts}
+        key_list = list(keys)
+        rows = []
+        with self._db_lock:
+            for i in range(0, len(key_list), 500):  # SQLite 바인딩 변수 개수 제한
+                chunk = key_list[i:i + 500]
+                rows += db.execute(
+                    f"SELECT key, embedding FROM query_embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+        found: Dict[str, List[float]] = {}
+        for key, blob in rows:
+            emb = np.frombuffer(blob, dtype=np.float32).tolist()
+            self.memory.put(key, emb)
+            found[keys[key]] = emb
+        self.disk_hits += len(found)
+        return found
+
+    def get(self, text: str) -> Optional[List[float]]:
+        emb = self.get_memory(text)
+        if emb is None and self.has_disk:
+            emb = self.get_disk([text]).get(text)
+        return emb
+
+    def put_memory(self, items: Dict[str, List[float]]) -> None:
+        for text, emb in items.items():
+            self.memory.put(self.key(text), emb)
+
+    def put_disk(self, items: Dict[str, List[float]]) -> None:
+        """디스크 계층 일괄 저장 (executemany + commit 1회 - 스레드에서 호출)"""
+        db = self._connect()
+        if db is None or not items:
+            return
+        rows = [(self.key(t), np.asarray(e, dtype=np.float32).tobytes()) for t, e in items.items()]
+        try:
+            with self._db_lock:
+                db.executemany("INSERT OR REPLACE INTO query_embeddings (key, embedding) VALUES (?, ?)", rows)
+                db.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ [EmbeddingCache] disk write failed: {e}")
+
+    def put(self, text: str, emb: List[float]) -> None:
+        self.put_memory({text: emb})
+        self.put_disk({text: emb})
+
+
+class CEScoreCache:
+    """
+    Cross-Encoder 점수 캐시
+    키: (쿼리 해시, product_id, content 해시)
+    제품 content가 바뀌면 해당 제품의 기존 항목을 모두 무효화
+    """
+
+    def __init__(self, maxsize: int):
+        self._scores = LRUCache(maxsize, on_evict=self._forget)
+        self._content_hash: Dict[Any, str] = {}
+        self._keys_by_pid: Dict[Any, Set[Tuple[str, Any, str]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def hits(self) -> int:
+        return self._scores.hits
+
+    @property
+    def misses(self) -> int:
+        return self._scores.misses
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def _forget(self, key: Tuple[str, Any, str]) -> None:
+        """LRU 축출 콜백 (LRUCache 잠금 안에서 호출 → 잠금 순서: LRU → self._lock)"""
+        with self._lock:
+            keys = self._keys_by_pid.get(key[1])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_pid[key[1]]
+
+    def _check_content(self, pid: Any, content_hash: str) -> None:
+        """content 해시가 바뀐 제품의 기존 점수 무효화"""
+        with self._lock:
+            prev = self._content_hash.get(pid)
+            if prev == content_hash:
+                return
+            self._content_hash[pid] = content_hash
+            stale = self._keys_by_pid.pop(pid, set())
+        for key in stale:
+            self._scores.pop(key)
+
+    def score(
+        self,
+        predict: Callable[[List[Tuple[str, str]]], Sequence[float]],
+        query: str,
+        items: List[Tuple[Any, str]],
+    ) -> List[float]:
+        """
+        (product_id, content) 목록의 CE 점수 반환
+        캐시에 없는 쌍만 predict에 전달
+        """
+        return self.score_many(predict, [(query, items)])[0]
+
+    def score_many(
+        self,
+        predict: Callable[[List[Tuple[str, str]]], Sequence[float]],
+        requests: List[Tuple[str, List[Tuple[Any, str]]]],
+    ) -> List[List[float]]:
+        """
+        여러 (query, [(product_id, content)]) 요청의 점수를 한 번에 반환
+        모든 요청의 미캐시 쌍을 모아 predict 1회로 처리
+        """
+        plan = self.lookup(requests)
+        if plan.pairs:
+            return self.fill(plan, predict(plan.pairs))
+        return plan.scores
+
+    def lookup(self, requests: List[Tuple[str, List[Tuple[Any, str]]]]) -> "CEScorePlan":
+        """캐시 조회 단계 - 캐시된 점수와 predict가 필요한 (중복 제거된) 쌍 목록"""
+        plan = CEScorePlan()
+        for r, (query, items) in enumerate(requests):
+            qh = text_hash(query)
+            plan.keys.append([])
+            plan.scores.append([])
+            for i, (pid, content) in enumerate(items):
+                ch = text_hash(content)
+                self._check_content(pid, ch)
+                key = (qh, pid, ch)
+                plan.keys[r].append(key)
+                s = self._scores.get(key)
+                plan.scores[r].append(s)
+                if s is None:
+                    plan.missing.append((r, i))
+                    if key not in plan.pending:
+                        plan.pending[key] = len(plan.pairs)
+                        plan.pairs.append((query, content))
+        return plan
+
+    def fill(self, plan: "CEScorePlan", new_scores: Sequence[float]) -> List[List[float]]:
+        """predict 결과를 캐시에 저장하고 요청별 점수 목록 완성"""
+        new_scores = [float(s) for s in new_scores]
+        for key, pos in plan.pending.items():
+            # put 전에 등록 → put에서 바로 축출되면 _forget이 지움 (self._lock을 잡은 채 put하지 않음)
+            with self._lock:
+                self._keys_by_pid.setdefault(key[1], set()).add(key)
+            self._scores.put(key, new_scores[pos])
+        for r, i in plan.missing:
+            plan.scores[r][i] = new_scores[plan.pending[plan.keys[r][i]]]
+        return plan.scores
+
+
+class CEScorePlan:
+    """CEScoreCache.lookup 결과 - pairs만 predict 후 fill()에 전달"""
+
+    __slots__ = ("keys", "scores", "missing", "pending", "pairs")
+
+    def __init__(self):
+        self.keys: List[List[Tuple[str, Any, str]]] = []
+        self.scores: List[List[Optional[float]]] = []
+        self.missing: List[Tuple[int, int]] = []
+        self.pending: Dict[Tuple[str, Any, str], int] = {}
+        self.pairs: List[Tuple[str, str]] = []
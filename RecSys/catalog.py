@@ -0,0 +1,624 @@
+"""
+인메모리 제품 카탈로그 스냅샷 (컬럼형)
+- 수치 필드: NumPy 배열 (+ 결측 마스크)
+- 범주형 필드: 문자열 인터닝 테이블의 코드 배열
+- 제품명/content: offset 인덱스 UTF-8 버퍼
+시작 시 전체 로드, 이후 updated_at 워터마크 기준 증분 갱신 → 추천 hot path에서 DB 조회 제거
+삭제된 제품은 CATALOG_RECONCILE_SEC마다 id 목록과 대조해 제거, 텍스트 버퍼는 버려진 구간이 커지면 다시 씀
+to_arrays()/from_arrays()로 워커 간 공유 스냅샷(snapshot.py)에 저장/복원
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from config import (
+    PRODUCT_VECTOR_FK_COL,
+    CATALOG_PAGE_SIZE, CATALOG_REFRESH_SEC, CATALOG_UPDATED_AT_COL, CATALOG_RETRY_SEC, CATALOG_RECONCILE_SEC,
+    CATALOG_COMPACT_MIN_BYTES, SNAPSHOT_ENABLED,
+)
+from shared.applog import get_logger
+
+log = get_logger("recsys.catalog")
+
+
+async def fetch_all_rows(
+    sb,
+    table: str,
+    columns: str,
+    since: Optional[str] = None,
+    since_col: str = CATALOG_UPDATED_AT_COL,
+    key_col: str = "id",
+) -> List[Dict[str, Any]]:
+    """
+    PostgREST 최대 행 제한을 고려해 페이지 단위로 전체 조회 (Supabase AsyncClient)
+    since가 주어지면 since_col >= since 인 행만 조회 (증분 갱신용)
+    - 워터마크와 같은 시각의 행을 놓치지 않도록 gte, 이미 반영한 행은 ProductCatalog가 건너뜀
+    - 조회 중 갱신된 행은 다음 페이지에 다시 나올 수 있어 key_col 기준으로 마지막 값만 남김
+    key_col: 테이블의 기본 키 - 정렬 없이 range로 넘기면 페이지 경계에서 행이 중복/누락될 수 있어 항상 정렬
+    """
+    out: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        query = sb.table(table).select(columns)
+        if since is not None:
+            query = query.gte(since_col, since).order(since_col)
+        query = query.order(key_col)
+        resp = await query.range(offset, offset + CATALOG_PAGE_SIZE - 1).execute()
+        page = resp.data or []
+        out.extend(page)
+        if len(page) < CATALOG_PAGE_SIZE:
+            break
+        offset += CATALOG_PAGE_SIZE
+    if since is None:
+        return out
+    return list({r.get(key_col): r for r in out}.values())
+
+
+class _TextColumn:
+    """offset 인덱스 UTF-8 버퍼 - 갱신된 행은 버퍼 끝에 추가, 버려진 구간은 rewrite()로 제거"""
+
+    def __init__(self):
+        self.buf: Union[bytearray, np.ndarray] = bytearray()  # 스냅샷 복원 시 uint8 mmap
+        self.offsets = np.zeros((0, 2), dtype=np.int64)  # (start, end), start < 0 이면 None
+        self.live_bytes = 0  # 현재 행이 가리키는 바이트 수
+
+    @property
+    def wasted_bytes(self) -> int:
+        return len(self.buf) - self.live_bytes
+
+    def resize(self, n: int) -> None:
+        if n > len(self.offsets):
+            pad = np.full((n - len(self.offsets), 2), -1, dtype=np.int64)
+            self.offsets = np.vstack([self.offsets, pad])
+
+    def set(self, row: int, value: Optional[str]) -> None:
+        start, end = self.offsets[row]
+        if start >= 0:
+            self.live_bytes -= int(end - start)
+        if value is None:
+            self.offsets[row] = (-1, -1)
+            return
+        data = value.encode("utf-8")
+        start = len(self.buf)
+        self.buf += data
+        self.offsets[row] = (start, start + len(data))
+        self.live_bytes += len(data)
+
+    def get(self, row: int) -> Optional[str]:
+        start, end = self.offsets[row]
+        if start < 0:
+            return None
+        return bytes(self.buf[start:end]).decode("utf-8")
+
+    def compact(self, rows: np.ndarray) -> Tuple[bytes, np.ndarray]:
+        """rows 순서로 다시 쓴 (버퍼, offsets) - 갱신으로 버려진 구간 제거"""
+        parts: List[bytes] = []
+        offsets = np.full((len(rows), 2), -1, dtype=np.int64)
+        pos = 0
+        for i, (start, end) in enumerate(self.offsets[rows]):
+            if start < 0:
+                continue
+            parts.append(bytes(self.buf[start:end]))
+            offsets[i] = (pos, pos + end - start)
+            pos += end - start
+        return b"".join(parts), offsets
+
+    def rewrite(self, rows: np.ndarray) -> None:
+        """rows만 남기고 버퍼를 다시 씀 (행 번호는 rows 순서로 바뀜)"""
+        buf, self.offsets = self.compact(rows)
+        self.buf = bytearray(buf)
+        self.live_bytes = len(buf)
+
+    def copy_from(self, other: "_TextColumn") -> None:
+        self.buf = bytearray(other.buf)
+        self.offsets = other.offsets.copy()
+        self.live_bytes = other.live_bytes
+
+
+class _Watermark:
+    """
+    증분 갱신 워터마크 (최대 updated_at)
+    gte로 조회하면 워터마크와 같은 시각의 행이 매번 다시 오므로 그 시각에 반영한 id를 기억해 건너뜀
+    """
+
+    def __init__(self, value: Optional[str] = None):
+        self.value = value
+        self.ids: Set[Any] = set()
+
+    def seen(self, pid: Any, value: Any) -> bool:
+        return value is not None and str(value) == self.value and pid in self.ids
+
+    def copy(self) -> "_Watermark":
+        other = _Watermark(self.value)
+        other.ids = set(self.ids)
+        return other
+
+    def advance(self, pid: Any, value: Any) -> None:
+        if value is None:
+            return
+        value = str(value)
+        if self.value is None or value > self.value:
+            self.value = value
+            self.ids = {pid}
+        elif value == self.value:
+            self.ids.add(pid)
+
+
+class _SortedRowIndex:
+    """스냅샷 카탈로그의 id → 행 번호 (id 정렬 배열 이진 탐색, 워커마다 dict를 만들지 않음)"""
+
+    def __init__(self, ids: np.ndarray):
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, pid: Any, default: Optional[int] = None) -> Optional[int]:
+        if not isinstance(pid, (int, np.integer)) or isinstance(pid, bool):
+            return default
+        row = int(np.searchsorted(self.ids, pid))
+        if row < len(self.ids) and self.ids[row] == pid:
+            return row
+        return default
+
+    def values(self) -> range:
+        return range(len(self.ids))
+
+
+class _CategoricalColumn:
+    """인터닝된 문자열 코드 배열 (-1 = None)"""
+
+    def __init__(self, strings: List[str], codes: Dict[str, int]):
+        self.strings = strings
+        self.string_codes = codes
+        self.values = np.zeros(0, dtype=np.int32)
+
+    def resize(self, n: int) -> None:
+        if n > len(self.values):
+            self.values = np.concatenate([self.values, np.full(n - len(self.values), -1, dtype=np.int32)])
+
+    def set(self, row: int, value: Optional[str]) -> None:
+        if value is None:
+            self.values[row] = -1
+            return
+        code = self.string_codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.strings.append(value)
+            self.string_codes[value] = code
+        self.values[row] = code
+
+    def get(self, row: int) -> Optional[str]:
+        code = self.values[row]
+        return None if code < 0 else self.strings[code]
+
+
+class _NumericColumn:
+    """float64 배열 + 결측 마스크, 조회 시 원래 타입(int/float)으로 복원"""
+
+    def __init__(self, cast):
+        self.cast = cast
+        self.values = np.zeros(0, dtype=np.float64)
+        self.present = np.zeros(0, dtype=bool)
+
+    def resize(self, n: int) -> None:
+        if n > len(self.values):
+            extra = n - len(self.values)
+            self.values = np.concatenate([self.values, np.zeros(extra, dtype=np.float64)])
+            self.present = np.concatenate([self.present, np.zeros(extra, dtype=bool)])
+
+    def set(self, row: int, value: Any) -> None:
+        try:
+            self.values[row] = float(value)
+            self.present[row] = value is not None
+        except (TypeError, ValueError):
+            self.values[row] = 0.0
+            self.present[row] = False
+
+    def get(self, row: int) -> Any:
+        return self.cast(self.values[row]) if self.present[row] else None
+
+
+class ProductCatalog:
+    """
+    products 상세 정보 + products_vector content 컬럼형 스냅샷
+    get_details()/get_contents()는 fetch_product_details()/fetch_product_contents()와 같은 형태를 반환
+    """
+
+    NUMERIC_FIELDS = {"price_final": int, "discount_rate": int, "review_score": float, "review_count": int}
+    CATEGORICAL_FIELDS = ("brand", "category_major", "category_middle", "category_small")
+
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self._row_of: Dict[Any, int] = {}
+        self._strings: List[str] = []
+        self._string_codes: Dict[str, int] = {}
+        self.numeric = {f: _NumericColumn(cast) for f, cast in self.NUMERIC_FIELDS.items()}
+        self.categorical = {
+            f: _CategoricalColumn(self._strings, self._string_codes) for f in self.CATEGORICAL_FIELDS
+        }
+        self.names = _TextColumn()
+        self.contents = _TextColumn()
+        self.has_details = np.zeros(0, dtype=bool)
+        self._products_mark = _Watermark()
+        self._vectors_mark = _Watermark()
+        self.refreshed_at: float = 0.0
+        self.reconciled_at: float = 0.0
+        self.revision = 0          # 반영한 행 수 (워터마크 컬럼이 없어도 변경 감지)
+        self.removed = 0           # 삭제 대조로 지운 제품/content 수 (버전에 반영)
+        self.read_only = False     # 스냅샷에서 복원한 카탈로그
+        self._lock = threading.Lock()  # apply_* ↔ to_arrays (스냅샷 저장은 별도 스레드)
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, pid: Any) -> bool:
+        row = self._row_of.get(pid)
+        return row is not None and bool(self.has_details[row])
+
+    @property
+    def products_watermark(self) -> Optional[str]:
+        return self._products_mark.value
+
+    @property
+    def vectors_watermark(self) -> Optional[str]:
+        return self._vectors_mark.value
+
+    @property
+    def version(self) -> str:
+        """카탈로그 버전 (워터마크 조합 + 삭제 수) - 결과 캐시 키 등에 사용"""
+        version = f"{self.products_watermark or '-'}|{self.vectors_watermark or '-'}"
+        return f"{version}|-{self.removed}" if self.removed else version
+
+    def _row(self, pid: Any) -> int:
+        if self.read_only:
+            raise RuntimeError("snapshot catalog is read-only")
+        row = self._row_of.get(pid)
+        if row is not None:
+            return row
+        row = len(self._row_of)
+        self._row_of[pid] = row
+        n = row + 1
+        if n > len(self.ids):
+            grow = max(n, len(self.ids) * 2, 64)
+            self.ids = np.concatenate([self.ids, np.zeros(grow - len(self.ids), dtype=np.int64)])
+            self.has_details = np.concatenate([self.has_details, np.zeros(grow - len(self.has_details), dtype=bool)])
+            for col in (*self.numeric.values(), *self.categorical.values(), self.names, self.contents):
+                col.resize(grow)
+        self.ids[row] = pid
+        return row
+
+    def apply_products(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """products 행 반영 (신규/갱신) - 반영한 행 수 (워터마크 시각에 이미 반영한 행은 제외)"""
+        applied = 0
+        with self._lock:
+            for p in rows:
+                mark = p.get(CATALOG_UPDATED_AT_COL)
+                if self._products_mark.seen(p["id"], mark):
+                    continue
+                row = self._row(p["id"])
+                for f, col in self.numeric.items():
+                    col.set(row, p.get(f))
+                for f, col in self.categorical.items():
+                    col.set(row, p.get(f))
+                self.names.set(row, p.get("name"))
+                self.has_details[row] = True
+                self._products_mark.advance(p["id"], mark)
+                applied += 1
+            self.revision += applied
+        return applied
+
+    def apply_vectors(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """products_vector 행 반영 (content) - 반영한 행 수"""
+        applied = 0
+        with self._lock:
+            for r in rows:
+                pid, mark = r[PRODUCT_VECTOR_FK_COL], r.get(CATALOG_UPDATED_AT_COL)
+                if self._vectors_mark.seen(pid, mark):
+                    continue
+                row = self._row(pid)
+                self.contents.set(row, r.get("content"))
+                self._vectors_mark.advance(pid, mark)
+                applied += 1
+            self.revision += applied
+        return applied
+
+    def retain(self, product_ids: Set[Any], vector_ids: Set[Any]) -> int:
+        """
+        DB에서 삭제된 행 제거 (증분 갱신으로는 삭제를 알 수 없음)
+        products에 없는 id는 상세 정보를, products_vector에 없는 id는 content를 지움 - 지운 항목 수
+        """
+        removed = 0
+        with self._lock:
+            keep: List[int] = []
+            for pid, row in self._row_of.items():
+                if self.has_details[row] and pid not in product_ids:
+                    self.has_details[row] = False
+                    self.names.set(row, None)
+                    removed += 1
+                if self.contents.offsets[row][0] >= 0 and pid not in vector_ids:
+                    self.contents.set(row, None)
+                    removed += 1
+                if pid in product_ids or pid in vector_ids:
+                    keep.append(row)
+            if len(keep) < len(self._row_of):
+                self._rebuild(np.asarray(keep, dtype=np.int64))
+            self.removed += removed
+            self.revision += removed
+        return removed
+
+    def needs_compact(self, min_wasted: int = CATALOG_COMPACT_MIN_BYTES) -> bool:
+        """텍스트 버퍼의 버려진 구간이 살아 있는 바이트 이상(최소 min_wasted)인지"""
+        wasted = self.names.wasted_bytes + self.contents.wasted_bytes
+        live = self.names.live_bytes + self.contents.live_bytes
+        return not self.read_only and wasted >= max(live, min_wasted)
+
+    def compact(self, min_wasted: int = CATALOG_COMPACT_MIN_BYTES) -> bool:
+        """needs_compact()이면 텍스트 버퍼를 다시 씀 - 갱신마다 늘어나는 메모리 상한"""
+        with self._lock:
+            if not self.needs_compact(min_wasted):
+                return False
+            self._rebuild(np.arange(len(self._row_of), dtype=np.int64))
+        return True
+
+    def pending(
+        self, products: List[Dict[str, Any]], vectors: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """증분 조회 결과 중 아직 반영하지 않은 행 (워터마크 시각에 이미 반영한 행 제외)"""
+        return (
+            [p for p in products if not self._products_mark.seen(p["id"], p.get(CATALOG_UPDATED_AT_COL))],
+            [r for r in vectors if not self._vectors_mark.seen(r[PRODUCT_VECTOR_FK_COL], r.get(CATALOG_UPDATED_AT_COL))],
+        )
+
+    def copy(self) -> "ProductCatalog":
+        """갱신용 복제본 (배열/버퍼 복사) - 복제본을 고친 뒤 통째로 교체하면 읽는 쪽은 잠금 없이 일관된 상태를 봄"""
+        if self.read_only:
+            raise RuntimeError("snapshot catalog is read-only")
+        other = ProductCatalog()
+        with self._lock:
+            other.ids = self.ids.copy()
+            other._row_of = dict(self._row_of)
+            other._strings.extend(self._strings)
+            other._string_codes.update(self._string_codes)
+            for f, col in self.numeric.items():
+                other.numeric[f].values, other.numeric[f].present = col.values.copy(), col.present.copy()
+            for f, col in self.categorical.items():
+                other.categorical[f].values = col.values.copy()
+            other.names.copy_from(self.names)
+            other.contents.copy_from(self.contents)
+            other.has_details = self.has_details.copy()
+            other._products_mark = self._products_mark.copy()
+            other._vectors_mark = self._vectors_mark.copy()
+            other.refreshed_at, other.reconciled_at = self.refreshed_at, self.reconciled_at
+            other.revision, other.removed = self.revision, self.removed
+        return other
+
+    def _rebuild(self, rows: np.ndarray) -> None:
+        """rows만 남겨 모든 컬럼을 다시 만듦 (self._lock 안에서 호출)"""
+        self.ids = self.ids[rows]
+        self._row_of = {int(pid): i for i, pid in enumerate(self.ids)}
+        self.has_details = self.has_details[rows]
+        for col in self.numeric.values():
+            col.values, col.present = col.values[rows], col.present[rows]
+        for col in self.categorical.values():
+            col.values = col.values[rows]
+        self.names.rewrite(rows)
+        self.contents.rewrite(rows)
+
+    def to_arrays(self) -> Tuple[Dict[str, Union[np.ndarray, bytes]], Dict[str, Any]]:
+        """
+        스냅샷 저장용 컬럼 배열 + 메타
+        행은 id 오름차순 (복원 시 이진 탐색), 텍스트는 버려진 구간 없이 다시 씀
+        """
+        with self._lock:
+            n = len(self._row_of)
+            order = np.argsort(self.ids[:n], kind="stable")
+            arrays: Dict[str, Union[np.ndarray, bytes]] = {
+                "ids": self.ids[order],
+                "has_details": self.has_details[order],
+            }
+            for f, col in self.numeric.items():
+                arrays[f"num_{f}"] = col.values[order]
+                arrays[f"num_{f}_present"] = col.present[order]
+            for f, col in self.categorical.items():
+                arrays[f"cat_{f}"] = col.values[order]
+            for name, col in (("names", self.names), ("contents", self.contents)):
+                arrays[f"{name}_blob"], arrays[f"{name}_offsets"] = col.compact(order)
+            meta = {
+                "strings": list(self._strings),
+                "products_watermark": self.products_watermark,
+                "vectors_watermark": self.vectors_watermark,
+                "refreshed_at": self.refreshed_at,
+                "revision": self.revision,
+                "removed": self.removed,
+            }
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> "ProductCatalog":
+        """to_arrays 결과(스냅샷 mmap 배열)로 읽기 전용 카탈로그 복원 - 배열은 복사하지 않음"""
+        catalog = cls()
+        catalog.ids = arrays["ids"]
+        catalog._row_of = _SortedRowIndex(catalog.ids)
+        catalog.has_details = arrays["has_details"]
+        catalog._strings.extend(meta["strings"])
+        catalog._string_codes.update((s, i) for i, s in enumerate(meta["strings"]))
+        for f, col in catalog.numeric.items():
+            col.values = arrays[f"num_{f}"]
+            col.present = arrays[f"num_{f}_present"]
+        for f, col in catalog.categorical.items():
+            col.values = arrays[f"cat_{f}"]
+        for name, col in (("names", catalog.names), ("contents", catalog.contents)):
+            col.buf = arrays[f"{name}_blob"]
+            col.offsets = arrays[f"{name}_offsets"]
+            col.live_bytes = len(col.buf)
+        catalog._products_mark = _Watermark(meta["products_watermark"])
+        catalog._vectors_mark = _Watermark(meta["vectors_watermark"])
+        catalog.refreshed_at = meta["refreshed_at"]
+        catalog.revision = meta["revision"]
+        catalog.removed = meta.get("removed", 0)
+        catalog.read_only = True
+        return catalog
+
+    def get_detail(self, pid: Any) -> Optional[Dict[str, Any]]:
+        row = self._row_of.get(pid)
+        if row is None or not self.has_details[row]:
+            return None
+        out: Dict[str, Any] = {"id": pid, "name": self.names.get(row)}
+        for f, col in self.categorical.items():
+            out[f] = col.get(row)
+        for f, col in self.numeric.items():
+            out[f] = col.get(row)
+        return out
+
+    def get_content(self, pid: Any) -> Optional[str]:
+        row = self._row_of.get(pid)
+        return None if row is None else self.contents.get(row)
+
+    def iter_contents(self) -> Iterator[str]:
+        """적재된 모든 content (토큰 ID 사전 계산용)"""
+        for row in self._row_of.values():
+            content = self.contents.get(row)
+            if content:
+                yield content
+
+    def lookup(self, product_ids: List[Any]) -> Tuple[Dict[Any, Dict[str, Any]], Dict[Any, str], List[Any]]:
+        """후보 ID → (prod_map, pv_map, 카탈로그에 없는 ID 목록)"""
+        prod_map: Dict[Any, Dict[str, Any]] = {}
+        pv_map: Dict[Any, str] = {}
+        missing: List[Any] = []
+        for pid in product_ids:
+            detail = self.get_detail(pid)
+            if detail is None:
+                missing.append(pid)
+                continue
+            prod_map[pid] = detail
+            content = self.get_content(pid)
+            if content is not None:
+                pv_map[pid] = content
+        return prod_map, pv_map, missing
+
+
+CATALOG_PRODUCT_COLUMNS = (
+    "id, brand, name, category_major, category_middle, category_small, "
+    f"price_final, discount_rate, review_score, review_count, {CATALOG_UPDATED_AT_COL}"
+)
+CATALOG_VECTOR_COLUMNS = f"{PRODUCT_VECTOR_FK_COL}, content, {CATALOG_UPDATED_AT_COL}"
+
+
+async def load_catalog(sb) -> ProductCatalog:
+    """products + products_vector 전체 로드"""
+    started = time.time()
+    products, vectors = await asyncio.gather(
+        fetch_all_rows(sb, "products", CATALOG_PRODUCT_COLUMNS),
+        fetch_all_rows(sb, "products_vector", CATALOG_VECTOR_COLUMNS, key_col=PRODUCT_VECTOR_FK_COL),
+    )
+
+    def build() -> ProductCatalog:
+        catalog = ProductCatalog()
+        catalog.apply_products(products)
+        catalog.apply_vectors(vectors)
+        return catalog
+
+    catalog = await asyncio.to_thread(build)  # 전체 행 반영은 CPU 작업 → 이벤트 루프 밖
+    catalog.refreshed_at = catalog.reconciled_at = time.time()
+    log.info("catalog_loaded", products=len(catalog), sec=round(time.time() - started, 2), version=catalog.version)
+    return catalog
+
+
+async def refresh_catalog(sb, catalog: ProductCatalog, reconcile: bool = False) -> Tuple[ProductCatalog, int]:
+    """
+    워터마크 이후 변경분 반영 - (갱신된 카탈로그, 반영/삭제한 행 수)
+    reconcile이면 id 목록을 전부 읽어 DB에서 삭제된 제품도 제거
+    변경이 있으면 복제본에 반영/삭제 대조/압축을 스레드에서 수행한 새 카탈로그를 반환 → 호출 측이 통째로 교체
+    (요청은 교체 전까지 기존 카탈로그를 읽으므로 루프가 막히지 않고 반쯤 고쳐진 상태도 보지 않음)
+    """
+    products, vectors = await asyncio.gather(
+        fetch_all_rows(sb, "products", CATALOG_PRODUCT_COLUMNS, since=catalog.products_watermark),
+        fetch_all_rows(
+            sb, "products_vector", CATALOG_VECTOR_COLUMNS, since=catalog.vectors_watermark, key_col=PRODUCT_VECTOR_FK_COL
+        ),
+    )
+    products, vectors = catalog.pending(products, vectors)
+    product_ids = vector_ids = None
+    if reconcile:
+        product_ids, vector_ids = await asyncio.gather(
+            fetch_all_rows(sb, "products", "id"),
+            fetch_all_rows(sb, "products_vector", PRODUCT_VECTOR_FK_COL, key_col=PRODUCT_VECTOR_FK_COL),
+        )
+    elif not products and not vectors and not catalog.needs_compact():
+        catalog.refreshed_at = time.time()
+        return catalog, 0
+
+    def rebuild() -> Tuple[ProductCatalog, int, int, int, bool]:
+        updated = catalog.copy()
+        applied_products = updated.apply_products(products)
+        applied_vectors = updated.apply_vectors(vectors)
+        removed = 0
+        if reconcile:
+            removed = updated.retain(
+                {r["id"] for r in product_ids}, {r[PRODUCT_VECTOR_FK_COL] for r in vector_ids}
+            )
+            updated.reconciled_at = time.time()
+        return updated, applied_products, applied_vectors, removed, updated.compact()
+
+    updated, applied_products, applied_vectors, removed, compacted = await asyncio.to_thread(rebuild)
+    updated.refreshed_at = time.time()
+    if applied_products or applied_vectors or removed:
+        log.info(
+            "catalog_refreshed", products=applied_products, contents=applied_vectors, removed=removed,
+            compacted=compacted, version=updated.version,
+        )
+    return updated, applied_products + applied_vectors + removed
+
+
+# 카탈로그 캐싱 (CATALOG_REFRESH_SEC 경과 시 백그라운드 증분 갱신)
+_catalog: Optional[ProductCatalog] = None
+_catalog_task: Optional["asyncio.Task"] = None
+_catalog_retry_at = 0.0  # 로드/갱신 실패 후 이 시각까지 새로 시도하지 않음
+
+
+async def _load_or_refresh(sb) -> Optional[ProductCatalog]:
+    global _catalog, _catalog_retry_at
+    try:
+        if _catalog is None:
+            _catalog = await load_catalog(sb)
+        else:
+            reconcile = time.time() - _catalog.reconciled_at >= CATALOG_RECONCILE_SEC
+            _catalog, _ = await refresh_catalog(sb, _catalog, reconcile)
+    except Exception as e:
+        _catalog_retry_at = time.time() + CATALOG_RETRY_SEC
+        log.warning("catalog_load_failed", fallback="db", retry_sec=CATALOG_RETRY_SEC, error=str(e))
+    return _catalog
+
+
+async def get_catalog(sb, wait: bool = False) -> Optional[ProductCatalog]:
+    """
+    카탈로그 반환 (없으면 None → 호출 측은 DB 조회로 폴백)
+    갱신 주기가 지났으면 백그라운드 증분 갱신을 시작하고 현재 스냅샷으로 응답
+    wait=True이면 최초 로드가 끝날 때까지 대기 (startup용)
+    SNAPSHOT_ENABLED이면 워커 간 공유 스냅샷 사용 (snapshot.py)
+    """
+    if SNAPSHOT_ENABLED:
+        from snapshot import get_shared_catalog  # snapshot이 이 모듈을 import (순환 방지)
+        return await get_shared_catalog(sb, wait)
+    return await get_local_catalog(sb, wait)
+
+
+async def get_local_catalog(sb, wait: bool = False) -> Optional[ProductCatalog]:
+    """이 프로세스가 직접 로드/갱신하는 카탈로그"""
+    global _catalog_task
+    catalog = _catalog
+    if catalog is not None and time.time() - catalog.refreshed_at < CATALOG_REFRESH_SEC:
+        return catalog
+    if time.time() < _catalog_retry_at:
+        # 직전 시도가 실패 (예: updated_at 컬럼 없음) → 요청마다 전체 로드를 다시 시작하지 않음
+        return catalog
+    if _catalog_task is None or _catalog_task.done():
+        _catalog_task = asyncio.create_task(_load_or_refresh(sb))
+    if catalog is not None or not wait:
+        return catalog
+    return await asyncio.shield(_catalog_task)
@@ -0,0 +1,180 @@
+"""
+Cross-Encoder 요청 간 마이크로 배칭
+동시 요청들의 (쿼리, 문서) 쌍을 짧은 윈도우(CE_BATCH_WINDOW_MS) 동안 또는 최대 배치 크기까지 모아
+predict 1회로 처리하고, 점수를 각 요청에 돌려줌
+- 동시 실행 배치 수는 CE_MAX_WORKERS로 제한 → 추론이 밀리면 대기열이 쌓여 다음 배치가 커짐
+- 대기열 깊이 / 배치 크기 지표는 stats()로 조회
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from config import CE_BATCH_WINDOW_MS, CE_BATCH_MAX_PAIRS, CE_MAX_WORKERS
+
+# 배치 크기(쌍 수) 분포 버킷 상한
+BATCH_SIZE_BUCKETS = (1, 8, 16, 32, 64, 128, 256)
+
+
+class _Pending:
+    __slots__ = ("pairs", "future")
+
+    def __init__(self, pairs: List[Tuple[str, str]], future: "asyncio.Future"):
+        self.pairs = pairs
+        self.future = future
+
+
+class CrossEncoderBatcher:
+    """
+    score(pairs)를 호출한 요청들을 모아 predict(pairs) 1회로 처리
+    predict: 쌍 목록 → 점수 목록 (async, 보통 CE executor에서 ce.predict 실행)
+    """
+
+    def __init__(
+        self,
+        predict: Callable[[List[Tuple[str, str]]], Awaitable[Sequence[float]]],
+        window_ms: float = CE_BATCH_WINDOW_MS,
+        max_pairs: int = CE_BATCH_MAX_PAIRS,
+        max_concurrent: int = CE_MAX_WORKERS,
+        on_batch: Optional[Callable[[int, int], None]] = None,
+    ):
+        self.predict = predict
+        self.on_batch = on_batch  # (배치 고유 쌍 수, 묶인 요청 수) - 외부 지표 기록용
+        self.window = window_ms / 1000.0
+        self.max_pairs = max_pairs
+        self.max_concurrent = max_concurrent
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._flushes: Set[asyncio.Task] = set()  # 실행 중 배치 (참조를 유지해 GC로 사라지지 않도록)
+        # 지표
+        self.queued_pairs = 0
+        self.running_pairs = 0
+        self.max_queue_depth = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.batched_pairs = 0
+        self.deduped_pairs = 0
+        self.max_batch_pairs = 0
+        self.batch_size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and not self._worker.done():
+            return
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 처음이거나 이벤트 루프가 바뀜 (이전 루프의 대기열/세마포어는 쓸 수 없음)
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+            self.queued_pairs = 0
+        # 같은 루프에서 워커만 끝났으면 대기열을 그대로 이어받음 → 남은 요청도 점수를 받음
+        self._worker = asyncio.create_task(self._run())
+
+    async def score(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        """pairs의 점수 (다른 동시 요청과 함께 배치 처리)"""
+        if not pairs:
+            return []
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_Pending(list(pairs), future))
+        self.queued_pairs += len(pairs)
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            batch: List[_Pending] = []
+            try:
+                batch.append(await self._queue.get())
+                n = len(batch[0].pairs)
+                deadline = loop.time() + self.window
+                while n < self.max_pairs:
+                    if self._queue.empty():
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            item = await asyncio.wait_for(self._queue.get(), timeout)
+                        except asyncio.TimeoutError:
+                            break
+                    else:
+                        item = self._queue.get_nowait()
+                    batch.append(item)
+                    n += len(item.pairs)
+            except BaseException as e:
+                # 워커 종료 (취소 등): 이미 꺼낸 요청은 실패 처리, 대기열에 남은 요청은 다음 워커가 처리
+                self._slots.release()
+                self.queued_pairs -= sum(len(item.pairs) for item in batch)
+                for item in batch:
+                    if not item.future.done():
+                        if isinstance(e, asyncio.CancelledError):
+                            item.future.cancel()
+                        else:
+                            item.future.set_exception(e)
+                raise
+            self.queued_pairs -= n
+            task = asyncio.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[_Pending]) -> None:
+        try:
+            # 요청 간 중복 쌍은 한 번만 추론
+            index: Dict[Tuple[str, str], int] = {}
+            for item in batch:
+                for pair in item.pairs:
+                    index.setdefault(pair, len(index))
+            unique = list(index)
+            self._record(batch, len(unique))
+            self.running_pairs += len(unique)
+            try:
+                scores = [float(s) for s in await self.predict(unique)]
+            except Exception as e:
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+                return
+            finally:
+                self.running_pairs -= len(unique)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_result([scores[index[p]] for p in item.pairs])
+        finally:
+            self._slots.release()
+
+    def _record(self, batch: List[_Pending], unique_pairs: int) -> None:
+        total = sum(len(item.pairs) for item in batch)
+        self.batches += 1
+        self.batched_requests += len(batch)
+        self.batched_pairs += unique_pairs
+        self.deduped_pairs += total - unique_pairs
+        self.max_batch_pairs = max(self.max_batch_pairs, unique_pairs)
+        pos = next((i for i, b in enumerate(BATCH_SIZE_BUCKETS) if unique_pairs <= b), len(BATCH_SIZE_BUCKETS))
+        self.batch_size_counts[pos] += 1
+        if self.on_batch is not None:
+            self.on_batch(unique_pairs, len(batch))
+
+    @property
+    def pending_pairs(self) -> int:
+        """대기 중 + 추론 중인 쌍 수 (부하 지표)"""
+        return self.queued_pairs + self.running_pairs
+
+    def stats(self) -> Dict[str, Any]:
+        """대기열 깊이 / 배치 크기 지표"""
+        labels = [f"<={b}" for b in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queued_pairs": self.queued_pairs,
+            "running_pairs": self.running_pairs,
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batches,
+            "requests": self.batched_requests,
+            "pairs": self.batched_pairs,
+            "deduped_pairs": self.deduped_pairs,
+            "avg_batch_pairs": round(self.batched_pairs / self.batches, 2) if self.batches else 0.0,
+            "avg_requests_per_batch": round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+            "max_batch_pairs": self.max_batch_pairs,
+            "batch_size_histogram": dict(zip(labels, self.batch_size_counts)),
+        }
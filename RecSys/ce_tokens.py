@@ -0,0 +1,156 @@
+"""
+Cross-Encoder 입력 토큰화 / 배치 구성
+- PairEncoder: 제품 content 토큰 ID를 content 해시 기준으로 캐시 (토큰 단위 절단)
+  요청마다 쿼리만 토큰화하고 (쿼리, 제품) 쌍은 캐시된 ID로 조립
+- bucket_length / plan_batches / pad_batches: 시퀀스 길이 버킷팅 (ONNX / PyTorch 공용)
+"""
+import threading
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from config import CE_LENGTH_BUCKETS, CE_QUERY_MAX_TOKENS, CE_PASSAGE_CACHE_SIZE, CE_FORWARD_BATCH_SIZE
+from cache import LRUCache, text_hash
+
+
+def bucket_length(length: int, buckets: Sequence[int]) -> int:
+    """length 이상인 가장 작은 버킷 (마지막 버킷을 넘으면 마지막 버킷)"""
+    for b in buckets:
+        if length <= b:
+            return b
+    return buckets[-1]
+
+
+def plan_batches(lengths: Sequence[int], buckets: Sequence[int], batch_size: int) -> List[Tuple[List[int], int]]:
+    """
+    토큰 길이순으로 정렬해 [(원래 인덱스 목록, 패딩 길이)] 배치 계획 생성
+    같은 배치는 같은 버킷에 속하는 입력끼리만 묶음
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    plan: List[Tuple[List[int], int]] = []
+    batch: List[int] = []
+    batch_bucket = None
+    for i in order:
+        b = bucket_length(lengths[i], buckets)
+        if batch and (b != batch_bucket or len(batch) >= batch_size):
+            plan.append((batch, batch_bucket))
+            batch = []
+        batch.append(i)
+        batch_bucket = b
+    if batch:
+        plan.append((batch, batch_bucket))
+    return plan
+
+
+def pad_batches(
+    ids: Sequence[Sequence[int]],
+    buckets: Sequence[int],
+    batch_size: int,
+    pad_token_id: int,
+) -> Iterator[Tuple[List[int], np.ndarray, np.ndarray]]:
+    """버킷 길이로 패딩한 (원래 인덱스 목록, input_ids, attention_mask) 배치"""
+    for batch, length in plan_batches([len(x) for x in ids], buckets, batch_size):
+        input_ids = np.full((len(batch), length), pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(batch), length), dtype=np.int64)
+        for row, i in enumerate(batch):
+            n = min(len(ids[i]), length)
+            input_ids[row, :n] = ids[i][:n]
+            attention_mask[row, :n] = 1
+        yield batch, input_ids, attention_mask
+
+
+class PairEncoder:
+    """
+    (쿼리, content) 쌍을 모델 입력 토큰 ID로 조립
+    content 토큰은 text_hash(content) 키로 캐시 → content가 바뀌면 자동으로 다시 토큰화
+    절단은 토큰 단위: 쿼리는 query_max_tokens, content는 max_length에서 남은 만큼
+    """
+
+    def __init__(
+        self,
+        tokenizer,
+        max_length: int = CE_LENGTH_BUCKETS[-1],
+        query_max_tokens: int = CE_QUERY_MAX_TOKENS,
+        cache_size: int = CE_PASSAGE_CACHE_SIZE,
+    ):
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.query_max_tokens = query_max_tokens
+        self.special_tokens = tokenizer.num_special_tokens_to_add(pair=True)
+        self.passage_max_tokens = max_length - self.special_tokens
+        self._passages = LRUCache(cache_size)
+        self._queries = LRUCache(1024)
+        # fast tokenizer는 스레드 간 동시 호출 시 내부 상태 충돌 가능 (CE executor 워커 여러 개)
+        self._lock = threading.Lock()
+
+    def _tokenize(self, texts: List[str]) -> List[List[int]]:
+        with self._lock:
+            return self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+
+    def query_ids(self, query: str) -> List[int]:
+        ids = self._queries.get(query)
+        if ids is None:
+            ids = self._tokenize([query or ""])[0][: self.query_max_tokens]
+            self._queries.put(query, ids)
+        return ids
+
+    def passage_ids(self, content: str) -> List[int]:
+        key = text_hash(content)
+        ids = self._passages.get(key)
+        if ids is None:
+            ids = self._tokenize([content or ""])[0][: self.passage_max_tokens]
+            self._passages.put(key, ids)
+        return ids
+
+    def warm(self, contents: Iterable[str], chunk: int = 256) -> int:
+        """content 목록을 미리 토큰화해 캐시 (이미 캐시된 것은 건너뜀) - 새로 토큰화한 수 반환"""
+        pending = {}
+        for c in contents:
+            if c:
+                key = text_hash(c)
+                if key not in pending and self._passages.get(key) is None:
+                    pending[key] = c
+        todo = list(pending.items())
+        for start in range(0, len(todo), chunk):
+            part = todo[start:start + chunk]
+            for (key, _), ids in zip(part, self._tokenize([c for _, c in part])):
+                self._passages.put(key, ids[: self.passage_max_tokens])
+        return len(todo)
+
+    def pair_ids(self, query: str, content: str) -> List[int]:
+        """[CLS] 쿼리 [SEP] content [SEP] 형태의 모델 입력 (토크나이저의 special token 규칙 사용)"""
+        q = self.query_ids(query)
+        p = self.passage_ids(content)[: self.max_length - self.special_tokens - len(q)]
+        return self.tokenizer.build_inputs_with_special_tokens(q, p)
+
+    def encode(self, pairs: Sequence[Tuple[str, str]]) -> List[List[int]]:
+        return [self.pair_ids(q, c) for q, c in pairs]
+
+    def __len__(self) -> int:
+        return len(self._passages)
+
+
+def torch_predict_ids(
+    ce,
+    ids: Sequence[Sequence[int]],
+    buckets: Sequence[int] = CE_LENGTH_BUCKETS,
+    batch_size: int = CE_FORWARD_BATCH_SIZE,
+) -> np.ndarray:
+    """
+    sentence_transformers CrossEncoder의 내부 모델로 토큰 ID를 직접 추론
+    CrossEncoder.predict와 같이 로짓에 sigmoid 적용 (num_labels=1)
+    """
+    import torch
+
+    model = ce.model
+    device = next(model.parameters()).device
+    pad_token_id = ce.tokenizer.pad_token_id or 0
+    scores = np.zeros(len(ids), dtype=np.float32)
+    with torch.inference_mode():
+        for batch, input_ids, attention_mask in pad_batches(ids, buckets, batch_size, pad_token_id):
+            logits = model(
+                input_ids=torch.from_numpy(input_ids).to(device),
+                attention_mask=torch.from_numpy(attention_mask).to(device),
+            ).logits
+            scores[batch] = torch.sigmoid(logits[:, 0].float()).cpu().numpy()
+    return scores
@@ -1,9 +1,15 @@
 import os
+import sys
 from typing import Dict, List
 from pydantic_settings import BaseSettings
 
+# RecSys / backend 공용 모듈(shared/) import 경로 - 저장소 루트
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
 class Settings(BaseSettings):
-    OPENAI_API_KEY: str
+    OPENAI_API_KEY: str = ""  # EMBED_PROVIDER=local이면 필요 없음
     
     # Supabase Settings
     SUPABASE_URL: str
@@ -20,13 +26,177 @@ settings = Settings()
 
 TOP_K = 3
 CANDIDATE_POOL = 30
-EMBED_MODEL = "text-embedding-3-small"
-EMBED_DIM = 1536
+EMBED_MAX_INPUTS = 2048  # embeddings 요청 1회당 최대 입력 수 (OpenAI 제한)
 CE_MODEL = "BAAI/bge-reranker-v2-m3"
 KW_BONUS_ALPHA = 1.2
 CUSTOMER_ID_COL = "user_id"
 PRODUCT_VECTOR_FK_COL = "product_id"
 
+# ============================================================================
+# 다단계(cascade) 랭킹: 유사도 + 키워드 보너스로 1차 선별 → 상위 N개만 Cross-Encoder
+# ============================================================================
+
+CASCADE_ENABLED = True
+RETRIEVAL_POOL = 100              # 1단계 검색 후보 수 (CASCADE_ENABLED=False이면 CANDIDATE_POOL)
+CASCADE_SIM_WEIGHT = 1.0          # 1단계 점수 = w * similarity + KW_BONUS_ALPHA * keyword_bonus
+CASCADE_MAX_CE = CANDIDATE_POOL   # 부하가 없을 때 Cross-Encoder로 넘길 후보 수
+CASCADE_MIN_CE = 10               # 최대 부하일 때 후보 수 (event intent Top 5 이상 유지)
+CASCADE_LOAD_HIGH_PAIRS = 512     # CE 대기 + 추론 중 쌍 수가 이 이상이면 CASCADE_MIN_CE
+
+# ============================================================================
+# 임베딩 제공자 (embedding_provider.py)
+# openai: text-embedding-3-small / local: CPU sentence-transformer (네트워크 없이 실행)
+# 제공자마다 벡터 공간·차원이 달라 products_vector 컬럼과 RPC를 분리
+# ============================================================================
+
+EMBED_PROVIDER = os.getenv("EMBED_PROVIDER", "openai")   # openai | local
+OPENAI_EMBED_MODEL = "text-embedding-3-small"
+OPENAI_EMBED_DIM = 1536
+LOCAL_EMBED_MODEL = "intfloat/multilingual-e5-small"     # 다국어(한국어 포함), CPU에서 빠른 384차원 모델
+LOCAL_EMBED_DIM = 384
+LOCAL_EMBED_QUERY_PREFIX = "query: "                      # e5 계열 입력 접두어 (카탈로그 적재 스크립트와 동일해야 함)
+LOCAL_EMBED_PASSAGE_PREFIX = "passage: "
+LOCAL_EMBED_BATCH_SIZE = 32
+
+_LOCAL_EMBED = EMBED_PROVIDER == "local"
+EMBED_MODEL = LOCAL_EMBED_MODEL if _LOCAL_EMBED else OPENAI_EMBED_MODEL   # 쿼리 임베딩 캐시 키에 포함
+EMBED_DIM = LOCAL_EMBED_DIM if _LOCAL_EMBED else OPENAI_EMBED_DIM
+EMBED_VECTOR_COL = "embedding_local" if _LOCAL_EMBED else "embedding"    # products_vector 임베딩 컬럼
+MATCH_PRODUCTS_RPC = "match_products_local" if _LOCAL_EMBED else "match_products"
+
+# ============================================================================
+# 인메모리 ANN 인덱스 (match_products RPC 대체, RPC는 폴백으로만 사용)
+# ============================================================================
+
+ANN_INDEX_ENABLED = True
+ANN_NPROBE = 8                # 탐색할 IVF 리스트 수
+ANN_MIN_IVF_SIZE = 2048       # 파티션 크기가 이보다 작으면 전수 탐색 (정확)
+ANN_KMEANS_ITERS = 10
+ANN_INDEX_TTL_SEC = 600       # 인덱스 재구성 주기
+ANN_INDEX_RETRY_SEC = 30      # 구성 실패 후 재시도 간격 (그동안 RPC로 폴백)
+
+# ============================================================================
+# 인메모리 제품 카탈로그 스냅샷 (products + products_vector.content)
+# ============================================================================
+
+CATALOG_ENABLED = True
+CATALOG_PAGE_SIZE = 1000          # 전체/증분 로드 페이지 크기 (PostgREST max rows)
+CATALOG_REFRESH_SEC = 60          # 증분 갱신 주기
+CATALOG_UPDATED_AT_COL = "updated_at"  # 증분 갱신 워터마크 컬럼
+CATALOG_RETRY_SEC = 30            # 로드/갱신 실패 후 재시도 간격 (그동안 DB 조회로 폴백)
+CATALOG_RECONCILE_SEC = 15 * 60   # id 목록 전체와 대조해 삭제된 제품을 제거하는 주기
+CATALOG_COMPACT_MIN_BYTES = 1 << 20  # 텍스트 버퍼의 버려진 구간이 이 크기와 살아 있는 바이트 이상이면 다시 씀
+
+# ============================================================================
+# 쿼리 임베딩 캐시 (메모리 LRU + 디스크)
+# ============================================================================
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+EMBED_CACHE_SIZE = 4096
+EMBED_CACHE_PATH = os.path.join(CACHE_DIR, "query_embeddings.sqlite3")  # None이면 디스크 캐시 비활성화
+
+# Cross-Encoder 점수 캐시 (쿼리 해시, product_id, content 해시)
+CE_SCORE_CACHE_SIZE = 50000
+
+# 키워드 매칭용 제품 텍스트(정규화 + 매칭 어휘) 캐시
+KEYWORD_MATCH_CACHE_SIZE = 20000
+
+# 추천 결과 캐시 (프로필 시그니처 + 브랜드 + intent + 계절 + 카탈로그 버전)
+# 뷰티 프로필이 같은 고객끼리 랭킹 결과를 공유
+RESULT_CACHE_ENABLED = True
+RESULT_CACHE_SIZE = 20000
+RESULT_CACHE_TTL_SEC = 30 * 60   # 카탈로그 버전이 안 바뀌어도 이 시간이 지나면 재계산
+RESULT_CACHE_TOP_K = 10          # 랭킹 결과에서 dict로 만들어 캐시할 상위 개수 (요청 top_k가 더 크면 top_k)
+
+# 동일 요청 합치기 (singleflight.py) - 동시에 들어온 같은 (user_id, target_brand, intention) /recommend는 계산 1회를 공유
+SINGLEFLIGHT_ENABLED = True
+
+# ============================================================================
+# ANN 인덱스 벡터 압축 저장 (vector_store.py)
+# ============================================================================
+
+VECTOR_STORE_DTYPE = "int8"       # float32 | float16 | int8 (행별 scale 스칼라 양자화)
+VECTOR_STORE_DIM = 512 if not _LOCAL_EMBED else LOCAL_EMBED_DIM  # Matryoshka 절단 차원 (text-embedding-3-small: 1536/1024/512/256), local 모델은 절단 없음
+VECTOR_RESCORE_ENABLED = True     # 근사 점수 상위 후보를 원본 float32로 재채점
+VECTOR_RESCORE_FACTOR = 4         # 재채점 후보 수 = k * factor
+VECTOR_FULL_PATH = os.path.join(CACHE_DIR, "product_vectors_f32.npy")  # 재채점용 원본 (mmap), None이면 메모리 유지
+
+# ============================================================================
+# 워커 간 공유 스냅샷 (snapshot.py) - 카탈로그 + ANN 인덱스를 디스크에 쓰고 워커가 mmap
+# 잠금을 얻은 워커 하나만 Supabase에서 로드/갱신해 발행, 나머지는 CURRENT 포인터를 따라 교체
+# ============================================================================
+
+SNAPSHOT_ENABLED = True
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, "snapshot")
+SNAPSHOT_POLL_SEC = 5             # 팔로워가 CURRENT 포인터를 확인하는 주기 (리더 잠금 재시도 포함)
+SNAPSHOT_WAIT_SEC = 120           # 첫 스냅샷이 없을 때 startup이 기다리는 최대 시간 (요청 경로는 기다리지 않고 폴백)
+SNAPSHOT_KEEP = 2                 # 보관할 스냅샷 수 (이전 것을 mmap 중인 워커가 있어도 unlink는 안전)
+
+# ============================================================================
+# 오프라인 사전 계산 추천 테이블 (precompute_recommendations.py가 생성)
+# ============================================================================
+
+PRECOMPUTE_ENABLED = True         # /recommend가 사전 계산 결과를 우선 사용
+PRECOMPUTE_STORE_PATH = os.path.join(CACHE_DIR, "precomputed_recommendations.sqlite3")
+PRECOMPUTE_MAX_AGE_SEC = 6 * 3600 # 이보다 오래된 결과는 만료 → 실시간 계산
+PRECOMPUTE_INTENTS = ("", "event", "weather")
+PRECOMPUTE_TOP_K = 3
+PRECOMPUTE_BATCH_SIZE = 64        # recommend_batch 1회당 요청 수
+CUSTOMER_PERSONA_COL = "persona_id"  # customers 페르소나 컬럼 (backend user_service / orchestrator와 동일)
+PERSONA_DB_PATH = os.getenv("PERSONA_DB_PATH", "")  # 페르소나별 recommended_brands JSON (persona_db.json 형식), 비면 전체 브랜드만 계산
+
+# ============================================================================
+# 비동기 요청 경로 (커넥션 풀 + Cross-Encoder executor)
+# ============================================================================
+
+HTTP_MAX_CONNECTIONS = 100    # OpenAI 비동기 클라이언트 커넥션 풀 크기
+HTTP_TIMEOUT_SEC = 30.0
+CE_MAX_WORKERS = 2            # 동시에 실행할 Cross-Encoder 추론 수
+
+# ============================================================================
+# Cross-Encoder 입력 토큰화 (제품 content 토큰 ID 캐시, 토큰 단위 절단)
+# ============================================================================
+
+CE_PRETOKENIZE = True         # False이면 문자 단위 절단(truncate_for_ce) + ce.predict
+CE_LENGTH_BUCKETS = (64, 128, 256, 512)  # 시퀀스 길이 버킷 (마지막 값 = 모델 입력 최대 토큰 수)
+CE_QUERY_MAX_TOKENS = 128     # 쿼리 최대 토큰 수 (나머지는 content)
+CE_PASSAGE_CACHE_SIZE = 20000 # 제품 content 토큰 ID 캐시 크기
+
+# ============================================================================
+# Cross-Encoder 추론 백엔드
+# ============================================================================
+
+CE_BACKEND = "torch"          # "torch" | "onnx" (onnx: onnx_cross_encoder.py로 export 필요, 실패 시 torch로 폴백)
+CE_ONNX_DIR = os.path.join(CACHE_DIR, "onnx_reranker")
+CE_ONNX_QUANTIZE = True       # 동적 int8 양자화
+CE_ONNX_BATCH_SIZE = 32
+CE_ONNX_INTRA_THREADS = 0     # 0이면 CPU 코어 수 / CE_MAX_WORKERS
+CE_PARITY_TOLERANCE = 0.02    # export 시 PyTorch 점수 대비 허용 최대 절대 오차
+
+# ============================================================================
+# Cross-Encoder 요청 간 마이크로 배칭
+# ============================================================================
+
+CE_BATCH_ENABLED = True
+CE_BATCH_WINDOW_MS = 5        # 첫 요청 도착 후 다른 요청의 쌍을 모으는 시간
+CE_BATCH_MAX_PAIRS = 128      # 배치 최대 쌍 수 (도달 시 즉시 실행)
+CE_FORWARD_BATCH_SIZE = 32    # forward pass 1회 최대 쌍 수 (큰 배치는 나눠 추론 → 메모리/지연 상한, PyTorch 경로)
+
+# ============================================================================
+# 이벤트 루프 지연 모니터 (GET /stats/event-loop, recsys_event_loop_lag_seconds)
+# ============================================================================
+
+LOOP_LAG_INTERVAL_SEC = 0.05  # 측정 주기
+LOOP_LAG_HISTORY = 6000       # 보관 표본 수 (주기 × 개수 = 최근 5분)
+
+# ============================================================================
+# 로깅 (applog: 레벨 게이팅 + 요청 단위 DEBUG 샘플링)
+# ============================================================================
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")            # DEBUG이면 파이프라인 상세 로그 (후보 풀, 랭킹 등)
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))  # DEBUG 로그를 남길 요청 비율
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")          # json | text
+
 # ============================================================================
 # 동의어 매핑
 # ============================================================================
@@ -0,0 +1,133 @@
+"""
+쿼리/카탈로그 임베딩 제공자 (EMBED_PROVIDER로 선택)
+- openai: text-embedding-3-small API (기본)
+- local: CPU sentence-transformer (다국어, 한국어 지원) → 추천 경로에 네트워크 호출 없음, 오프라인 실행 가능
+
+두 모델의 벡터 공간은 서로 호환되지 않으므로 카탈로그도 같은 제공자로 임베딩해야 함
+(local은 products_vector.EMBED_VECTOR_COL 컬럼 사용, backend/utils/embeddingProductDetails.py --provider local로 적재)
+"""
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional
+
+from config import (
+    EMBED_PROVIDER, EMBED_MAX_INPUTS, OPENAI_EMBED_MODEL, OPENAI_EMBED_DIM,
+    LOCAL_EMBED_MODEL, LOCAL_EMBED_DIM, LOCAL_EMBED_QUERY_PREFIX, LOCAL_EMBED_PASSAGE_PREFIX, LOCAL_EMBED_BATCH_SIZE,
+)
+from shared.applog import get_logger
+
+log = get_logger("recsys.embedding")
+
+QUERY = "query"
+PASSAGE = "passage"
+
+
+class EmbeddingProvider(ABC):
+    """embed(texts, kind) → EMBED_DIM 차원 벡터 목록 (kind: query = 추천 쿼리, passage = 제품 content)"""
+
+    name = ""
+
+    def __init__(self, model: str, dim: int):
+        self.model = model
+        self.dim = dim
+
+    @abstractmethod
+    async def embed(self, texts: List[str], kind: str = QUERY) -> List[List[float]]:
+        """texts의 임베딩 (입력 순서 유지)"""
+
+    async def warmup(self) -> None:
+        """startup 시 클라이언트/모델 준비"""
+
+    def _check_dim(self, emb: List[float]) -> List[float]:
+        if len(emb) != self.dim:
+            raise ValueError(f"임베딩 차원 불일치: got {len(emb)} expected {self.dim}")
+        return emb
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    name = "openai"
+
+    def __init__(self, client_factory: Callable, model: str = OPENAI_EMBED_MODEL, dim: int = OPENAI_EMBED_DIM):
+        super().__init__(model, dim)
+        self._client_factory = client_factory
+
+    async def embed(self, texts: List[str], kind: str = QUERY) -> List[List[float]]:
+        oa = self._client_factory()
+        out: List[List[float]] = []
+        for start in range(0, len(texts), EMBED_MAX_INPUTS):
+            res = await oa.embeddings.create(
+                model=self.model,
+                input=texts[start:start + EMBED_MAX_INPUTS],
+                encoding_format="float",
+            )
+            out.extend(self._check_dim(d.embedding) for d in res.data)
+        return out
+
+    async def warmup(self) -> None:
+        self._client_factory()
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    sentence-transformers 모델을 CPU에서 실행 (처음 사용할 때 한 번 로드)
+    e5 계열은 질의/문서 접두어("query: ", "passage: ")가 있어야 검색 품질이 유지됨
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        model: str = LOCAL_EMBED_MODEL,
+        dim: int = LOCAL_EMBED_DIM,
+        query_prefix: str = LOCAL_EMBED_QUERY_PREFIX,
+        passage_prefix: str = LOCAL_EMBED_PASSAGE_PREFIX,
+        batch_size: int = LOCAL_EMBED_BATCH_SIZE,
+    ):
+        super().__init__(model, dim)
+        self.prefixes = {QUERY: query_prefix, PASSAGE: passage_prefix}
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                started = time.time()
+                self._model = SentenceTransformer(self.model, device="cpu")
+                log.info("local_embedding_model_loaded", model=self.model, sec=round(time.time() - started, 2))
+        return self._model
+
+    def encode(self, texts: List[str], kind: str = QUERY) -> List[List[float]]:
+        """동기 인코딩 (배치 스크립트용) - 접두어 적용 + L2 정규화"""
+        prefix = self.prefixes.get(kind, "")
+        vecs = self._load().encode(
+            [prefix + t for t in texts],
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return [self._check_dim(v.tolist()) for v in vecs]
+
+    async def embed(self, texts: List[str], kind: str = QUERY) -> List[List[float]]:
+        # CPU 추론은 이벤트 루프 밖에서
+        return await asyncio.to_thread(self.encode, texts, kind)
+
+    async def warmup(self) -> None:
+        await asyncio.to_thread(self._load)
+
+
+def create_embedding_provider(
+    provider: str = EMBED_PROVIDER,
+    openai_client_factory: Optional[Callable] = None,
+) -> EmbeddingProvider:
+    if provider == "local":
+        return LocalEmbeddingProvider()
+    if provider == "openai":
+        if openai_client_factory is None:
+            raise ValueError("openai embedding provider needs a client factory")
+        return OpenAIEmbeddingProvider(openai_client_factory)
+    raise ValueError(f"unknown embedding provider: {provider} (expected 'openai' or 'local')")
@@ -0,0 +1,161 @@
+"""
+keyword_bonus용 다중 패턴 키워드 매칭
+config의 확장 어휘 전체를 Aho-Corasick 오토마톤으로 미리 컴파일하고,
+제품 텍스트는 한 번만 정규화/스캔해 매칭된 어휘 집합을 캐시합니다.
+
+매칭 기준은 기존 keyword_bonus와 동일합니다:
+    (k in search_text) or (k_normalized in search_text_normalized)
+공백 제거는 부분 문자열 관계를 보존하므로 위 조건은 k_normalized in search_text_normalized 와 같습니다.
+"""
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from config import (
+    KEYWORD_TRANSLATION, WEATHER_KEYWORDS, WEATHER_PRIORITY_KEYWORDS,
+    SKIN_TYPE_MAP, CONCERN_MAP, KEYWORD_MATCH_CACHE_SIZE,
+)
+from cache import LRUCache
+
+
+def normalize_term(term: str) -> str:
+    """매칭용 정규화: 소문자 + 공백 제거"""
+    return term.lower().replace(" ", "")
+
+
+class AhoCorasick:
+    """문자 단위 Aho-Corasick 오토마톤 - 텍스트 1회 스캔으로 포함된 패턴 집합 반환"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for p in dict.fromkeys(p for p in patterns if p):
+            self._add(p)
+        self._link()
+
+    def _add(self, pattern: str) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(len(self.patterns))
+        self.patterns.append(pattern)
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Set[str]:
+        """text에 등장하는 패턴 집합"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[int] = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return {self.patterns[i] for i in found}
+
+
+class ProductText:
+    """정규화된 제품 검색 텍스트 + 어휘 매칭 결과"""
+
+    __slots__ = ("normalized", "matched")
+
+    def __init__(self, normalized: str, matched: FrozenSet[str]):
+        self.normalized = normalized
+        self.matched = matched
+
+
+class KeywordMatcher:
+    """
+    확장 어휘 오토마톤 + 제품 텍스트 캐시 + 계절별 우선순위 플래그
+    어휘 밖의 키워드(유저 원문 키워드 등)는 캐시된 정규화 텍스트에서 부분 문자열로 확인
+    """
+
+    def __init__(self, vocabulary: Iterable[str], cache_size: int = KEYWORD_MATCH_CACHE_SIZE):
+        terms = [t.strip() for t in vocabulary if t and t.strip()]
+        self.vocabulary: FrozenSet[str] = frozenset(normalize_term(t) for t in terms)
+        self.automaton = AhoCorasick(self.vocabulary)
+        self._texts = LRUCache(cache_size)
+        self._priority: Dict[str, List[str]] = {
+            season: [k.lower() for k in kws] for season, kws in WEATHER_PRIORITY_KEYWORDS.items()
+        }
+        # 어휘 전체의 계절별 우선순위 플래그 미리 계산
+        self._priority_flags: Dict[tuple, bool] = {}
+        for season in self._priority:
+            for t in terms:
+                self.is_priority(t, season)
+
+    def product_text(self, product_content: str, product_keywords: Optional[List[str]] = None) -> ProductText:
+        """제품 본문 + 키워드를 정규화하고 어휘 매칭 결과를 계산 (캐시)"""
+        key = (product_content or "", tuple(product_keywords or ()))
+        cached = self._texts.get(key)
+        if cached is not None:
+            return cached
+        search_text = (product_content or "").lower()
+        if product_keywords:
+            search_text += " " + " ".join([str(k).lower() for k in product_keywords])
+        normalized = search_text.replace(" ", "")
+        text = ProductText(normalized, frozenset(self.automaton.find(normalized)))
+        self._texts.put(key, text)
+        return text
+
+    def matches(self, text: ProductText, keyword: str) -> bool:
+        """정규화 키워드가 제품 텍스트에 포함되는지"""
+        k = normalize_term(keyword)
+        if k in self.vocabulary:
+            return k in text.matched
+        return k in text.normalized
+
+    def match_terms(self, text: ProductText, keywords: Iterable[str]) -> List[str]:
+        """키워드 목록 중 매칭된 것 (입력 순서/중복 유지)"""
+        return [kw for kw in keywords if self.matches(text, kw)]
+
+    def is_priority(self, keyword: str, season: Optional[str]) -> bool:
+        """계절 우선순위 키워드 여부 (any(pk in k or k in pk)) - 키워드별로 한 번만 계산"""
+        priority = self._priority.get(season) if season else None
+        if not priority:
+            return False
+        k = keyword.lower()
+        key = (season, k)
+        flag = self._priority_flags.get(key)
+        if flag is None:
+            flag = any(pk in k or k in pk for pk in priority)
+            self._priority_flags[key] = flag
+        return flag
+
+
+def _default_vocabulary() -> List[str]:
+    terms: List[str] = []
+    for key, synonyms in KEYWORD_TRANSLATION.items():
+        terms.append(key)
+        terms.extend(synonyms)
+    for kws in WEATHER_KEYWORDS.values():
+        terms.extend(kws)
+    for kws in WEATHER_PRIORITY_KEYWORDS.values():
+        terms.extend(kws)
+    for mapping in (SKIN_TYPE_MAP, CONCERN_MAP):
+        for en, kr in mapping.items():
+            terms.extend([en, kr, f"{en}({kr})"])
+    return terms
+
+
+keyword_matcher = KeywordMatcher(_default_vocabulary())
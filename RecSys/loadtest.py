@@ -0,0 +1,398 @@
+"""
+/recommend (RecSys) · /message (backend) 부하 테스트 - 동시성/도착률 단계별 포화 지점 측정
+
+# RecSys를 이 프로세스 안에서 대역(standins.py)과 함께 띄워 closed-loop로 동시성 1 → 64
+python loadtest.py run --target recommend --concurrency 1 4 16 64 --duration 20
+
+# open-loop (포아송 도착, 초당 요청 수 단계별)
+python loadtest.py run --target recommend --mode open --rate 20 50 100 200
+
+# /message: RecSys 대역 서버(serve)와 backend 대역 서버(backend/utils/standins.py)를 하위 프로세스로 띄우고 측정
+python loadtest.py run --target message --concurrency 1 2 4 8 --llm-latency-ms 800
+
+# 직접 띄운 서버를 측정
+python loadtest.py serve --port 8001 --products 10000                       # RecSys + 대역
+cd ../backend && python utils/standins.py --port 8000 --recsys-url http://127.0.0.1:8001/recommend
+python loadtest.py run --target message --url http://127.0.0.1:8000 --concurrency 1 2 4 8
+
+단계마다 처리량, 지연 p50/p90/p95/p99, 오류율(상태 코드/예외별), 이벤트 루프 지연을 JSON으로 출력
+- 이벤트 루프 지연: /message와 --url이면 backend(서버)의 GET /stats/event-loop?window=<단계 시간>,
+  /recommend 프로세스 내 실행이면 같은 루프에서 직접 측정 (부하 생성기와 서버가 루프를 공유하므로 생성기 비용도 포함됨)
+- closed-loop: 동시성 N개 가상 사용자가 응답을 받자마자 다음 요청 (처리량 = 서버 처리 능력)
+- open-loop: 응답과 무관하게 도착률대로 요청 (포화 시 지연과 진행 중 요청이 계속 늘어남 → --max-in-flight 초과분은 dropped)
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# 대역만 사용하므로 실제 키가 없어도 실행 (설정 검증 통과용 기본값), 요청 로그는 경고 이상만
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "loadtest")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx
+
+import config  # noqa: F401  저장소 루트(shared/)를 import 경로에 추가
+from shared.loop_monitor import LoopLagMonitor, percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(HERE), "backend")
+BACKEND_STANDINS = os.path.join(BACKEND_DIR, "utils", "standins.py")
+
+INTENTS = ["", "event", "weather"]
+MESSAGE_INTENTS = ["신제품 출시 이벤트", "할인행사", "날씨"]
+PERSONAS = ["P1", "P2", "P3", "P4", "P5"]
+
+
+def brand_names() -> List[str]:
+    from standins import BRANDS
+    return BRANDS
+
+
+def make_payload(target: str, rng: random.Random, users: int, brand_rate: float) -> Dict[str, Any]:
+    """요청 본문 - 고객은 user_000001 ~ users 중 균등 (대역 데이터와 같은 ID 체계)"""
+    user_id = f"user_{rng.randint(1, users):06d}"
+    brand = rng.choice(brand_names()) if rng.random() < brand_rate else None
+    if target == "recommend":
+        return {"user_id": user_id, "target_brand": [brand] if brand else [], "intention": rng.choice(INTENTS)}
+    return {
+        "userId": user_id,
+        "channel": "SMS",
+        "intention": rng.choice(MESSAGE_INTENTS),
+        "hasBrand": brand is not None,
+        "targetBrand": brand,
+        "persona": rng.choice(PERSONAS),
+    }
+
+
+class LevelResult:
+    """단계 하나의 요청별 결과 수집"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.outcomes: Counter = Counter()
+        self.sent = 0
+        self.dropped = 0
+        self.max_in_flight = 0
+        self.in_flight = 0
+
+    def record(self, outcome: str, latency: float) -> None:
+        self.outcomes[outcome] += 1
+        if outcome == "ok":
+            self.latencies.append(latency)
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        done = sum(self.outcomes.values())
+        errors = done - self.outcomes.get("ok", 0)
+        values = sorted(self.latencies)
+        out: Dict[str, Any] = {
+            "sent": self.sent,
+            "completed": done,
+            "dropped": self.dropped,
+            "errors": errors,
+            "error_rate": round(errors / done, 4) if done else None,
+            "outcomes": dict(self.outcomes),
+            "throughput_rps": round(self.outcomes.get("ok", 0) / duration, 2) if duration > 0 else None,
+            "max_in_flight": self.max_in_flight,
+        }
+        if values:
+            out["latency_ms"] = {
+                f"p{q}": round(percentile(values, q) * 1000, 2) for q in (50, 90, 95, 99)
+            }
+            out["latency_ms"]["max"] = round(values[-1] * 1000, 2)
+            out["latency_ms"]["mean"] = round(sum(values) / len(values) * 1000, 2)
+        return out
+
+
+async def send(client: httpx.AsyncClient, path: str, payload: Dict[str, Any], result: LevelResult) -> None:
+    result.in_flight += 1
+    result.max_in_flight = max(result.max_in_flight, result.in_flight)
+    started = time.perf_counter()
+    try:
+        resp = await client.post(path, json=payload)
+        outcome = "ok" if resp.status_code < 400 else f"http_{resp.status_code}"
+    except Exception as e:
+        outcome = type(e).__name__
+    finally:
+        result.in_flight -= 1
+    result.record(outcome, time.perf_counter() - started)
+
+
+async def closed_loop(fire: Callable[[LevelResult], Awaitable[None]], concurrency: int, duration: float) -> LevelResult:
+    result = LevelResult()
+    deadline = time.perf_counter() + duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            result.sent += 1
+            await fire(result)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return result
+
+
+async def open_loop(
+    fire: Callable[[LevelResult], Awaitable[None]], rate: float, duration: float, max_in_flight: int, seed: int,
+) -> LevelResult:
+    """포아송 도착 - 예정 시각 기준으로 보내므로 생성기가 밀려도 도착률은 유지 (coordinated omission 방지)"""
+    result = LevelResult()
+    rng = random.Random(seed)
+    tasks = set()
+    started = time.perf_counter()
+    next_at = started
+    while next_at < started + duration:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(tasks) >= max_in_flight:
+            result.dropped += 1
+        else:
+            result.sent += 1
+            task = asyncio.create_task(fire(result))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        next_at += rng.expovariate(rate)
+    if tasks:
+        await asyncio.gather(*tasks)
+    return result
+
+
+async def in_process_recommend(args) -> Tuple[httpx.AsyncClient, LoopLagMonitor]:
+    """RecSys 앱을 대역과 함께 이 프로세스에 띄우고 ASGI로 직접 호출하는 클라이언트 (+ 앱의 루프 지연 모니터)"""
+    import main
+    from standins import FakeCrossEncoder, SyntheticCatalog, install
+
+    data = SyntheticCatalog(args.products, args.users, seed=args.seed)
+    install(data, args.db_latency_ms, args.embed_latency_ms, FakeCrossEncoder(args.ce_ms_per_pair), args.work_dir)
+    with contextlib.redirect_stdout(sys.stderr):
+        await main.warmup()
+    main.loop_monitor.start()
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://recsys"), main.loop_monitor
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def standin_args(args) -> List[str]:
+    """RecSys/backend 대역 서버에 공통으로 넘기는 옵션 (같은 고객 ID 체계와 시드)"""
+    return [
+        "--products", str(args.products), "--users", str(args.users),
+        "--db-latency-ms", str(args.db_latency_ms), "--embed-latency-ms", str(args.embed_latency_ms),
+        "--seed", str(args.seed),
+    ]
+
+
+async def wait_healthy(procs: List[subprocess.Popen], urls: List[str], timeout: float) -> None:
+    """모든 url이 200을 줄 때까지 대기 (먼저 종료된 프로세스가 있으면 바로 실패)"""
+    deadline = time.perf_counter() + timeout
+    pending = list(urls)
+    async with httpx.AsyncClient(timeout=2.0) as client:
+        while pending:
+            for proc in procs:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"stand-in server exited with {proc.returncode}: {' '.join(proc.args)}")
+            try:
+                if (await client.get(pending[0])).status_code == 200:
+                    pending.pop(0)
+                    continue
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"stand-in server not ready in {timeout}s: {pending[0]}")
+            await asyncio.sleep(0.2)
+
+
+@contextlib.asynccontextmanager
+async def standin_message_stack(args):
+    """
+    RecSys 대역 서버(serve)와 backend 대역 서버(backend/utils/standins.py)를 하위 프로세스로 실행 → backend URL
+    backend는 Supabase/OpenAI 클라이언트만 대역이고 그래프 전체와 RecSys 호출(HTTP)은 실제로 실행
+    """
+    recsys_port, backend_port = free_port(), free_port()
+    recsys_cmd = [sys.executable, os.path.join(HERE, "loadtest.py"), "serve", "--port", str(recsys_port),
+                  "--ce-ms-per-pair", str(args.ce_ms_per_pair), *standin_args(args)]
+    if args.work_dir:
+        recsys_cmd += ["--work-dir", args.work_dir]
+    backend_cmd = [sys.executable, BACKEND_STANDINS, "--port", str(backend_port),
+                   "--recsys-url", f"http://127.0.0.1:{recsys_port}/recommend",
+                   "--llm-latency-ms", str(args.llm_latency_ms), *standin_args(args)]
+    # 서버 로그는 stderr로 (stdout은 JSON 결과 전용)
+    procs = [
+        subprocess.Popen(recsys_cmd, cwd=HERE, stdout=subprocess.DEVNULL),
+        subprocess.Popen(backend_cmd, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL),
+    ]
+    try:
+        await wait_healthy(
+            procs, [f"http://127.0.0.1:{recsys_port}/ready", f"http://127.0.0.1:{backend_port}/"], args.startup_timeout,
+        )
+        yield f"http://127.0.0.1:{backend_port}"
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+
+async def server_loop_lag(client: httpx.AsyncClient, window: float) -> Optional[Dict[str, Any]]:
+    try:
+        resp = await client.get("/stats/event-loop", params={"window": window})
+        return resp.json() if resp.status_code == 200 else None
+    except Exception:
+        return None
+
+
+async def run(args) -> Dict[str, Any]:
+    async with contextlib.AsyncExitStack() as stack:
+        path = "/recommend" if args.target == "recommend" else "/message"
+        local_lag: Optional[LoopLagMonitor] = None
+        url = args.url
+        if url is None and args.target == "message":
+            if not os.path.exists(BACKEND_STANDINS):
+                raise SystemExit(f"backend 대역 서버가 없습니다: {BACKEND_STANDINS} (--url로 실행 중인 backend 지정)")
+            url = await stack.enter_async_context(standin_message_stack(args))
+        if url:
+            limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+            client = httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits)
+        else:
+            client, local_lag = await in_process_recommend(args)
+        client = await stack.enter_async_context(client)
+        label = args.url or ("stand-in processes" if url else "in-process")
+        return await run_levels(args, client, path, label, local_lag)
+
+
+async def run_levels(
+    args, client: httpx.AsyncClient, path: str, label: str, local_lag: Optional[LoopLagMonitor],
+) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+
+    async def fire(result: LevelResult) -> None:
+        await send(client, path, make_payload(args.target, rng, args.users, args.brand_rate), result)
+
+    levels = args.concurrency if args.mode == "closed" else args.rate
+    report: Dict[str, Any] = {
+        "target": args.target,
+        "url": label,
+        "mode": args.mode,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "params": {k: v for k, v in vars(args).items() if k not in ("command", "output")},
+        "levels": [],
+    }
+    if args.warmup > 0:
+        await closed_loop(fire, levels[0] if args.mode == "closed" else 1, args.warmup)
+    for level in levels:
+        print(f"▶ {args.target} {args.mode} level={level} duration={args.duration}s", file=sys.stderr)
+        if local_lag is not None:
+            local_lag.reset()
+        started = time.perf_counter()
+        if args.mode == "closed":
+            result = await closed_loop(fire, int(level), args.duration)
+        else:
+            result = await open_loop(fire, float(level), args.duration, args.max_in_flight, args.seed)
+        elapsed = time.perf_counter() - started
+        summary = {("concurrency" if args.mode == "closed" else "rate"): level, **result.summary(elapsed)}
+        summary["elapsed_sec"] = round(elapsed, 2)
+        summary["event_loop_lag"] = (
+            local_lag.stats() if local_lag is not None else await server_loop_lag(client, elapsed)
+        )
+        report["levels"].append(summary)
+        print(
+            f"  ✓ {summary.get('throughput_rps')} rps, p95={summary.get('latency_ms', {}).get('p95')}ms, "
+            f"errors={summary['errors']}, loop p99={(summary['event_loop_lag'] or {}).get('p99_ms')}ms",
+            file=sys.stderr,
+        )
+        if args.cooldown > 0:
+            await asyncio.sleep(args.cooldown)
+    if report["levels"]:
+        peak = max(report["levels"], key=lambda r: r.get("throughput_rps") or 0)
+        report["peak"] = {k: peak.get(k) for k in ("concurrency", "rate", "throughput_rps", "latency_ms") if k in peak}
+    return report
+
+
+def serve(args) -> None:
+    """RecSys 앱 + 대역으로 uvicorn 실행 (backend 부하 테스트 시 RecSys_API_URL 대상)"""
+    import uvicorn
+
+    import main
+    from standins import FakeCrossEncoder, SyntheticCatalog, install
+
+    data = SyntheticCatalog(args.products, args.users, seed=args.seed)
+    install(data, args.db_latency_ms, args.embed_latency_ms, FakeCrossEncoder(args.ce_ms_per_pair), args.work_dir)
+    print(f"🧪 RecSys stand-in server: {args.products} products, {args.users} customers")
+    uvicorn.run(main.app, host=args.host, port=args.port, log_level="warning")
+
+
+def add_standin_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=1000, help="고객 수 (요청의 user_id 범위)")
+    parser.add_argument("--ce-ms-per-pair", type=float, default=0.0, help="CE 대역의 쌍당 추론 시간")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--work-dir", default=None, help="재채점용 원본 벡터 파일 위치 (없으면 재채점 생략)")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for RecSys /recommend and backend /message")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="부하 생성")
+    p_run.add_argument("--target", choices=["recommend", "message"], default="recommend")
+    p_run.add_argument(
+        "--url", default=None,
+        help="대상 서버 (없으면 recommend는 RecSys를 프로세스 안에서, message는 RecSys/backend 대역 서버를 하위 프로세스로 실행)",
+    )
+    p_run.add_argument("--mode", choices=["closed", "open"], default="closed")
+    p_run.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64], help="closed-loop 동시성 단계")
+    p_run.add_argument("--rate", type=float, nargs="+", default=[10, 50, 100], help="open-loop 초당 요청 수 단계")
+    p_run.add_argument("--duration", type=float, default=15.0, help="단계별 측정 시간 (초)")
+    p_run.add_argument("--warmup", type=float, default=3.0, help="측정 전 워밍업 (초)")
+    p_run.add_argument("--cooldown", type=float, default=1.0, help="단계 사이 대기 (초)")
+    p_run.add_argument("--max-in-flight", type=int, default=1000, help="open-loop 진행 중 요청 상한")
+    p_run.add_argument("--timeout", type=float, default=60.0)
+    p_run.add_argument("--brand-rate", type=float, default=0.3, help="브랜드 지정 요청 비율")
+    p_run.add_argument("--output", help="JSON 저장 경로 (없으면 stdout)")
+    p_run.add_argument("--llm-latency-ms", type=float, default=0.0, help="backend 대역의 채팅 완성 1회당 지연 (message)")
+    p_run.add_argument("--startup-timeout", type=float, default=120.0, help="대역 서버 준비 대기 (초, message)")
+    add_standin_args(p_run)
+
+    p_serve = sub.add_parser("serve", help="RecSys + 대역 서버 실행")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8001)
+    add_standin_args(p_serve)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args)
+        return
+
+    with contextlib.redirect_stdout(sys.stderr):  # 로드 로그가 JSON 출력에 섞이지 않도록
+        report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"✅ saved {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
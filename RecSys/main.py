@@ -1,14 +1,34 @@
-from fastapi import FastAPI, HTTPException, Response
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+import asyncio
 import uvicorn
-from recommendation_model_API import get_recommendation
+import time
+from recommendation_model_API import (
+    get_recommendation, get_recommendations_batch, get_recommendations_by_intent,
+    get_async_supabase, get_embedding_provider, get_ce_stats, get_result_cache_stats,
+    get_singleflight_stats, collect_precomputed_metrics,
+    warm_cross_encoder, warm_passage_tokens,
+)
+from catalog import get_catalog
+from metrics import registry, CONTENT_TYPE, EVENT_LOOP_LAG
+from shared.loop_monitor import LoopLagMonitor
+from shared.applog import configure_logging, get_logger, request_scope
+from vector_index import get_product_index
+from snapshot import get_snapshot_stats
+from config import (
+    CATALOG_ENABLED, ANN_INDEX_ENABLED, CE_PRETOKENIZE, LOG_LEVEL, LOG_DEBUG_SAMPLE_RATE, LOG_FORMAT,
+    LOOP_LAG_INTERVAL_SEC, LOOP_LAG_HISTORY,
+)
 from dotenv import load_dotenv
 import os
 from models import CustomerProfile
 
 # Load environment variables
 load_dotenv()
+configure_logging(LOG_LEVEL, LOG_DEBUG_SAMPLE_RATE, LOG_FORMAT)
+log = get_logger("recsys.main")
 
 app = FastAPI(
     title="Blooming Recommendation System",
@@ -16,11 +36,30 @@ app = FastAPI(
     version="0.1.0"
 )
 
+@app.middleware("http")
+async def log_context(request: Request, call_next):
+    """
+    Tag every log line of a request with its id (X-Request-ID or generated)
+    and decide debug-log sampling once per request.
+    """
+    with request_scope(request.headers.get("x-request-id")) as request_id:
+        response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 class RecommendationRequest(BaseModel):
     user_id: str
     target_brand: Optional[List[str]] = [] # Target brand list
     intention: Optional[str] = None # Recommendation intention (ex: "weather", "new_product", "general")
 
+class BatchRecommendationRequest(BaseModel):
+    requests: List[RecommendationRequest] # 유저별 (user_id, target_brand, intention)
+
+class MultiIntentRecommendationRequest(BaseModel):
+    user_id: str
+    target_brand: Optional[List[str]] = [] # Target brand list
+    intentions: List[str] = ["", "event", "weather"] # Intents computed in one pass ("" = regular)
+
 class RecommendationResponse(BaseModel):
     product_id: str
     product_name: str
@@ -28,6 +67,63 @@ class RecommendationResponse(BaseModel):
     reason: str
     product_data: Optional[Dict[str, Any]] = None
 
+# Warmup progress per component (catalog / ANN index have DB fallbacks, so they are reported but optional)
+readiness: Dict[str, Any] = {
+    "clients": False,
+    "catalog": not CATALOG_ENABLED,
+    "ann_index": not ANN_INDEX_ENABLED,
+    "cross_encoder": False,
+    "warmup_done": False,
+    "warmup_sec": None,
+    "error": None,
+}
+_warmup_task: Optional[asyncio.Task] = None
+_pretokenize_task: Optional[asyncio.Task] = None
+loop_monitor = LoopLagMonitor(LOOP_LAG_INTERVAL_SEC, LOOP_LAG_HISTORY, on_sample=EVENT_LOOP_LAG.observe)
+
+def _log_pretokenize_result(task: asyncio.Task) -> None:
+    """사전 토큰화 작업 실패를 로그로 남김 (참조 유지 + 예외 회수)"""
+    if not task.cancelled() and task.exception() is not None:
+        log.warning("pretokenize_failed", error=str(task.exception()))
+
+async def warmup():
+    """
+    Preload clients, the product catalog snapshot, the ANN index and the cross-encoder,
+    then run one dummy batch through the cross-encoder so the first user request is not cold.
+    """
+    global _pretokenize_task
+    started = time.time()
+    try:
+        sb = await get_async_supabase()
+        await get_embedding_provider().warmup()  # EMBED_PROVIDER=local이면 임베딩 모델 로드
+        readiness["clients"] = True
+        if CATALOG_ENABLED:
+            readiness["catalog"] = await get_catalog(sb, wait=True) is not None
+            if CE_PRETOKENIZE:
+                # 제품 content 토큰 ID 사전 계산 (완료 전 요청은 필요한 content만 즉시 토큰화)
+                _pretokenize_task = asyncio.create_task(warm_passage_tokens(sb))
+                _pretokenize_task.add_done_callback(_log_pretokenize_result)
+        if ANN_INDEX_ENABLED:
+            readiness["ann_index"] = await get_product_index(sb, wait=True) is not None
+        await warm_cross_encoder()
+        readiness["cross_encoder"] = True
+    except Exception as e:
+        readiness["error"] = str(e)
+        log.error("warmup_failed", error=str(e))
+    readiness["warmup_done"] = True
+    readiness["warmup_sec"] = round(time.time() - started, 2)
+    log.info("warmup_finished", **readiness)
+
+@app.on_event("startup")
+async def startup_event():
+    """
+    Start warming up in the background; the server accepts connections immediately
+    and /ready reports 503 until the clients and the cross-encoder are loaded.
+    """
+    global _warmup_task
+    loop_monitor.start()
+    _warmup_task = asyncio.create_task(warmup())
+
 @app.get("/favicon.ico", include_in_schema=False)
 async def favicon():
     return Response(status_code=204)
@@ -36,6 +132,59 @@ async def favicon():
 async def root():
     return {"status": "healthy", "service": "Recommendation System"}
 
+@app.get("/ready")
+async def ready():
+    """
+    Readiness probe: 200 once warmup has loaded the clients and the cross-encoder, otherwise 503.
+    """
+    is_ready = readiness["warmup_done"] and readiness["clients"] and readiness["cross_encoder"]
+    return JSONResponse(status_code=200 if is_ready else 503, content={"ready": is_ready, **readiness})
+
+@app.get("/stats/cross-encoder")
+async def cross_encoder_stats():
+    """
+    Cross-encoder micro-batching (queue depth, batch sizes) and score cache stats.
+    """
+    return get_ce_stats()
+
+@app.get("/stats/result-cache")
+async def result_cache_stats():
+    """
+    Profile-signature result cache stats (shared across customers with identical beauty profiles).
+    """
+    return get_result_cache_stats()
+
+@app.get("/stats/singleflight")
+async def singleflight_stats():
+    """
+    Coalescing of concurrent identical /recommend requests (leaders computed, coalesced shared an in-flight result).
+    """
+    return get_singleflight_stats()
+
+@app.get("/stats/snapshot")
+async def snapshot_stats():
+    """
+    Shared catalog/ANN snapshot state of this worker (writer or follower) and the snapshot it has mapped.
+    """
+    return get_snapshot_stats()
+
+@app.get("/stats/event-loop")
+async def event_loop_stats(window: Optional[float] = None):
+    """
+    Event-loop lag percentiles over the last `window` seconds (all kept samples if omitted).
+    High lag means something blocks the loop (sync I/O, CPU work) or the worker is saturated.
+    """
+    return loop_monitor.stats(window)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics: per-stage latency histograms, pool sizes, cache hits and CE batch sizes
+    (labelled by intent and whether brands were filtered).
+    """
+    await collect_precomputed_metrics()
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
 @app.post("/recommend", response_model=RecommendationResponse)
 async def recommend(request: RecommendationRequest):
     """
@@ -47,5 +196,25 @@ async def recommend(request: RecommendationRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/recommend/batch", response_model=List[RecommendationResponse])
+async def recommend_batch(request: BatchRecommendationRequest):
+    """
+    Recommend products for many users in one call (request order preserved).
+    """
+    try:
+        return await get_recommendations_batch(request.requests)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/recommend/intents", response_model=Dict[str, RecommendationResponse])
+async def recommend_intents(request: MultiIntentRecommendationRequest):
+    """
+    Recommend one product per intent for a user with a single retrieval / cross-encoder pass.
+    """
+    try:
+        return await get_recommendations_by_intent(request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="127.0.0.1", port=8001, reload=True)
@@ -0,0 +1,291 @@
+"""
+RecSys 지표 (Prometheus 텍스트 형식, 외부 의존성 없음)
+- Counter / Gauge / Histogram: 라벨별 값, 스레드 안전
+- MetricsRegistry.render(): GET /metrics 응답 본문 (text/plain; version=0.0.4)
+- on_collect로 등록한 함수는 render 직전에 호출 (캐시 크기 등 현재 값을 Gauge에 반영)
+- stage_timer: 추천 파이프라인 단계별 소요 시간을 recsys_stage_duration_seconds에 기록
+"""
+import math
+import threading
+from abc import ABC, abstractmethod
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_SIZE_BUCKETS = (0, 1, 5, 10, 20, 30, 50, 100, 200, 500)
+PAIR_COUNT_BUCKETS = (0, 1, 8, 16, 32, 64, 128, 256, 512)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _label_str(names: Sequence[str], values: Sequence[str], extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric(ABC):
+    """지표 공통 (이름 / 설명 / 라벨) - 하위 클래스는 kind와 _samples()를 정의"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """노출 형식 샘플 줄 목록 (HELP/TYPE 줄 제외)"""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+
+class Counter(_Metric):
+    """단조 증가 카운터"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels: str) -> None:
+        """외부 누적값 반영 (캐시 객체의 hits 등, on_collect에서 사용)"""
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_label_str(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    """현재 값 (set으로 덮어씀)"""
+
+    kind = "gauge"
+
+
+class Histogram(_Metric):
+    """누적 버킷 히스토그램 (_bucket / _sum / _count)"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values: Dict[Tuple[str, ...], List[float]] = {}  # [버킷별 개수..., sum]
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 1)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-1] += value
+
+    def count(self, **labels: str) -> int:
+        state = self._values.get(self._key(labels))
+        return int(sum(state[:-1])) if state else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0.0
+            for bound, n in zip(self.buckets, state):
+                cumulative += n
+                labels = _label_str(self.labelnames, key, [("le", _fmt(bound))])
+                lines.append(f"{self.name}_bucket{labels} {_fmt(cumulative)}")
+            labels = _label_str(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_fmt(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {_fmt(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def on_collect(self, fn: Callable[[], None]) -> None:
+        """render 직전에 호출할 함수 등록 (현재 값 Gauge 갱신용)"""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        for fn in list(self._collectors):
+            try:
+                fn()
+            except Exception as e:
+                print(f"⚠️ [Metrics] collector failed: {e}")
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for m in metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# ============================================================================
+# 추천 파이프라인 지표 (라벨: intent = regular/event/weather/other, brand_filtered = true/false)
+# ============================================================================
+
+REQUEST_LABELS = ("intent", "brand_filtered")
+INTENT_LABELS = ("event", "weather")  # 파이프라인이 구분하는 intent, 그 외 값은 other
+
+STAGE_SECONDS = registry.histogram(
+    "recsys_stage_duration_seconds",
+    "Latency of each recommendation pipeline stage.",
+    ("stage",) + REQUEST_LABELS,
+)
+RECOMMEND_SECONDS = registry.histogram(
+    "recsys_recommend_duration_seconds",
+    "End-to-end latency of a single recommendation.",
+    REQUEST_LABELS,
+)
+RECOMMENDATIONS = registry.counter(
+    "recsys_recommendations_total",
+    "Recommendations by outcome (ok, empty, error, result_cache, precomputed, coalesced).",
+    REQUEST_LABELS + ("outcome",),
+)
+POOL_SIZE = registry.histogram(
+    "recsys_pool_size",
+    "Candidate pool size per stage (retrieved, products, cross_encoder).",
+    ("pool",) + REQUEST_LABELS,
+    buckets=POOL_SIZE_BUCKETS,
+)
+CACHE_REQUESTS = registry.counter(
+    "recsys_cache_requests_total",
+    "Per-request cache lookups by cache and result (hit/miss).",
+    ("cache", "result") + REQUEST_LABELS,
+)
+CE_PAIRS = registry.histogram(
+    "recsys_ce_request_pairs",
+    "Cross-encoder pairs per request (scored = after cascade, predicted = score cache misses).",
+    ("kind",) + REQUEST_LABELS,
+    buckets=PAIR_COUNT_BUCKETS,
+)
+CE_BATCH_PAIRS = registry.histogram(
+    "recsys_ce_batch_pairs",
+    "Unique pairs per cross-encoder micro-batch.",
+    buckets=PAIR_COUNT_BUCKETS,
+)
+CACHE_LOOKUPS = registry.counter(
+    "recsys_cache_lookups_total",
+    "Process-wide cache lookups by cache and result (hit/miss/expired).",
+    ("cache", "result"),
+)
+CACHE_ENTRIES = registry.gauge(
+    "recsys_cache_entries",
+    "Current number of entries per cache.",
+    ("cache",),
+)
+CE_QUEUE = registry.gauge(
+    "recsys_ce_queue_pairs",
+    "Cross-encoder pairs waiting in the micro-batch queue or running.",
+    ("state",),
+)
+CE_BATCH_REQUESTS = registry.histogram(
+    "recsys_ce_batch_requests",
+    "Requests coalesced into one cross-encoder micro-batch.",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+SINGLEFLIGHT_REQUESTS = registry.counter(
+    "recsys_singleflight_requests_total",
+    "Live /recommend requests by single-flight role (leader = computed, coalesced = shared an in-flight result).",
+    ("role",),
+)
+EVENT_LOOP_LAG = registry.histogram(
+    "recsys_event_loop_lag_seconds",
+    "How late the event loop woke up a periodic timer (loop_monitor.LoopLagMonitor).",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+def request_labels(intent: Optional[str], target_brands: Optional[Sequence[str]]) -> Dict[str, str]:
+    """intent는 클라이언트가 보낸 임의 문자열 (backend crm_reason 등) → 고정 집합으로 묶어 라벨 수를 제한"""
+    if not intent:
+        label = "regular"
+    else:
+        label = intent if intent in INTENT_LABELS else "other"
+    return {"intent": label, "brand_filtered": "true" if target_brands else "false"}
+
+
+@contextmanager
+def stage_timer(stage: str, labels: Dict[str, str]) -> Iterator[None]:
+    """with 블록 소요 시간을 단계 히스토그램에 기록 (예외가 나도 기록)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage, **labels)
+
+
+def observe_ce_batch(unique_pairs: int, requests: int) -> None:
+    CE_BATCH_PAIRS.observe(unique_pairs)
+    CE_BATCH_REQUESTS.observe(requests)
@@ -0,0 +1,212 @@
+"""
+Cross-Encoder ONNX Runtime 백엔드 (CPU 전용 노드용)
+- BAAI/bge-reranker-v2-m3를 ONNX로 export 후 동적 int8 양자화
+- 시퀀스 길이 버킷팅: 토큰 길이순 정렬 → 배치별로 가장 작은 버킷 길이까지만 패딩 (ce_tokens)
+- predict_ids: PairEncoder로 조립한 토큰 ID를 바로 추론 (제품 content 토큰화 생략)
+- sentence_transformers CrossEncoder.predict와 같은 형태(로짓에 sigmoid)로 점수 반환
+- export 시 PyTorch 점수와 parity 검사 → manifest.json에 기록, 실패한 산출물은 로드하지 않음
+
+export:
+    python onnx_cross_encoder.py
+"""
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import (
+    CE_MODEL, CE_ONNX_DIR, CE_ONNX_QUANTIZE, CE_LENGTH_BUCKETS, CE_ONNX_BATCH_SIZE,
+    CE_ONNX_INTRA_THREADS, CE_PARITY_TOLERANCE, CE_MAX_WORKERS,
+)
+from ce_tokens import pad_batches
+from shared.applog import get_logger
+
+log = get_logger("recsys.cross_encoder")
+
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model_int8.onnx"
+MANIFEST_FILE = "manifest.json"
+
+# parity 검사용 샘플 (쿼리, 제품 content)
+PARITY_PAIRS = [
+    ("건성 피부 보습 고민, 촉촉한 수분 크림 선호",
+     "히알루론산과 세라마이드가 함유된 고보습 수분 크림으로 건조한 피부에 깊은 보습을 선사합니다."),
+    ("지성 피부 모공 피지 관리, 산뜻한 제형",
+     "피지 컨트롤 파우더가 함유된 산뜻한 젤 타입 로션. 번들거림 없이 모공을 케어합니다."),
+    ("민감성 피부 진정, 여름 자외선 차단",
+     "시카 성분의 저자극 선크림 SPF50+ PA++++. 민감한 피부도 편안하게 사용할 수 있습니다."),
+    ("주름 탄력 안티에이징",
+     "레티놀과 펩타이드로 탄력을 채우는 나이트 세럼. 잔주름 개선 기능성 인증."),
+    ("Dry skin, hydration, winter",
+     "Rich barrier cream with shea butter and squalane for very dry skin in cold weather."),
+    ("미백 톤업 잡티",
+     "비타민C 유도체와 나이아신아마이드로 칙칙한 피부 톤을 밝혀주는 브라이트닝 앰플."),
+    ("쿨톤 립 메이크업",
+     "맑은 발색의 로즈 핑크 립 틴트. 촉촉한 글로우 마무리."),
+    ("트러블 여드름 진정",
+     "티트리 추출물과 살리실산이 함유된 약산성 클렌징 폼."),
+]
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class OnnxCrossEncoder:
+    """ONNX Runtime 세션 + 토크나이저 - CrossEncoder.predict 대체"""
+
+    def __init__(
+        self,
+        session,
+        tokenizer,
+        buckets: Sequence[int] = CE_LENGTH_BUCKETS,
+        batch_size: int = CE_ONNX_BATCH_SIZE,
+    ):
+        self.session = session
+        self.tokenizer = tokenizer
+        self.buckets = tuple(sorted(buckets))
+        self.batch_size = batch_size
+        self.max_length = self.buckets[-1]
+        self.pad_token_id = tokenizer.pad_token_id or 0
+        self.input_names = {i.name for i in session.get_inputs()}
+
+    def predict(self, pairs: List[Tuple[str, str]], **_: Any) -> np.ndarray:
+        """(쿼리, 문서) 쌍의 relevance 점수 (sigmoid, 0~1)"""
+        if not pairs:
+            return np.zeros(0, dtype=np.float32)
+        encoded = self.tokenizer(
+            [q for q, _ in pairs],
+            [d for _, d in pairs],
+            truncation=True,
+            max_length=self.max_length,
+        )
+        return self.predict_ids(encoded["input_ids"])
+
+    def predict_ids(self, ids: List[List[int]]) -> np.ndarray:
+        """special token이 포함된 쌍 토큰 ID 목록의 점수 (sigmoid, 0~1)"""
+        scores = np.zeros(len(ids), dtype=np.float32)
+        for batch, input_ids, attention_mask in pad_batches(ids, self.buckets, self.batch_size, self.pad_token_id):
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+            logits = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+            scores[batch] = _sigmoid(np.asarray(logits, dtype=np.float32).reshape(len(batch), -1)[:, 0])
+        return scores
+
+
+def read_manifest(model_dir: str = CE_ONNX_DIR) -> Optional[Dict[str, Any]]:
+    path = os.path.join(model_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_onnx_cross_encoder(model_dir: str = CE_ONNX_DIR) -> OnnxCrossEncoder:
+    """
+    export된 ONNX 모델 로드
+    산출물이 없거나 parity 검사를 통과하지 못했으면 RuntimeError (호출 측은 PyTorch로 폴백)
+    """
+    manifest = read_manifest(model_dir)
+    if manifest is None:
+        raise RuntimeError(f"ONNX model not exported: {model_dir} (run `python onnx_cross_encoder.py`)")
+    if manifest.get("model") != CE_MODEL:
+        raise RuntimeError(f"ONNX model mismatch: exported={manifest.get('model')} configured={CE_MODEL}")
+    if not manifest.get("parity_ok"):
+        raise RuntimeError(f"ONNX parity check failed (max_abs_diff={manifest.get('parity_max_abs_diff')})")
+
+    import onnxruntime as ort
+    from transformers import AutoTokenizer
+
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    # CE executor 워커끼리 코어를 나눠 사용
+    opts.intra_op_num_threads = CE_ONNX_INTRA_THREADS or max(1, (os.cpu_count() or 1) // CE_MAX_WORKERS)
+    model_file = manifest["file"]
+    session = ort.InferenceSession(
+        os.path.join(model_dir, model_file), sess_options=opts, providers=["CPUExecutionProvider"]
+    )
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    log.info("onnx_cross_encoder_loaded", file=model_file, parity_max_abs_diff=manifest["parity_max_abs_diff"])
+    return OnnxCrossEncoder(session, tokenizer)
+
+
+def check_parity(reference, candidate, pairs: List[Tuple[str, str]] = PARITY_PAIRS) -> float:
+    """두 Cross-Encoder의 점수 최대 절대 오차"""
+    ref = np.asarray(reference.predict(pairs), dtype=np.float32)
+    got = np.asarray(candidate.predict(pairs), dtype=np.float32)
+    return float(np.max(np.abs(ref - got)))
+
+
+def export_onnx(model_dir: str = CE_ONNX_DIR, quantize: bool = CE_ONNX_QUANTIZE) -> Dict[str, Any]:
+    """CE_MODEL을 ONNX로 export (+ 동적 int8 양자화) 후 PyTorch 점수와 parity 검사"""
+    import torch
+    import onnxruntime as ort
+    from sentence_transformers import CrossEncoder
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(model_dir, exist_ok=True)
+    started = time.time()
+
+    tokenizer = AutoTokenizer.from_pretrained(CE_MODEL)
+    model = AutoModelForSequenceClassification.from_pretrained(CE_MODEL).eval()
+    tokenizer.save_pretrained(model_dir)
+
+    dummy = tokenizer([PARITY_PAIRS[0][0]], [PARITY_PAIRS[0][1]], return_tensors="pt")
+    fp32_path = os.path.join(model_dir, ONNX_FP32_FILE)
+    print(f"[ONNX] exporting {CE_MODEL} → {fp32_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=17,
+        )
+
+    model_file = ONNX_FP32_FILE
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print(f"[ONNX] quantizing → {ONNX_INT8_FILE} (dynamic int8)")
+        quantize_dynamic(
+            fp32_path,
+            os.path.join(model_dir, ONNX_INT8_FILE),
+            weight_type=QuantType.QInt8,
+            use_external_data_format=True,  # fp32 모델이 2GB protobuf 제한을 넘음
+        )
+        model_file = ONNX_INT8_FILE
+
+    session = ort.InferenceSession(os.path.join(model_dir, model_file), providers=["CPUExecutionProvider"])
+    candidate = OnnxCrossEncoder(session, tokenizer)
+    reference = CrossEncoder(CE_MODEL, device="cpu")
+    max_diff = check_parity(reference, candidate)
+
+    manifest = {
+        "model": CE_MODEL,
+        "file": model_file,
+        "quantized": quantize,
+        "parity_max_abs_diff": max_diff,
+        "parity_tolerance": CE_PARITY_TOLERANCE,
+        "parity_ok": max_diff <= CE_PARITY_TOLERANCE,
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(model_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    status = "✅" if manifest["parity_ok"] else "❌"
+    print(f"{status} [ONNX] parity max_abs_diff={max_diff:.4f} (tolerance={CE_PARITY_TOLERANCE}) "
+          f"- {time.time() - started:.1f}s")
+    return manifest
+
+
+if __name__ == "__main__":
+    export_onnx()
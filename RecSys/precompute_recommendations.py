@@ -0,0 +1,131 @@
+"""
+추천 결과 오프라인 사전 계산 배치 작업
+전체 고객 × intent(PRECOMPUTE_INTENTS) × 브랜드 조건(전체 브랜드 / 페르소나 추천 브랜드)에 대해
+추천 파이프라인(recommend_batch = recommend_product_with_brands의 배치 버전)을 실행하고
+top-K 결과를 RecommendationStore(로컬 SQLite)에 저장합니다.
+/recommend는 PRECOMPUTE_MAX_AGE_SEC 이내의 결과를 바로 응답하고, 미스/만료만 실시간 계산합니다.
+
+실행 (cron 등으로 PRECOMPUTE_MAX_AGE_SEC보다 짧은 주기로):
+    python precompute_recommendations.py --personas personas.json
+    python precompute_recommendations.py --limit 1000 --intents "" event
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from config import (
+    ANN_INDEX_ENABLED, CUSTOMER_ID_COL, CUSTOMER_PERSONA_COL, PERSONA_DB_PATH,
+    PRECOMPUTE_INTENTS, PRECOMPUTE_TOP_K, PRECOMPUTE_BATCH_SIZE, PRECOMPUTE_MAX_AGE_SEC,
+)
+from shared.applog import configure_logging
+from catalog import fetch_all_rows
+from recommendation_store import RecommendationStore, get_recommendation_store, intent_key
+from recommendation_model_API import get_async_supabase, get_current_season, recommend_batch
+from vector_index import get_product_index
+
+
+def persona_key(value: Any) -> str:
+    """'P1' / '1' / 1 → '1' (orchestrator와 같은 규칙)"""
+    key = str(value or "").strip()
+    return key[1:] if key.lower().startswith("p") else key
+
+
+def load_persona_brands(path: str = PERSONA_DB_PATH) -> Dict[str, List[str]]:
+    """persona_db.json 형식 파일 → {페르소나 키: recommended_brands} (경로를 지정하지 않으면 빈 dict)"""
+    if not path:
+        print("⚠️ [Precompute] PERSONA_DB_PATH not set → 전체 브랜드만 계산")
+        return {}
+    if not os.path.exists(path):
+        print(f"⚠️ [Precompute] persona DB not found: {path} → 전체 브랜드만 계산")
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        db = json.load(f)
+    return {persona_key(k): v.get("recommended_brands", []) for k, v in db.items()}
+
+
+def build_jobs(
+    customers: List[Dict[str, Any]],
+    persona_brands: Dict[str, List[str]],
+    intents: Sequence[str] = PRECOMPUTE_INTENTS,
+) -> List[Dict[str, Any]]:
+    """고객별 (intent × 브랜드 조건) 추천 요청 목록"""
+    jobs = []
+    for c in customers:
+        brand_sets = [[]]
+        brands = persona_brands.get(persona_key(c.get(CUSTOMER_PERSONA_COL)))
+        if brands:
+            brand_sets.append(list(brands))
+        for intent in intents:
+            for target_brands in brand_sets:
+                jobs.append({"user_id": str(c[CUSTOMER_ID_COL]), "target_brands": target_brands, "intent": intent})
+    return jobs
+
+
+async def run_precompute(
+    limit: Optional[int] = None,
+    intents: Sequence[str] = PRECOMPUTE_INTENTS,
+    top_k: int = PRECOMPUTE_TOP_K,
+    batch_size: int = PRECOMPUTE_BATCH_SIZE,
+    store: Optional[RecommendationStore] = None,
+    persona_path: str = PERSONA_DB_PATH,
+) -> Dict[str, Any]:
+    """사전 계산 실행 - 요약 통계 반환"""
+    started = time.time()
+    store = store or get_recommendation_store()
+    if store is None:
+        raise RuntimeError("recommendation store unavailable")
+    sb = await get_async_supabase()
+    if ANN_INDEX_ENABLED:
+        await get_product_index(sb, wait=True)  # 요청 경로는 구성 중 RPC로 폴백하므로 배치 시작 전에 구성
+    customers = await fetch_all_rows(sb, "customers", f"{CUSTOMER_ID_COL}, {CUSTOMER_PERSONA_COL}", key_col=CUSTOMER_ID_COL)
+    if limit:
+        customers = customers[:limit]
+    jobs = build_jobs(customers, load_persona_brands(persona_path), intents)
+    season = get_current_season()
+    print(f"🗓️ [Precompute] customers={len(customers)} jobs={len(jobs)} intents={list(intents)} top_k={top_k}")
+
+    written = failed = 0
+    for start in range(0, len(jobs), batch_size):
+        chunk = jobs[start:start + batch_size]
+        results = await recommend_batch(chunk, top_k=top_k)
+        entries = [
+            (job["user_id"], intent_key(job["intent"], season), job["target_brands"], result)
+            for job, result in zip(chunk, results)
+            if result
+        ]
+        written += store.put_many(entries)
+        failed += len(chunk) - len(entries)
+        print(f"  - {min(start + batch_size, len(jobs))}/{len(jobs)} (written={written}, failed={failed})")
+
+    purged = store.purge_older_than(PRECOMPUTE_MAX_AGE_SEC)
+    summary = {
+        "customers": len(customers),
+        "jobs": len(jobs),
+        "written": written,
+        "failed": failed,
+        "purged": purged,
+        "elapsed_sec": round(time.time() - started, 2),
+    }
+    print(f"✅ [Precompute] done: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute recommendations into the local store")
+    parser.add_argument("--limit", type=int, default=None, help="처리할 최대 고객 수")
+    parser.add_argument("--intents", nargs="*", default=list(PRECOMPUTE_INTENTS), help='intent 목록 ("" = regular)')
+    parser.add_argument("--top-k", type=int, default=PRECOMPUTE_TOP_K)
+    parser.add_argument("--batch-size", type=int, default=PRECOMPUTE_BATCH_SIZE)
+    parser.add_argument("--personas", default=PERSONA_DB_PATH, help="페르소나별 recommended_brands JSON (기본 PERSONA_DB_PATH)")
+    parser.add_argument("--verbose", action="store_true", help="추천 파이프라인 DEBUG 로그 출력")
+    args = parser.parse_args()
+    # 파이프라인 로그는 --verbose일 때만 (기본은 경고 이상)
+    configure_logging("DEBUG" if args.verbose else "WARNING")
+    asyncio.run(run_precompute(args.limit, args.intents, args.top_k, args.batch_size, persona_path=args.personas))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,43 @@
+from __future__ import annotations
+
 import os
 import json
-from typing import Dict, Any, List, Optional, Tuple
-from openai import OpenAI
-import httpx
+import asyncio
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
+import numpy as np
 from config import (
     settings,
     # Cross-Encoder 설정
-    TOP_K, CANDIDATE_POOL, EMBED_MODEL, EMBED_DIM, CE_MODEL, KW_BONUS_ALPHA,
+    TOP_K, CANDIDATE_POOL, EMBED_MODEL, CE_MODEL, KW_BONUS_ALPHA, MATCH_PRODUCTS_RPC,
     CUSTOMER_ID_COL, PRODUCT_VECTOR_FK_COL,
+    # 다단계 랭킹
+    CASCADE_ENABLED, RETRIEVAL_POOL, CASCADE_SIM_WEIGHT, CASCADE_MAX_CE, CASCADE_MIN_CE, CASCADE_LOAD_HIGH_PAIRS,
+    # 인메모리 ANN 인덱스
+    ANN_INDEX_ENABLED,
+    # 제품 카탈로그 스냅샷
+    CATALOG_ENABLED,
+    # 쿼리 임베딩 캐시
+    EMBED_CACHE_SIZE, EMBED_CACHE_PATH,
+    # Cross-Encoder 점수 캐시
+    CE_SCORE_CACHE_SIZE,
+    # 추천 결과 캐시
+    RESULT_CACHE_ENABLED, RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SEC, RESULT_CACHE_TOP_K,
+    # 동일 요청 합치기
+    SINGLEFLIGHT_ENABLED,
+    # 비동기 요청 경로
+    HTTP_MAX_CONNECTIONS, HTTP_TIMEOUT_SEC, CE_MAX_WORKERS,
+    # Cross-Encoder 추론 백엔드
+    CE_BACKEND,
+    # Cross-Encoder 입력 토큰화
+    CE_PRETOKENIZE,
+    # Cross-Encoder 마이크로 배칭
+    CE_BATCH_ENABLED, CE_FORWARD_BATCH_SIZE,
+    # 사전 계산 추천 테이블
+    PRECOMPUTE_ENABLED,
     # 동의어 매핑
     SKIN_TYPE_MAP, CONCERN_MAP, TONE_MAP,
     # 키워드 번역
@@ -15,25 +45,139 @@ from config import (
     # 날씨 키워드
     WEATHER_KEYWORDS, WEATHER_PRIORITY_KEYWORDS
 )
-from sentence_transformers import CrossEncoder
-import torch
 from datetime import datetime
+from vector_index import get_product_index
+from catalog import get_catalog
+from keyword_matcher import keyword_matcher
+from cache import EmbeddingCache, CEScoreCache, LRUCache, text_hash
+from embedding_provider import EmbeddingProvider, create_embedding_provider, QUERY
+from ce_batcher import CrossEncoderBatcher
+from singleflight import SingleFlight
+from ce_tokens import PairEncoder, torch_predict_ids
+from recommendation_store import get_recommendation_store, intent_key, brands_key
+from shared.applog import get_logger
+from metrics import (
+    registry, request_labels, stage_timer, observe_ce_batch,
+    STAGE_SECONDS, RECOMMEND_SECONDS, RECOMMENDATIONS, POOL_SIZE, CACHE_REQUESTS, CE_PAIRS,
+    CACHE_LOOKUPS, CACHE_ENTRIES, CE_QUEUE, SINGLEFLIGHT_REQUESTS,
+)
+
+log = get_logger("recsys.pipeline")
+
+if TYPE_CHECKING:
+    # 무거운 의존성(openai, torch, sentence_transformers)은 실제 사용 시점에 import
+    # → 모듈 import가 가벼워져 ML과 무관한 도구/스크립트가 빠르게 시작
+    from openai import AsyncOpenAI
+    from sentence_transformers import CrossEncoder
 
 # Cross-Encoder 캐싱 (한 번만 로드)
 _cross_encoder_cache = None
+_cross_encoder_lock = threading.Lock()
+
+# 쿼리 임베딩 캐싱 (동일 프로필 → 동일 쿼리 텍스트, 키에 모델명 포함 → 제공자를 바꾸면 자동 분리)
+_embedding_cache = EmbeddingCache(EMBED_MODEL, EMBED_CACHE_SIZE, EMBED_CACHE_PATH)
+
+# Cross-Encoder 점수 캐싱 (content 변경 시 자동 무효화)
+_ce_score_cache = CEScoreCache(CE_SCORE_CACHE_SIZE)
+
+# 추천 결과 캐시 (프로필 시그니처 키 → (랭킹 개수, 상위 랭킹 결과), TTL + 크기 제한 LRU)
+_result_cache = LRUCache(RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL_SEC)
+
+# 진행 중인 동일 /recommend 요청 합치기 ((user_id, 브랜드, intent) → 계산 1회)
+_recommend_flight = SingleFlight()
+
+# 요청 간 재사용하는 비동기 클라이언트 (커넥션 풀 공유)
+_async_supabase = None
+_async_openai: Optional[AsyncOpenAI] = None
+_embedding_provider: Optional[EmbeddingProvider] = None
+_client_lock: Optional[asyncio.Lock] = None
+
+# Cross-Encoder 추론 전용 executor (이벤트 루프 블로킹 방지, 동시 추론 수 제한)
+_ce_executor = ThreadPoolExecutor(max_workers=CE_MAX_WORKERS, thread_name_prefix="cross-encoder")
+
+# 동시 요청 간 Cross-Encoder 마이크로 배칭
+_ce_batcher: Optional[CrossEncoderBatcher] = None
+_ce_batcher_model = None
+
+# 제품 content 토큰 ID 캐시 (쿼리만 요청마다 토큰화)
+_pair_encoder: Optional[PairEncoder] = None
+_pair_encoder_model = None
+
+
+async def get_async_supabase():
+    """Supabase AsyncClient를 생성하거나 캐시된 인스턴스 반환"""
+    global _async_supabase, _client_lock
+    if _async_supabase is None:
+        if _client_lock is None:
+            _client_lock = asyncio.Lock()
+        async with _client_lock:
+            if _async_supabase is None:
+                from supabase import acreate_client
+                _async_supabase = await acreate_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    return _async_supabase
+
+
+def get_async_openai() -> AsyncOpenAI:
+    """AsyncOpenAI 클라이언트를 생성하거나 캐시된 인스턴스 반환"""
+    global _async_openai
+    if _async_openai is None:
+        import httpx
+        from openai import AsyncOpenAI
+        _async_openai = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS),
+                timeout=HTTP_TIMEOUT_SEC,
+            ),
+        )
+    return _async_openai
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """EMBED_PROVIDER에 맞는 임베딩 제공자 (openai는 공유 AsyncOpenAI 클라이언트 사용)"""
+    global _embedding_provider
+    if _embedding_provider is None:
+        _embedding_provider = create_embedding_provider(openai_client_factory=get_async_openai)
+    return _embedding_provider
+
+
+async def run_in_ce_executor(fn, *args):
+    """CPU 바운드 Cross-Encoder 작업을 전용 executor에서 실행"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_ce_executor, fn, *args)
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
 
 def get_cross_encoder() -> CrossEncoder:
-    """Cross-Encoder를 로드하거나 캐시된 인스턴스 반환"""
+    """
+    Cross-Encoder를 로드하거나 캐시된 인스턴스 반환
+    CE_BACKEND="onnx"이면 ONNX Runtime 백엔드 (로드 실패 시 PyTorch로 폴백)
+    """
     global _cross_encoder_cache
-    if _cross_encoder_cache is None:
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"[CrossEncoder] loading: {CE_MODEL} on device={device}")
-        _cross_encoder_cache = CrossEncoder(CE_MODEL, device=device)
+    if _cross_encoder_cache is not None:
+        return _cross_encoder_cache
+    with _cross_encoder_lock:  # startup 사전 토큰화와 첫 요청이 동시에 로드하지 않도록
+        if _cross_encoder_cache is None and CE_BACKEND == "onnx":
+            try:
+                from onnx_cross_encoder import load_onnx_cross_encoder
+                _cross_encoder_cache = load_onnx_cross_encoder()
+            except Exception as e:
+                log.warning("onnx_cross_encoder_unavailable", fallback="pytorch", error=str(e))
+        if _cross_encoder_cache is None:
+            import torch
+            from sentence_transformers import CrossEncoder
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            log.info("cross_encoder_loading", model=CE_MODEL, device=device)
+            _cross_encoder_cache = CrossEncoder(CE_MODEL, device=device)
     return _cross_encoder_cache
 
 
+async def load_cross_encoder() -> CrossEncoder:
+    """요청 경로용 get_cross_encoder - 아직 로드 전이면(warmup 완료 전 요청) 스레드에서 로드해 루프를 막지 않음"""
+    if _cross_encoder_cache is not None:
+        return _cross_encoder_cache
+    return await asyncio.to_thread(get_cross_encoder)
+
+
 def normalize_list(v: Any) -> List[str]:
     """리스트 정규화"""
     if v is None:
@@ -92,17 +236,30 @@ def build_user_query_text(customer: Dict[str, Any]) -> str:
     return "\n".join(lines)
 
 
-def embed_text(oa: OpenAI, text: str) -> List[float]:
-    """텍스트를 임베딩 벡터로 변환"""
-    res = oa.embeddings.create(
-        model=EMBED_MODEL,
-        input=[text],
-        encoding_format="float",
-    )
-    emb = res.data[0].embedding
-    if len(emb) != EMBED_DIM:
-        raise ValueError(f"임베딩 차원 불일치: got {len(emb)} expected {EMBED_DIM}")
-    return emb
+async def embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    여러 쿼리 텍스트를 임베딩 벡터로 변환 (캐시 우선, 미스는 제공자 호출 1회로 일괄 처리)
+    디스크 캐시(SQLite) 조회/저장은 스레드에서 일괄 처리 → 이벤트 루프를 막지 않음
+    """
+    out: List[Optional[List[float]]] = [_embedding_cache.get_memory(t) for t in texts]
+    missing = list(dict.fromkeys(t for t, e in zip(texts, out) if e is None))
+    if missing and _embedding_cache.has_disk:
+        found = await asyncio.to_thread(_embedding_cache.get_disk, missing)
+        out = [e if e is not None else found.get(t) for t, e in zip(texts, out)]
+        missing = [t for t in missing if t not in found]
+    if missing:
+        fresh = dict(zip(missing, await get_embedding_provider().embed(missing, QUERY)))
+        _embedding_cache.put_memory(fresh)
+        if _embedding_cache.has_disk:
+            # 디스크 저장은 기다리지 않음 (실패해도 메모리 캐시는 유지)
+            asyncio.get_running_loop().run_in_executor(None, _embedding_cache.put_disk, fresh)
+        out = [e if e is not None else fresh[t] for t, e in zip(texts, out)]
+    return out
+
+
+async def embed_text(text: str) -> List[float]:
+    """텍스트를 임베딩 벡터로 변환 (캐시 우선)"""
+    return (await embed_texts([text]))[0]
 
 
 def truncate_for_ce(text: str, max_chars: int = 1800) -> str:
@@ -111,6 +268,157 @@ def truncate_for_ce(text: str, max_chars: int = 1800) -> str:
     return text if len(text) <= max_chars else text[:max_chars]
 
 
+def get_pair_encoder(ce: CrossEncoder) -> Optional[PairEncoder]:
+    """Cross-Encoder 토크나이저 기반 PairEncoder (제품 content 토큰 ID 캐시) - 사용 불가면 None"""
+    global _pair_encoder, _pair_encoder_model
+    if not CE_PRETOKENIZE or getattr(ce, "tokenizer", None) is None:
+        return None
+    if _pair_encoder is None or _pair_encoder_model is not ce:
+        _pair_encoder_model = ce
+        _pair_encoder = PairEncoder(ce.tokenizer)
+    return _pair_encoder
+
+
+def predict_pairs(ce: CrossEncoder, pairs: List[Tuple[str, str]]) -> List[float]:
+    """
+    (쿼리, content) 쌍 predict - CE_FORWARD_BATCH_SIZE씩 나눠 forward pass
+    (마이크로 배치의 한 요청이 배치 상한보다 클 수 있으므로 /recommend/batch·사전 계산도 메모리 상한 유지)
+    PairEncoder 사용 시 쿼리만 토큰화하고 content는 캐시된 토큰 ID 사용 (토큰 단위 절단)
+    """
+    encoder = get_pair_encoder(ce)
+    if encoder is None:
+        return ce.predict([(q, truncate_for_ce(c)) for q, c in pairs], batch_size=CE_FORWARD_BATCH_SIZE)
+    ids = encoder.encode(pairs)
+    if hasattr(ce, "predict_ids"):
+        return ce.predict_ids(ids)
+    return torch_predict_ids(ce, ids, batch_size=CE_FORWARD_BATCH_SIZE)
+
+
+# 워밍업용 더미 쌍 (짧은/긴 입력으로 토크나이저와 모델 커널을 미리 초기화)
+WARMUP_PAIRS = [
+    ("건성 피부 보습", "고보습 수분 크림"),
+    ("지성 피부 모공 피지 관리, 산뜻한 제형 선호", "피지 컨트롤 파우더가 함유된 산뜻한 젤 타입 로션. " * 20),
+]
+
+
+async def warm_cross_encoder() -> CrossEncoder:
+    """Cross-Encoder 로드 + 더미 배치 1회 추론 (점수 캐시는 거치지 않음)"""
+    ce = await asyncio.to_thread(get_cross_encoder)
+    await run_in_ce_executor(predict_pairs, ce, WARMUP_PAIRS)
+    return ce
+
+
+async def warm_passage_tokens(sb) -> int:
+    """카탈로그의 제품 content를 미리 토큰화 (startup 백그라운드 작업)"""
+    catalog = await get_catalog(sb) if CATALOG_ENABLED else None
+    if catalog is None:
+        return 0
+    ce = await asyncio.to_thread(get_cross_encoder)
+    encoder = get_pair_encoder(ce)
+    if encoder is None:
+        return 0
+    count = await asyncio.to_thread(encoder.warm, list(catalog.iter_contents()))
+    log.info("passages_pretokenized", count=count, cache=len(encoder))
+    return count
+
+
+def get_ce_batcher(ce: CrossEncoder) -> CrossEncoderBatcher:
+    """요청 간 마이크로 배칭 스케줄러 (Cross-Encoder 인스턴스별로 1개)"""
+    global _ce_batcher, _ce_batcher_model
+    if _ce_batcher is None or _ce_batcher_model is not ce:
+        _ce_batcher_model = ce
+        _ce_batcher = CrossEncoderBatcher(
+            lambda pairs: run_in_ce_executor(predict_pairs, ce, pairs), on_batch=observe_ce_batch
+        )
+    return _ce_batcher
+
+
+def get_ce_stats() -> Dict[str, Any]:
+    """Cross-Encoder 마이크로 배칭 / 점수 캐시 지표"""
+    return {
+        "batching": _ce_batcher.stats() if _ce_batcher is not None else None,
+        "score_cache": {"size": len(_ce_score_cache), "hits": _ce_score_cache.hits, "misses": _ce_score_cache.misses},
+    }
+
+
+def collect_runtime_metrics() -> None:
+    """/metrics 렌더 직전 캐시 / CE 대기열 현재 값 반영"""
+    emb = _embedding_cache
+    CACHE_LOOKUPS.set(emb.memory.hits + emb.disk_hits, cache="embedding", result="hit")
+    CACHE_LOOKUPS.set(emb.memory.misses - emb.disk_hits, cache="embedding", result="miss")
+    CACHE_ENTRIES.set(len(emb.memory), cache="embedding")
+    CACHE_LOOKUPS.set(_ce_score_cache.hits, cache="ce_score", result="hit")
+    CACHE_LOOKUPS.set(_ce_score_cache.misses, cache="ce_score", result="miss")
+    CACHE_ENTRIES.set(len(_ce_score_cache), cache="ce_score")
+    CACHE_LOOKUPS.set(_result_cache.hits, cache="result", result="hit")
+    CACHE_LOOKUPS.set(_result_cache.misses, cache="result", result="miss")
+    CACHE_LOOKUPS.set(_result_cache.expired, cache="result", result="expired")
+    CACHE_ENTRIES.set(len(_result_cache), cache="result")
+    SINGLEFLIGHT_REQUESTS.set(_recommend_flight.leaders, role="leader")
+    SINGLEFLIGHT_REQUESTS.set(_recommend_flight.coalesced, role="coalesced")
+    if _ce_batcher is not None:
+        CE_QUEUE.set(_ce_batcher.queued_pairs, state="queued")
+        CE_QUEUE.set(_ce_batcher.running_pairs, state="running")
+
+
+registry.on_collect(collect_runtime_metrics)
+
+
+async def collect_precomputed_metrics() -> None:
+    """사전 계산 저장소 지표 반영 - 행 수는 SQLite COUNT이므로 /metrics 렌더 전에 스레드에서 조회"""
+    if not PRECOMPUTE_ENABLED:
+        return
+
+    def read() -> Optional[Tuple[int, int, int, int]]:
+        store = get_recommendation_store()
+        if store is None:
+            return None
+        return store.hits, store.misses, store.expired, len(store)
+
+    found = await asyncio.to_thread(read)
+    if found is None:
+        return
+    hits, misses, expired, rows = found
+    CACHE_LOOKUPS.set(hits, cache="precomputed", result="hit")
+    CACHE_LOOKUPS.set(misses, cache="precomputed", result="miss")
+    CACHE_LOOKUPS.set(expired, cache="precomputed", result="expired")
+    CACHE_ENTRIES.set(rows, cache="precomputed")
+
+
+async def score_many_with_cache(
+    ce: CrossEncoder,
+    requests: List[Tuple[str, List[Tuple[Any, str]]]],
+    labels: Optional[Dict[str, str]] = None,
+) -> List[List[float]]:
+    """
+    여러 (쿼리 텍스트, [(product_id, content)]) 요청을 CE 점수 캐시를 거쳐 채점
+    모든 요청의 미캐시 쌍을 모아 predict 1회로 처리
+    CE_BATCH_ENABLED이면 동시 요청들의 미캐시 쌍과 함께 마이크로 배칭
+    labels: 주면 요청 라벨로 채점/추론 쌍 수를 지표에 기록
+    """
+    plan = _ce_score_cache.lookup([(truncate_for_ce(q), items) for q, items in requests])
+    if labels is not None:
+        CE_PAIRS.observe(sum(len(items) for _, items in requests), kind="scored", **labels)
+        CE_PAIRS.observe(len(plan.pairs), kind="predicted", **labels)
+    if not plan.pairs:
+        return plan.scores
+    if CE_BATCH_ENABLED:
+        new_scores = await get_ce_batcher(ce).score(plan.pairs)
+    else:
+        new_scores = await run_in_ce_executor(predict_pairs, ce, plan.pairs)
+    return _ce_score_cache.fill(plan, new_scores)
+
+
+async def score_with_cache(
+    ce: CrossEncoder,
+    query_text: str,
+    items: List[Tuple[Any, str]],
+    labels: Optional[Dict[str, str]] = None,
+) -> List[float]:
+    """(product_id, content) 목록을 CE 점수 캐시를 거쳐 채점 - 미캐시 쌍만 predict"""
+    return (await score_many_with_cache(ce, [(query_text, items)], labels))[0]
+
+
 def expand_keywords(keywords: List[str]) -> List[str]:
     """영어 키워드를 한글 동의어로 확장하여 매칭률 향상"""
     expanded = []
@@ -178,44 +486,28 @@ def keyword_bonus(
     if not kws:
         return 0.0, {"matched_keywords": [], "hit_count": 0, "total_keywords": 0, "priority_hits": 0}
 
-    # 검색 대상: 제품 본문 + 제품 키워드 합치기
-    search_text = (product_content or "").lower()
-    if product_keywords:
-        search_text += " " + " ".join([str(k).lower() for k in product_keywords])
-    
-    # 띄어쓰기 제거한 정규화 버전
-    search_text_normalized = search_text.replace(" ", "")
+    # 검색 대상: 제품 본문 + 제품 키워드 (정규화 + 어휘 매칭은 제품 텍스트당 1회, 캐시)
+    text = keyword_matcher.product_text(product_content, product_keywords)
 
-    # 계절별 우선순위 키워드 가져오기
-    priority_kws = []
-    if current_season and current_season in WEATHER_PRIORITY_KEYWORDS:
-        priority_kws = [k.lower() for k in WEATHER_PRIORITY_KEYWORDS[current_season]]
+    # 계절별 우선순위 키워드 존재 여부
+    has_priority = bool(current_season and current_season in WEATHER_PRIORITY_KEYWORDS)
 
     # 키워드 매칭 카운트 (우선순위 키워드는 2배 가중치)
     hit_count = 0.0
-    matched_keywords = []
+    matched_keywords = keyword_matcher.match_terms(text, kws)
     priority_matched = []
     
-    for kw in kws:
-        k = kw.lower()
-        k_normalized = k.replace(" ", "")
-        
-        # 원본 매칭 OR 정규화 매칭
-        if (k in search_text) or (k_normalized in search_text_normalized):
-            matched_keywords.append(kw)
-            
-            # 우선순위 키워드인지 확인 (계절별 핵심 키워드)
-            is_priority = any(pk in k or k in pk for pk in priority_kws)
-            
-            if is_priority:
-                hit_count += 2.0  # 우선순위 키워드는 2배 가중치
-                priority_matched.append(kw)
-            else:
-                hit_count += 1.0  # 일반 키워드
+    for kw in matched_keywords:
+        # 우선순위 키워드인지 확인 (계절별 핵심 키워드, 용어별로 미리 계산된 플래그)
+        if has_priority and keyword_matcher.is_priority(kw, current_season):
+            hit_count += 2.0  # 우선순위 키워드는 2배 가중치
+            priority_matched.append(kw)
+        else:
+            hit_count += 1.0  # 일반 키워드
 
     # 0~1 정규화 (우선순위 키워드가 있을 수 있으므로 최대값 조정)
     # 모든 키워드가 우선순위라면 max = len(kws) * 2
-    max_possible_score = len(kws) * 2.0 if priority_kws else len(kws)
+    max_possible_score = len(kws) * 2.0 if has_priority else len(kws)
     score = hit_count / max(max_possible_score, 1)
     
     details = {
@@ -228,6 +520,59 @@ def keyword_bonus(
     return float(min(1.0, max(0.0, score))), details
 
 
+async def rpc_match_products(
+    sb, query_emb: List[float], target_brands: List[str] = None, match_count: int = CANDIDATE_POOL
+) -> List[Dict[str, Any]]:
+    """Supabase match_products RPC로 후보 검색 (인메모리 인덱스 폴백용)"""
+    if target_brands and len(target_brands) > 0:
+        # 브랜드가 지정된 경우
+        rpc_payload = {
+            "query_embedding": query_emb,
+            "match_count": match_count,
+            "filter_brands": target_brands
+        }
+        
+        try:
+            response = await sb.rpc(MATCH_PRODUCTS_RPC, rpc_payload).execute()
+            matches = response.data or []
+            log.debug(
+                "rpc_search", brands=target_brands, matches=len(matches),
+                top3=lambda: [(m.get("product_id"), round(float(m.get("similarity", 0)), 4)) for m in matches[:3]],
+            )
+        except Exception as e:
+            log.warning("rpc_search_failed", brands=target_brands, error=str(e))
+            matches = []
+    else:
+        # 브랜드 지정 없음 - 일반 검색
+        rpc_payload = {
+            "filter": {},
+            "match_count": match_count,
+            "query_embedding": query_emb,
+        }
+        
+        match_resp = await sb.rpc(MATCH_PRODUCTS_RPC, rpc_payload).execute()
+        matches = match_resp.data or []
+        log.debug("rpc_search", brands="ALL", pool=match_count, matches=len(matches))
+    return matches
+
+
+async def retrieve_candidates(sb, query_emb: List[float], target_brands: List[str] = None) -> List[Dict[str, Any]]:
+    """
+    후보 풀 검색: 인메모리 ANN 인덱스 우선, 인덱스가 없거나 결과가 비면 RPC 폴백
+    반환 형식은 match_products RPC와 동일 ([{product_id, similarity}])
+    cascade 랭킹 사용 시 1단계에서 걸러지므로 RETRIEVAL_POOL만큼 넓게 검색
+    """
+    pool = RETRIEVAL_POOL if CASCADE_ENABLED else CANDIDATE_POOL
+    index = await get_product_index(sb) if ANN_INDEX_ENABLED else None
+    if index is not None:
+        matches = index.search(query_emb, pool, brands=target_brands or None)
+        if matches:
+            log.debug("ann_search", brands=target_brands or "ALL", matches=len(matches), index_size=len(index))
+            return matches
+        log.warning("ann_search_empty_fallback_rpc", brands=target_brands or "ALL")
+    return await rpc_match_products(sb, query_emb, target_brands, match_count=pool)
+
+
 async def fetch_products_from_supabase() -> Dict[str, str]:
     """
     Fetch products from Supabase and format them for the LLM.
@@ -300,6 +645,313 @@ async def fetch_products_from_supabase() -> Dict[str, str]:
     #     # Fallback to empty dict or hardcoded list if needed
     #     return {}
 
+CUSTOMER_COLUMNS = "user_id, skin_type, skin_concerns, keywords, preferred_tone"
+PRODUCT_DETAIL_COLUMNS = (
+    "id, brand, name, category_major, category_middle, category_small, "
+    "price_final, discount_rate, review_score, review_count"
+)
+
+
+async def fetch_customers(sb, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """customers 테이블에서 여러 고객을 IN 쿼리 한 번으로 조회 ({user_id: row})"""
+    unique_ids = list(dict.fromkeys(user_ids))
+    if not unique_ids:
+        return {}
+    resp = await (
+        sb.table("customers")
+        .select(CUSTOMER_COLUMNS)
+        .in_(CUSTOMER_ID_COL, unique_ids)
+        .execute()
+    )
+    return {str(c[CUSTOMER_ID_COL]): c for c in (resp.data or [])}
+
+
+def build_user_context(customer: Dict[str, Any], intent: str = "") -> Dict[str, Any]:
+    """고객 row → 쿼리 텍스트 + 키워드 보너스 계산용 컨텍스트"""
+    user_keywords_raw = normalize_list(customer.get("keywords"))
+    
+    # 키워드 확장: 영어 -> 한글 동의어 추가
+    user_keywords = expand_keywords(user_keywords_raw)
+    log.debug("keywords_expanded", raw=user_keywords_raw, expanded=len(user_keywords))
+    
+    # [Fix] 피부 고민 정의 (키워드 보너스 계산용)
+    concerns = with_kr(normalize_list(customer.get("skin_concerns")), CONCERN_MAP)
+
+    # intent 처리: weather일 경우 시즌별 키워드 추가
+    weather_keywords = []
+    current_season = None
+    if intent == "weather":
+        current_season = get_current_season()
+        weather_keywords = WEATHER_KEYWORDS.get(current_season, [])
+        log.debug("weather_keywords", season=current_season, sample=weather_keywords[:3])
+    
+    return {
+        "query_text": build_user_query_text(customer),
+        "user_keywords": user_keywords,
+        "concerns": concerns,
+        "weather_keywords": weather_keywords,
+        "current_season": current_season,
+    }
+
+
+def profile_signature(customer: Dict[str, Any]) -> str:
+    """
+    랭킹에 쓰이는 프로필 속성(피부타입, 피부고민, 키워드, 선호 톤)만으로 만든 정규화 시그니처
+    user_id는 포함하지 않으므로 프로필이 같은 고객끼리 같은 값
+    (키워드 순서는 쿼리 텍스트에 그대로 반영되므로 정렬하지 않음)
+    """
+    tone = customer.get("preferred_tone")
+    if isinstance(tone, list):
+        tone = tone[0] if tone else None
+    return json.dumps(
+        [
+            normalize_list(customer.get("skin_type")),
+            normalize_list(customer.get("skin_concerns")),
+            normalize_list(customer.get("keywords")),
+            str(tone).strip() if tone else "",
+        ],
+        ensure_ascii=False,
+    )
+
+
+async def result_cache_key(
+    sb, customer: Dict[str, Any], target_brands: Optional[List[str]], intent: str
+) -> Optional[Tuple[str, str, str, str]]:
+    """추천 결과 캐시 키 (비활성화면 None) - 카탈로그가 갱신되면 버전이 바뀌어 자동으로 미스"""
+    if not RESULT_CACHE_ENABLED:
+        return None
+    catalog = await get_catalog(sb) if CATALOG_ENABLED else None
+    return (
+        text_hash(profile_signature(customer)),
+        brands_key(target_brands),
+        intent_key(intent, get_current_season()),
+        catalog.version if catalog is not None else "-",
+    )
+
+
+def take_top(reranked: List[Dict[str, Any]], top_k: int) -> Optional[Any]:
+    """랭킹 결과 → top_k == 1이면 dict, 아니면 list (없으면 None)"""
+    if not reranked:
+        return None
+    return reranked[0] if top_k == 1 else reranked[:top_k]
+
+
+def rank_limit(top_k: int) -> int:
+    """rank_candidates가 dict로 만들 상위 개수 (결과 캐시 재사용분 포함)"""
+    return max(top_k, RESULT_CACHE_TOP_K)
+
+
+def get_cached_result(key: Optional[Tuple[str, str, str, str]], top_k: int) -> Optional[Any]:
+    """결과 캐시 조회 - 캐시된 랭킹 개수가 top_k보다 적으면 미스"""
+    entry = _result_cache.get(key) if key is not None else None
+    if entry is None:
+        return None
+    limit, reranked = entry
+    return take_top(reranked, top_k) if top_k <= limit else None
+
+
+def put_cached_result(key: Optional[Tuple[str, str, str, str]], reranked: List[Dict[str, Any]], limit: int) -> None:
+    if key is not None and reranked:
+        _result_cache.put(key, (limit, reranked))
+
+
+def get_result_cache_stats() -> Dict[str, Any]:
+    """추천 결과 캐시 지표"""
+    return {
+        "enabled": RESULT_CACHE_ENABLED,
+        "size": len(_result_cache),
+        "hits": _result_cache.hits,
+        "misses": _result_cache.misses,
+        "expired": _result_cache.expired,
+    }
+
+
+def get_singleflight_stats() -> Dict[str, Any]:
+    """동일 요청 합치기 지표"""
+    return {"enabled": SINGLEFLIGHT_ENABLED, **_recommend_flight.stats()}
+
+
+async def fetch_product_details(sb, product_ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+    """products 상세 정보 조회 ({id: row})"""
+    if not product_ids:
+        return {}
+    resp = await (
+        sb.table("products")
+        .select(PRODUCT_DETAIL_COLUMNS)
+        .in_("id", list(product_ids))
+        .execute()
+    )
+    return {p["id"]: p for p in (resp.data or [])}
+
+
+async def fetch_product_contents(sb, product_ids: List[Any]) -> Dict[Any, str]:
+    """products_vector content 조회 ({product_id: content})"""
+    if not product_ids:
+        return {}
+    resp = await (
+        sb.table("products_vector")
+        .select(f"{PRODUCT_VECTOR_FK_COL}, content")
+        .in_(PRODUCT_VECTOR_FK_COL, list(product_ids))
+        .execute()
+    )
+    return {r[PRODUCT_VECTOR_FK_COL]: r.get("content") for r in (resp.data or [])}
+
+
+async def timed(stage: str, labels: Optional[Dict[str, str]], coro):
+    """코루틴 소요 시간을 단계 지표에 기록 (labels가 없으면 그대로 await)"""
+    if labels is None:
+        return await coro
+    with stage_timer(stage, labels):
+        return await coro
+
+
+async def fetch_candidate_data(
+    sb, product_ids: List[Any], labels: Optional[Dict[str, str]] = None,
+) -> Tuple[Dict[Any, Dict[str, Any]], Dict[Any, str]]:
+    """
+    후보 ID의 products 상세 정보 + products_vector content 조회
+    카탈로그 스냅샷 우선, 스냅샷에 없는 ID만 DB에서 동시 조회 (둘 다 후보 ID에만 의존)
+    labels: 주면 catalog / products / products_vector 단계 시간을 지표에 기록
+    """
+    prod_map: Dict[Any, Dict[str, Any]] = {}
+    pv_map: Dict[Any, str] = {}
+    missing = list(product_ids)
+    
+    catalog = await get_catalog(sb) if CATALOG_ENABLED else None
+    if catalog is not None:
+        started = time.perf_counter()
+        prod_map, pv_map, missing = catalog.lookup(missing)
+        if labels is not None:
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage="catalog", **labels)
+    
+    if missing:
+        db_prod, db_pv = await asyncio.gather(
+            timed("products", labels, fetch_product_details(sb, missing)),
+            timed("products_vector", labels, fetch_product_contents(sb, missing)),
+        )
+        prod_map.update(db_prod)
+        pv_map.update(db_pv)
+    return prod_map, pv_map
+
+
+def candidate_keyword_bonus(
+    ctx: Dict[str, Any],
+    intent: str,
+    product: Dict[str, Any],
+    content: str,
+) -> Tuple[float, Dict[str, Any]]:
+    """유저 컨텍스트 기준 후보 제품의 키워드 보너스"""
+    is_weather = intent == "weather"
+    
+    # 제품 키워드 가져오기
+    product_keywords = normalize_list(product.get("keywords"))
+    
+    # 키워드 보너스 계산 (피부고민 + 날씨 우선순위 키워드 포함)
+    return keyword_bonus(
+        user_keywords=ctx["user_keywords"],
+        product_content=content,
+        product_keywords=product_keywords,
+        skin_concerns=ctx["concerns"],
+        weather_keywords=ctx["weather_keywords"] if is_weather else None,
+        current_season=ctx["current_season"] if is_weather else None
+    )
+
+
+def cascade_size() -> int:
+    """CE 부하(대기 + 추론 중 쌍 수)에 따라 Cross-Encoder로 넘길 후보 수 결정"""
+    load = _ce_batcher.pending_pairs if _ce_batcher is not None else 0
+    frac = min(1.0, load / max(CASCADE_LOAD_HIGH_PAIRS, 1))
+    return int(round(CASCADE_MAX_CE - (CASCADE_MAX_CE - CASCADE_MIN_CE) * frac))
+
+
+def cascade_prune(
+    ctx: Dict[str, Any],
+    intent: str,
+    items: List[Tuple[Any, str]],
+    prod_map: Dict[Any, Dict[str, Any]],
+    sim_map: Dict[Any, float],
+    n: int,
+) -> Tuple[List[Tuple[Any, str]], Dict[Any, Tuple[float, Dict[str, Any]]]]:
+    """
+    1단계 랭킹: similarity + 키워드 보너스로 상위 n개만 남김 (후보 순서 유지)
+    반환: (남은 (product_id, content) 목록, {product_id: (kwb, details)}) - 키워드 보너스는 2단계에서 재사용
+    """
+    kw_scores = {pid: candidate_keyword_bonus(ctx, intent, prod_map[pid], content) for pid, content in items}
+    if not CASCADE_ENABLED or len(items) <= n:
+        return items, kw_scores
+    
+    sims = np.array([sim_map.get(pid, 0.0) for pid, _ in items], dtype=np.float64)
+    kwb = np.array([kw_scores[pid][0] for pid, _ in items], dtype=np.float64)
+    first_stage = CASCADE_SIM_WEIGHT * sims + KW_BONUS_ALPHA * kwb
+    keep = np.sort(np.argpartition(-first_stage, n - 1)[:n])
+    return [items[i] for i in keep], kw_scores
+
+
+def rank_candidates(
+    ctx: Dict[str, Any],
+    intent: str,
+    scored: List[Tuple[Any, str, float]],
+    prod_map: Dict[Any, Dict[str, Any]],
+    sim_map: Dict[Any, float],
+    kw_scores: Optional[Dict[Any, Tuple[float, Dict[str, Any]]]] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    (product_id, content, ce_score) 목록에 키워드 보너스를 더해 intent별로 정렬
+    점수는 NumPy 벡터로 계산하고 argpartition으로 상위 limit개만 골라 dict로 만듦 (None이면 전체)
+    kw_scores: cascade_prune에서 계산한 키워드 보너스 (없으면 여기서 계산)
+    """
+    if not scored:
+        return []
+    kwbs = []
+    for pid, content, _ in scored:
+        if kw_scores is not None and pid in kw_scores:
+            kwbs.append(kw_scores[pid][0])
+        else:
+            kwbs.append(candidate_keyword_bonus(ctx, intent, prod_map[pid], content)[0])
+    
+    ce = np.array([s for _, _, s in scored], dtype=np.float64)
+    kwb = np.array(kwbs, dtype=np.float64)
+    final = ce + KW_BONUS_ALPHA * kwb
+    
+    # intent에 따른 정렬 (동점은 후보 순서 유지)
+    n = len(scored)
+    k = n if limit is None else min(max(limit, 1), n)
+    m = max(k, min(5, n)) if intent == "event" else k
+    top = np.arange(n) if m == n else np.sort(np.argpartition(-final, m - 1)[:m])
+    order = top[np.argsort(-final[top], kind="stable")]
+    if intent == "event":
+        # Event Intent: final_score로 Top 5 추출 후, Top 5 중 할인율 우선
+        if n >= 5:
+            discount = np.array(
+                [prod_map[scored[i][0]].get("discount_rate") or 0 for i in order[:5]], dtype=np.float64
+            )
+            order = np.concatenate([order[:5][np.argsort(-discount, kind="stable")], order[5:]])
+        log.debug("event_top5_by_discount", top_discount=lambda: prod_map[scored[order[0]][0]].get("discount_rate", 0))
+    
+    reranked = []
+    for i in order[:k]:
+        pid = scored[i][0]
+        p = prod_map.get(pid)
+        reranked.append({
+            "product_id": str(pid),
+            "brand": p.get("brand"),
+            "name": p.get("name"),
+            "category_major": p.get("category_major"),
+            "category_middle": p.get("category_middle"),
+            "category_small": p.get("category_small"),
+            "price_final": p.get("price_final"),
+            "discount_rate": p.get("discount_rate"),
+            "review_score": p.get("review_score"),
+            "review_count": p.get("review_count"),
+            "ce_score": float(ce[i]),
+            "kw_bonus": float(kwb[i]),
+            "final_score": float(final[i]),
+            "similarity": float(sim_map.get(pid, 0.0)),
+        })
+    return reranked
+
+
 async def recommend_product_with_brands(
     user_id: str,
     user_data: Any,
@@ -320,282 +972,327 @@ async def recommend_product_with_brands(
     Returns:
         추천 상품 정보 dict 또는 None
     """
+    # 단계별 소요 시간 / 후보 수 / 캐시 지표 라벨 (GET /metrics)
+    labels = request_labels(intent, target_brands)
+    started = time.perf_counter()
+    outcome = "empty"
     try:
-        # Supabase 및 OpenAI 클라이언트 초기화
-        from supabase import create_client, Client
-        sb: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-        oa = OpenAI(api_key=settings.OPENAI_API_KEY)
-        ce = get_cross_encoder()
+        # Supabase 클라이언트 (요청 간 재사용)
+        sb = await get_async_supabase()
+        ce = await load_cross_encoder()
         
         # 1) 고객 정보 조회
-        customer_resp = (
-            sb.table("customers")
-            .select("user_id, skin_type, skin_concerns, keywords, preferred_tone")
-            .eq(CUSTOMER_ID_COL, user_id)
-            .limit(1)
-            .execute()
-        )
-
-        print(f"customer_resp: {customer_resp}")
-
+        with stage_timer("customer", labels):
+            customer = (await fetch_customers(sb, [user_id])).get(str(user_id))
         
-        if not customer_resp.data:
-            print(f"[WARN] customers에서 {CUSTOMER_ID_COL}={user_id}를 찾지 못함")
+        if not customer:
+            log.warning("customer_not_found", user_id=user_id, column=CUSTOMER_ID_COL)
             return None
+        log.debug("customer", user_id=user_id, profile=lambda: profile_signature(customer))
         
-        customer = customer_resp.data[0]
-        user_keywords_raw = normalize_list(customer.get("keywords"))
-        
-        # 키워드 확장: 영어 -> 한글 동의어 추가
-        user_keywords = expand_keywords(user_keywords_raw)
-        print(f"  🔍 키워드 확장: {user_keywords_raw} → {len(user_keywords)}개")
-        
-        # [Fix] 피부 고민 정의 (키워드 보너스 계산용)
-        concerns = with_kr(normalize_list(customer.get("skin_concerns")), CONCERN_MAP)
-
-        # intent 처리: weather일 경우 시즌별 키워드 추가
-        weather_keywords = []
-        if intent == "weather":
-            current_season = get_current_season()
-            weather_keywords = WEATHER_KEYWORDS.get(current_season, [])
-            print(f"  🌡️ Weather Intent: {current_season} season - 키워드: {weather_keywords[:3]}...")
+        # 1-1) 같은 프로필의 랭킹 결과가 캐시에 있으면 바로 반환
+        result_key = await result_cache_key(sb, customer, target_brands, intent)
+        cached = get_cached_result(result_key, top_k)
+        if result_key is not None:
+            CACHE_REQUESTS.inc(cache="result", result="hit" if cached is not None else "miss", **labels)
+        if cached is not None:
+            log.debug("result_cache_hit", profile=result_key[0][:12], intent=result_key[2] or "regular")
+            outcome = "result_cache"
+            return cached
         
-        # 2) 쿼리 텍스트 생성
-        query_text = build_user_query_text(customer)
+        # 2) 쿼리 텍스트 + 키워드 컨텍스트 생성
+        ctx = build_user_context(customer, intent)
+        query_text = ctx["query_text"]
         
         # 3) 임베딩 생성
-        query_emb = embed_text(oa, query_text)
+        with stage_timer("embedding", labels):
+            query_emb = await embed_text(query_text)
         
         # 4) 벡터 유사도 검색 (후보 풀) - 브랜드 필터링 적용
-        if target_brands and len(target_brands) > 0:
-            # 브랜드가 지정된 경우
-            print(f"\n🔍 [RPC Search] 브랜드 지정 검색: {target_brands}")
-            
-            rpc_payload = {
-                "query_embedding": query_emb,
-                "match_count": CANDIDATE_POOL,
-                "filter_brands": target_brands
-            }
-            
-            try:
-                response = sb.rpc('match_products', rpc_payload).execute()
-                matches = response.data or []
-                
-                print(f"📊 [RPC Response] 브랜드 필터링 검색 결과: {len(matches)}개")
-                
-                # 결과 출력 (상위 3개)
-                if matches:
-                    print(f"  - 상위 3개 샘플:")
-                    for i, item in enumerate(matches[:3], 1):
-                        print(f"    {i}. ID: {item.get('product_id')}, 유사도: {item.get('similarity', 0):.4f}")
-                
-            except Exception as e:
-                print(f"❌ [RPC Error] 브랜드 필터링 검색 실패: {e}")
-                matches = []
-        else:
-            # 브랜드 지정 없음 - 일반 검색
-            print(f"\n🔍 [RPC Search] 브랜드 미지정 - 전체 검색 (pool={CANDIDATE_POOL})")
-            
-            rpc_payload = {
-                "filter": {},
-                "match_count": CANDIDATE_POOL,
-                "query_embedding": query_emb,
-            }
-            
-            match_resp = sb.rpc("match_products", rpc_payload).execute()
-            matches = match_resp.data or []
-            
-            print(f"📊 [RPC Response] 유사도 검색 결과: {len(matches)}개")
+        with stage_timer("retrieval", labels):
+            matches = await retrieve_candidates(sb, query_emb, target_brands)
+        POOL_SIZE.observe(len(matches or []), pool="retrieved", **labels)
         
         if not matches:
-            print("❌ [ERROR] 최종 유사도 검색 결과가 없습니다.")
+            log.warning("no_candidates", user_id=user_id, brands=target_brands or "ALL")
             return None
         
         matches.sort(key=lambda m: float(m.get("similarity", 0.0)), reverse=True)
         candidate_ids = [m["product_id"] for m in matches]
         sim_map = {m["product_id"]: float(m["similarity"]) for m in matches}
+        log.debug("candidate_pool", count=len(candidate_ids), top5=candidate_ids[:5])
         
-        print(f"\n📋 [Candidate Pool] 최종 후보:")
-        print(f"  - 후보 ID 수: {len(candidate_ids)}개")
-        print(f"  - 상위 5개 ID: {candidate_ids[:5]}")
-        
-        # 5) products 상세 정보 조회
+        # 5) products 상세 정보 + 6) products_vector content 동시 조회
         # RPC에서 이미 브랜드 필터링이 적용되었으므로 추가 필터 불필요
-        print(f"\n🗃️ [Products Table] 상세 정보 조회:")
-        products_resp = (
-            sb.table("products")
-            .select("id, brand, name, category_major, category_middle, category_small, price_final, discount_rate, review_score, review_count")
-            .in_("id", candidate_ids)
-            .execute()
-        )
-        products = products_resp.data or []
-        
-        print(f"\n📦 [Products Result] 조회 결과:")
-        print(f"  - 조회된 제품 수: {len(products)}개")
-        if products:
-            print(f"  - 브랜드 분포: {dict((b, sum(1 for p in products if p.get('brand') == b)) for b in set(p.get('brand') for p in products))}")
-            print(f"  - 상위 3개:")
-            for i, p in enumerate(products[:3], 1):
-                print(f"    {i}. [{p.get('brand')}] {p.get('name')[:30]}... (ID={p.get('id')})")
+        prod_map, pv_map = await fetch_candidate_data(sb, candidate_ids, labels)
+        products = list(prod_map.values())
+        POOL_SIZE.observe(len(products), pool="products", **labels)
         
         if not products:
-            print(f"\n❌ [ERROR] products 테이블 조회 실패")
-            if target_brands:
-                print(f"  → 브랜드 필터({target_brands}) 때문에 제품이 없을 수 있음")
-                print(f"  → candidate_ids에는 {len(candidate_ids)}개가 있었지만 해당 브랜드 제품이 없음")
-            else:
-                print(f"  → candidate_ids={candidate_ids[:5]}... 중 products 테이블에 없는 ID들")
+            # 브랜드 필터 때문이거나 candidate_ids가 products 테이블에 없는 경우
+            log.warning(
+                "products_not_found", user_id=user_id, brands=target_brands or "ALL",
+                candidates=len(candidate_ids), sample_ids=candidate_ids[:5],
+            )
             return None
-        
-        prod_map = {p["id"]: p for p in products}
-        filtered_ids = list(prod_map.keys())
-        
-        print(f"\n✅ [Products Filtered] 최종 제품 풀:")
-        print(f"  - 필터링 후 제품 수: {len(filtered_ids)}개")
-        
-        # 6) products_vector content 가져오기
-        pv_resp = (
-            sb.table("products_vector")
-            .select(f"{PRODUCT_VECTOR_FK_COL}, content")
-            .in_(PRODUCT_VECTOR_FK_COL, filtered_ids)
-            .execute()
+        # 브랜드 분포 / 상위 제품은 디버그 로그가 켜진 요청에서만 계산
+        log.debug(
+            "products",
+            count=len(products),
+            brand_distribution=lambda: dict(Counter(p.get("brand") for p in products)),
+            top3=lambda: [(p.get("id"), p.get("brand"), (p.get("name") or "")[:30]) for p in products[:3]],
         )
-        pv_rows = pv_resp.data or []
-        pv_map = {r[PRODUCT_VECTOR_FK_COL]: r.get("content") for r in pv_rows}
         
-        # 7) Cross-Encoder rerank + keyword bonus
-        pairs: List[Tuple[str, str]] = []
-        valid_ids: List[int] = []
+        filtered_ids = [pid for pid in candidate_ids if pid in prod_map]
         
-        for pid in filtered_ids:
-            content = pv_map.get(pid)
-            if not content:
-                continue
-            valid_ids.append(pid)
-            pairs.append((truncate_for_ce(query_text), truncate_for_ce(content)))
+        # 7) Cross-Encoder rerank + keyword bonus
+        items: List[Tuple[int, str]] = [
+            (pid, pv_map[pid]) for pid in filtered_ids if pv_map.get(pid)
+        ]
         
-        if not pairs:
-            print("[WARN] 브랜드 필터링 후 products_vector.content가 비어있습니다.")
+        if not items:
+            log.warning("empty_contents", user_id=user_id, brands=target_brands or "ALL", products=len(filtered_ids))
             return None
         
-        ce_scores = ce.predict(pairs)
+        # 7-1) 1단계: similarity + keyword bonus로 CE 후보 축소 (부하에 따라 N 조정)
+        n_ce = cascade_size()
+        total_items = len(items)
+        with stage_timer("cascade", labels):
+            items, kw_scores = cascade_prune(ctx, intent, items, prod_map, sim_map, n_ce)
+        POOL_SIZE.observe(len(items), pool="cross_encoder", **labels)
+        log.debug("cascade", candidates=total_items, kept=len(items), n=n_ce)
         
-        reranked = []
-        for pid, ce_score in zip(valid_ids, ce_scores):
-            content = pv_map.get(pid, "")
-            p = prod_map.get(pid)
-            
-            # 제품 키워드 가져오기
-            product_keywords = normalize_list(p.get("keywords"))
-            
-            # 키워드 보너스 계산 (피부고민 + 날씨 우선순위 키워드 포함)
-            kwb, kw_details = keyword_bonus(
-                user_keywords=user_keywords,
-                product_content=content,
-                product_keywords=product_keywords,
-                skin_concerns=concerns,
-                weather_keywords=weather_keywords if intent == "weather" else None,
-                current_season=current_season if intent == "weather" else None
-            )
-            
-            final_score = float(ce_score) + KW_BONUS_ALPHA * kwb
-            
-            reranked.append({
-                "product_id": str(pid),
-                "brand": p.get("brand"),
-                "name": p.get("name"),
-                "category_major": p.get("category_major"),
-                "category_middle": p.get("category_middle"),
-                "category_small": p.get("category_small"),
-                "price_final": p.get("price_final"),
-                "discount_rate": p.get("discount_rate"),
-                "review_score": p.get("review_score"),
-                "review_count": p.get("review_count"),
-                "ce_score": float(ce_score),
-                "kw_bonus": float(kwb),
-                "final_score": float(final_score),
-                "similarity": float(sim_map.get(pid, 0.0)),
-            })
-        
-        # intent에 따른 정렬
-        if intent == "event":
-            # Event Intent: final_score로 Top 5 추출 후, Top 5 중 할인율 우선
-            reranked.sort(key=lambda r: r["final_score"], reverse=True)
-            if len(reranked) >= 5:
-                top_5 = reranked[:5]
-                top_5.sort(key=lambda r: (r.get("discount_rate") or 0), reverse=True)
-                reranked = top_5 + reranked[5:]
-            print(f"  🎁 Event Intent: Top 5 중 할인율 우선 (1위 할인율: {reranked[0].get('discount_rate', 0)}%)")
-        else:
-            # regular 또는 weather: final_score로 정렬
-            reranked.sort(key=lambda r: r["final_score"], reverse=True)
+        # 7-2) 2단계: Cross-Encoder
+        with stage_timer("cross_encoder", labels):
+            ce_scores = await score_with_cache(ce, query_text, items, labels)
+        scored = [(pid, content, s) for (pid, content), s in zip(items, ce_scores)]
+        limit = rank_limit(top_k)
+        with stage_timer("ranking", labels):
+            reranked = rank_candidates(ctx, intent, scored, prod_map, sim_map, kw_scores, limit)
+        put_cached_result(result_key, reranked, limit)
+        if reranked:
+            outcome = "ok"
         
         # 9) 디버그 출력 (상위 3개)
-        if reranked:
-            print(f"\n🏆 [Final Ranking] Top 3 추천 결과:")
-            for i, r in enumerate(reranked[:3], 1):
-                print(f"  {i}. [{r.get('brand')}] {r['name'][:30]}...")
-                print(f"     - CE: {r['ce_score']:.4f}, KW: {r['kw_bonus']:.3f}, Final: {r['final_score']:.4f}")
-                print(f"     - 할인: {r.get('discount_rate', 0)}%, 리뷰: {r.get('review_score', 0)}⭐")
-            
-            # 최종 1위 제품 상세 정보
-            winner = reranked[0]
-            print(f"\n🎯 [Winner] 최종 선택:")
-            print(f"  - Brand: {winner.get('brand')} ← {'✅ 존재' if winner.get('brand') else '❌ 누락'}")
-            print(f"  - Name: {winner.get('name')}")
-            print(f"  - Product ID: {winner.get('product_id')}")
+        log.debug(
+            "final_ranking",
+            intent=intent or "regular",
+            top3=lambda: [
+                {
+                    "product_id": r["product_id"], "brand": r.get("brand"), "name": (r.get("name") or "")[:30],
+                    "ce": round(r["ce_score"], 4), "kw": round(r["kw_bonus"], 3), "final": round(r["final_score"], 4),
+                    "discount": r.get("discount_rate"), "review": r.get("review_score"),
+                }
+                for r in reranked[:3]
+            ],
+        )
         
         # 8) top_k 개수만큼 반환
         if top_k == 1:
             result = reranked[0] if reranked else None
-            if result:
-                # 반환 전 brand 필드 재확인
-                if not result.get('brand'):
-                    print(f"\n⚠️ [CRITICAL] 반환할 제품에 brand가 없음! prod_map 확인:")
-                    pid = result.get('product_id')
-                    if pid and int(pid) in prod_map:
-                        print(f"  - prod_map[{pid}]: {prod_map[int(pid)]}")
+            if result and not result.get('brand'):
+                # 반환할 제품에 brand가 없으면 원본 row를 함께 기록
+                log.error("winner_missing_brand", product_id=result.get("product_id"),
+                          row=lambda: next((p for pid, p in prod_map.items() if str(pid) == result["product_id"]), None))
             return result
         else:
             return reranked[:top_k]
             
     except Exception as e:
-        print(f"❌ 상품 추천 중 오류 발생: {e}")
-        import traceback
-        traceback.print_exc()
+        outcome = "error"
+        log.exception("recommend_failed", user_id=user_id, intent=intent or "regular", error=str(e))
         return None
+    finally:
+        RECOMMEND_SECONDS.observe(time.perf_counter() - started, **labels)
+        RECOMMENDATIONS.inc(outcome=outcome, **labels)
 
 
-async def get_recommendation(request_data: Any) -> Dict[str, Any]:
+async def recommend_batch(
+    requests: List[Dict[str, Any]],
+    top_k: int = 1,
+) -> List[Optional[Any]]:
     """
-    Get recommendation using Cross-Encoder based system.
+    여러 유저의 추천을 한 번에 계산합니다.
+    customers IN 쿼리 1회, 임베딩 요청 1회, products/products_vector 조회 각 1회,
+    Cross-Encoder 배치 1회로 모든 (유저, 제품) 쌍을 처리합니다.
+    
+    Args:
+        requests: [{"user_id", "target_brands", "intent"}] 목록
+        top_k: 유저별 반환할 상품 개수
+        
+    Returns:
+        요청 순서대로 추천 결과 (top_k == 1이면 dict, 아니면 list, 실패 시 None)
     """
-    user_id = request_data.user_id
-    intention = getattr(request_data, 'intention', None) or "" 
-    user_data = None # Explicitly set to None as it's not in request
-    target_brands = getattr(request_data, 'target_brand', None)
+    results: List[Optional[Any]] = [None] * len(requests)
+    if not requests:
+        return results
+    try:
+        sb = await get_async_supabase()
+        ce = await load_cross_encoder()
+        
+        # 1) 고객 정보 일괄 조회
+        customers = await fetch_customers(sb, [str(r["user_id"]) for r in requests])
+        log.debug("batch_customers", requests=len(requests), customers=len(customers))
+        
+        active: List[int] = []
+        contexts: Dict[int, Dict[str, Any]] = {}
+        result_keys: Dict[int, Tuple[str, str, str, str]] = {}
+        cache_hits = 0
+        for i, req in enumerate(requests):
+            customer = customers.get(str(req["user_id"]))
+            if not customer:
+                log.warning("customer_not_found", user_id=req["user_id"], column=CUSTOMER_ID_COL)
+                continue
+            key = await result_cache_key(sb, customer, req.get("target_brands") or [], req.get("intent") or "")
+            cached = get_cached_result(key, top_k)
+            if cached is not None:
+                results[i] = cached
+                cache_hits += 1
+                continue
+            if key is not None:
+                result_keys[i] = key
+            contexts[i] = build_user_context(customer, req.get("intent") or "")
+            active.append(i)
+        if cache_hits:
+            log.debug("result_cache_hit", count=cache_hits)
+        if not active:
+            return results
+        
+        # 2) 임베딩 일괄 생성 (중복 쿼리 텍스트는 한 번만)
+        embeddings = await embed_texts([contexts[i]["query_text"] for i in active])
+        
+        # 3) 유저별 후보 검색 (동시 실행)
+        all_matches = await asyncio.gather(*[
+            retrieve_candidates(sb, emb, requests[i].get("target_brands") or [])
+            for i, emb in zip(active, embeddings)
+        ])
+        matches_by_req: Dict[int, List[Dict[str, Any]]] = {
+            i: matches for i, matches in zip(active, all_matches) if matches
+        }
+        
+        # 4) 후보 합집합으로 products / products_vector 각 1회 동시 조회
+        all_ids = list(dict.fromkeys(m["product_id"] for ms in matches_by_req.values() for m in ms))
+        prod_map, pv_map = await fetch_candidate_data(sb, all_ids)
+        
+        # 5) 유저별 1단계 선별 후 모든 (유저, 제품) 쌍을 Cross-Encoder 한 번에 채점
+        n_ce = cascade_size()
+        batch_items: Dict[int, List[Tuple[Any, str]]] = {}
+        batch_kw: Dict[int, Dict[Any, Tuple[float, Dict[str, Any]]]] = {}
+        sim_maps: Dict[int, Dict[Any, float]] = {}
+        for i, matches in matches_by_req.items():
+            sim_maps[i] = {m["product_id"]: float(m["similarity"]) for m in matches}
+            items = [
+                (m["product_id"], pv_map[m["product_id"]])
+                for m in matches
+                if m["product_id"] in prod_map and pv_map.get(m["product_id"])
+            ]
+            if items:
+                intent = requests[i].get("intent") or ""
+                batch_items[i], batch_kw[i] = cascade_prune(contexts[i], intent, items, prod_map, sim_maps[i], n_ce)
+        
+        order = list(batch_items.keys())
+        score_lists = await score_many_with_cache(
+            ce, [(contexts[i]["query_text"], batch_items[i]) for i in order]
+        )
+        log.debug("batch_ce", pairs=lambda: sum(len(v) for v in batch_items.values()), users=len(order), n=n_ce)
+        
+        # 6) 유저별 키워드 보너스 + intent 정렬 (상위 limit개만 결과 dict 생성)
+        limit = rank_limit(top_k)
+        for i, ce_scores in zip(order, score_lists):
+            scored = [(pid, content, s) for (pid, content), s in zip(batch_items[i], ce_scores)]
+            reranked = rank_candidates(
+                contexts[i], requests[i].get("intent") or "", scored, prod_map, sim_maps[i], batch_kw[i], limit
+            )
+            put_cached_result(result_keys.get(i), reranked, limit)
+            results[i] = take_top(reranked, top_k)
+        return results
+        
+    except Exception as e:
+        log.exception("recommend_batch_failed", requests=len(requests), error=str(e))
+        return results
 
-    print(f"target_brands: {target_brands}")
-    
-    print(f"\n🎯 추천 요청 수신:")
-    print(f"  - User ID: {user_id}")
-    print(f"  - Intention: {intention}")
-    print(f"  - Target Brands: {target_brands}")
-    
-    # Cross-Encoder 기반 추천 시스템 호출
-    recommendation = await recommend_product_with_brands(
-        user_id=user_id,
-        user_data=user_data,
-        target_brands=target_brands if target_brands else [],
-        top_k=1,
-        intent=intention
-    )
+
+async def recommend_multi_intent(
+    user_id: str,
+    target_brands: List[str] = None,
+    intents: List[str] = ("",),
+    top_k: int = 1,
+) -> Dict[str, Optional[Any]]:
+    """
+    한 유저의 여러 intent 추천을 한 번에 계산합니다.
+    intent는 키워드 보너스와 최종 정렬에만 영향을 주므로 고객 조회, 임베딩, 후보 검색,
+    상품 조회, Cross-Encoder 채점은 1회로 처리하고 intent별로 보너스/정렬만 따로 적용합니다.
+    (CE는 intent별 1단계 선별 결과의 합집합을 한 번에 채점 → intent별 결과는 단건 호출과 동일)
     
-    if recommendation:
-        print(f"  ✅ 상품 추천 성공: {recommendation['name']} (ID: {recommendation['product_id']})")
-        print(f"  📊 Score: ce={recommendation['ce_score']:.4f}, kw_bonus={recommendation['kw_bonus']:.3f}, final={recommendation['final_score']:.4f}")
+    Returns:
+        {intent: 추천 결과 (top_k == 1이면 dict, 아니면 list, 실패 시 None)}
+    """
+    intents = list(dict.fromkeys(i or "" for i in intents)) or [""]
+    results: Dict[str, Optional[Any]] = {i: None for i in intents}
+    try:
+        sb = await get_async_supabase()
+        ce = await load_cross_encoder()
+        
+        customer = (await fetch_customers(sb, [user_id])).get(str(user_id))
+        if not customer:
+            log.warning("customer_not_found", user_id=user_id, column=CUSTOMER_ID_COL)
+            return results
+        
+        # 결과 캐시에 있는 intent는 바로 채우고 나머지만 계산
+        result_keys = {i: await result_cache_key(sb, customer, target_brands, i) for i in intents}
+        for i, key in result_keys.items():
+            results[i] = get_cached_result(key, top_k)
+        intents = [i for i in intents if results[i] is None]
+        if not intents:
+            log.debug("result_cache_hit", intents="all")
+            return results
         
-        result = {
+        # intent별 컨텍스트 (쿼리 텍스트는 intent와 무관하게 동일)
+        contexts = {i: build_user_context(customer, i) for i in intents}
+        query_text = contexts[intents[0]]["query_text"]
+        query_emb = await embed_text(query_text)
+        
+        matches = await retrieve_candidates(sb, query_emb, target_brands)
+        if not matches:
+            log.warning("no_candidates", user_id=user_id, brands=target_brands or "ALL")
+            return results
+        matches.sort(key=lambda m: float(m.get("similarity", 0.0)), reverse=True)
+        candidate_ids = [m["product_id"] for m in matches]
+        sim_map = {m["product_id"]: float(m["similarity"]) for m in matches}
+        
+        prod_map, pv_map = await fetch_candidate_data(sb, candidate_ids)
+        items = [(pid, pv_map[pid]) for pid in candidate_ids if pid in prod_map and pv_map.get(pid)]
+        if not items:
+            log.warning("empty_contents", user_id=user_id, brands=target_brands or "ALL", products=len(prod_map))
+            return results
+        
+        # intent별 1단계 선별 → 합집합만 Cross-Encoder 1회 채점
+        n_ce = cascade_size()
+        pruned = {i: cascade_prune(contexts[i], i, items, prod_map, sim_map, n_ce) for i in intents}
+        selected = {pid for kept, _ in pruned.values() for pid, _ in kept}
+        ce_items = [(pid, content) for pid, content in items if pid in selected]
+        ce_scores = await score_with_cache(ce, query_text, ce_items)
+        ce_map = {pid: s for (pid, _), s in zip(ce_items, ce_scores)}
+        log.debug("multi_intent_ce", intents=intents, pairs=len(ce_items), n=n_ce)
+        
+        limit = rank_limit(top_k)
+        for i in intents:
+            kept, kw_scores = pruned[i]
+            scored = [(pid, content, ce_map[pid]) for pid, content in kept]
+            reranked = rank_candidates(contexts[i], i, scored, prod_map, sim_map, kw_scores, limit)
+            put_cached_result(result_keys[i], reranked, limit)
+            results[i] = take_top(reranked, top_k)
+        return results
+        
+    except Exception as e:
+        log.exception("recommend_multi_intent_failed", user_id=user_id, intents=intents, error=str(e))
+        return results
+
+
+def format_recommendation(recommendation: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """추천 결과 dict → API 응답 형식"""
+    if recommendation:
+        return {
             "product_id": recommendation['product_id'],
             "product_name": recommendation['name'],
             "score": recommendation['final_score'],
@@ -622,13 +1319,136 @@ async def get_recommendation(request_data: Any) -> Dict[str, Any]:
                 "description_short": f"{recommendation['name']} - {recommendation['brand']}",
             }
         }
-        return result
     
     # 추천 실패 시 기본값 반환
-    print("  ⚠️ 추천 실패, 기본값 반환")
     return {
         "product_id": "UNKNOWN",
         "product_name": "추천 실패",
         "score": 0.0,
         "reason": "상품 추천에 실패했습니다.",
-    }
\ No newline at end of file
+    }
+
+
+async def lookup_precomputed_many(requests: List[Tuple[str, str, List[str]]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    (user_id, intent, target_brands) 목록의 사전 계산 결과 1위 (없거나 만료면 None)
+    SQLite 조회는 스레드에서 한 번에 → 이벤트 루프를 막지 않음
+    """
+    if not PRECOMPUTE_ENABLED or not requests:
+        return [None] * len(requests)
+    season = get_current_season()
+
+    def read() -> Optional[List[Optional[List[Dict[str, Any]]]]]:
+        store = get_recommendation_store()
+        if store is None:
+            return None
+        return [store.get(user_id, intent_key(intent, season), brands) for user_id, intent, brands in requests]
+
+    found = await asyncio.to_thread(read)
+    if found is None:
+        return [None] * len(requests)
+    out: List[Optional[Dict[str, Any]]] = []
+    for (_, intent, brands), results in zip(requests, found):
+        labels = request_labels(intent, brands)
+        CACHE_REQUESTS.inc(cache="precomputed", result="hit" if results else "miss", **labels)
+        if results:
+            RECOMMENDATIONS.inc(outcome="precomputed", **labels)
+        out.append(results[0] if results else None)
+    return out
+
+
+async def lookup_precomputed(user_id: str, intent: str, target_brands: List[str]) -> Optional[Dict[str, Any]]:
+    """staleness 한도 이내의 사전 계산 결과 1위 (없거나 만료면 None)"""
+    return (await lookup_precomputed_many([(user_id, intent, target_brands)]))[0]
+
+
+async def get_recommendation(request_data: Any) -> Dict[str, Any]:
+    """
+    Get recommendation using Cross-Encoder based system.
+    """
+    user_id = request_data.user_id
+    intention = getattr(request_data, 'intention', None) or "" 
+    user_data = None # Explicitly set to None as it's not in request
+    target_brands = getattr(request_data, 'target_brand', None)
+
+    log.info("recommend_request", user_id=user_id, intent=intention or "regular", brands=target_brands or [])
+    
+    # 사전 계산 결과 우선 (미스/만료 시 실시간 계산)
+    precomputed = await lookup_precomputed(user_id, intention, target_brands or [])
+    if precomputed:
+        log.info("recommend_result", source="precomputed", product_id=precomputed["product_id"])
+        return format_recommendation(precomputed)
+    
+    # Cross-Encoder 기반 추천 시스템 호출
+    async def compute():
+        return await recommend_product_with_brands(
+            user_id=user_id,
+            user_data=user_data,
+            target_brands=target_brands if target_brands else [],
+            top_k=1,
+            intent=intention
+        )
+
+    source = "live"
+    if SINGLEFLIGHT_ENABLED:
+        # 같은 요청이 이미 계산 중이면 그 결과를 함께 받음 (캠페인 중복 발송, 프론트 재시도)
+        key = (user_id, brands_key(target_brands), intention)
+        if key in _recommend_flight:
+            source = "coalesced"
+            RECOMMENDATIONS.inc(outcome="coalesced", **request_labels(intention, target_brands))
+        recommendation = await _recommend_flight.do(key, compute)
+    else:
+        recommendation = await compute()
+    
+    if recommendation:
+        log.info(
+            "recommend_result", source=source, product_id=recommendation["product_id"],
+            ce=round(recommendation["ce_score"], 4), kw_bonus=round(recommendation["kw_bonus"], 3),
+            final=round(recommendation["final_score"], 4),
+        )
+    else:
+        log.warning("recommend_empty_default", user_id=user_id, intent=intention or "regular")
+    return format_recommendation(recommendation)
+
+
+async def get_recommendations_batch(requests_data: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Batch version of get_recommendation - 요청 순서대로 응답 목록 반환
+    """
+    requests = [
+        {
+            "user_id": r.user_id,
+            "target_brands": getattr(r, 'target_brand', None) or [],
+            "intent": getattr(r, 'intention', None) or "",
+        }
+        for r in requests_data
+    ]
+    log.info("recommend_batch_request", requests=len(requests))
+    
+    # 사전 계산 결과가 있는 요청은 바로 응답, 나머지만 실시간 배치 계산
+    recommendations = await lookup_precomputed_many([(r["user_id"], r["intent"], r["target_brands"]) for r in requests])
+    live = [i for i, r in enumerate(recommendations) if r is None]
+    if len(live) < len(requests):
+        log.info("recommend_batch_precomputed", precomputed=len(requests) - len(live), live=len(live))
+    if live:
+        live_results = await recommend_batch([requests[i] for i in live], top_k=1)
+        for i, r in zip(live, live_results):
+            recommendations[i] = r
+    return [format_recommendation(r) for r in recommendations]
+
+
+async def get_recommendations_by_intent(request_data: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Multi-intent version of get_recommendation - {intent: 응답}
+    사전 계산 결과가 있는 intent는 바로 응답, 나머지 intent만 한 번의 파이프라인으로 계산
+    """
+    user_id = request_data.user_id
+    target_brands = getattr(request_data, 'target_brand', None) or []
+    intents = list(dict.fromkeys(i or "" for i in (getattr(request_data, 'intentions', None) or [""])))
+    log.info("recommend_intents_request", user_id=user_id, intents=intents, brands=target_brands)
+    
+    recommendations = dict(zip(intents, await lookup_precomputed_many([(user_id, i, target_brands) for i in intents])))
+    live = [i for i, r in recommendations.items() if r is None]
+    if live:
+        recommendations.update(await recommend_multi_intent(user_id, target_brands, live, top_k=1))
+    return {i: format_recommendation(r) for i, r in recommendations.items()}
@@ -0,0 +1,118 @@
+"""
+사전 계산 추천 결과 저장소 (로컬 SQLite)
+키: (user_id, intent 키, 브랜드 키) / 값: top-K 추천 결과 JSON + 계산 시각
+- intent 키: weather는 계절을 포함 (계절이 바뀌면 자동으로 미스)
+- 브랜드 키: 정렬/중복 제거한 브랜드 목록 (순서가 달라도 같은 키)
+조회 시 계산 후 max_age_sec가 지난 항목은 만료로 보고 None 반환 → 호출 측은 실시간 계산
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import PRECOMPUTE_STORE_PATH, PRECOMPUTE_MAX_AGE_SEC
+
+
+def intent_key(intent: str, season: Optional[str] = None) -> str:
+    intent = intent or ""
+    return f"{intent}:{season}" if intent == "weather" and season else intent
+
+
+def brands_key(brands: Optional[Sequence[str]]) -> str:
+    return "|".join(sorted({str(b).strip() for b in (brands or []) if str(b).strip()}))
+
+
+class RecommendationStore:
+    """사전 계산 추천 결과 테이블 (배치 작업이 쓰고 /recommend가 읽음, WAL 모드)"""
+
+    def __init__(self, path: str = PRECOMPUTE_STORE_PATH, max_age_sec: float = PRECOMPUTE_MAX_AGE_SEC):
+        self.path = path
+        self.max_age_sec = max_age_sec
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS precomputed_recommendations ("
+            " user_id TEXT NOT NULL, intent TEXT NOT NULL, brands TEXT NOT NULL,"
+            " results TEXT NOT NULL, computed_at REAL NOT NULL,"
+            " PRIMARY KEY (user_id, intent, brands))"
+        )
+        self._db.commit()
+
+    def get(
+        self,
+        user_id: str,
+        intent: str,
+        brands: Optional[Sequence[str]] = None,
+        max_age_sec: Optional[float] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """staleness 한도 이내의 top-K 결과 (없거나 만료면 None)"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT results, computed_at FROM precomputed_recommendations"
+                " WHERE user_id = ? AND intent = ? AND brands = ?",
+                (str(user_id), intent, brands_key(brands)),
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        max_age = self.max_age_sec if max_age_sec is None else max_age_sec
+        if time.time() - row[1] > max_age:
+            self.expired += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put_many(self, entries: Iterable[Tuple[str, str, Optional[Sequence[str]], List[Dict[str, Any]]]]) -> int:
+        """(user_id, intent 키, 브랜드 목록, 결과 목록) 일괄 저장 - 저장한 행 수 반환"""
+        now = time.time()
+        rows = [
+            (str(uid), intent, brands_key(brands), json.dumps(results, ensure_ascii=False), now)
+            for uid, intent, brands, results in entries
+        ]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO precomputed_recommendations"
+                " (user_id, intent, brands, results, computed_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+        return len(rows)
+
+    def purge_older_than(self, max_age_sec: float) -> int:
+        """계산 후 max_age_sec가 지난 행 삭제"""
+        with self._lock:
+            cur = self._db.execute(
+                "DELETE FROM precomputed_recommendations WHERE computed_at < ?", (time.time() - max_age_sec,)
+            )
+            self._db.commit()
+        return cur.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM precomputed_recommendations").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"rows": len(self), "hits": self.hits, "misses": self.misses, "expired": self.expired}
+
+
+_store: Optional[RecommendationStore] = None
+_store_failed = False
+
+
+def get_recommendation_store() -> Optional[RecommendationStore]:
+    """저장소 싱글턴 (열 수 없으면 None → 실시간 계산만 사용)"""
+    global _store, _store_failed
+    if _store is None and not _store_failed:
+        try:
+            _store = RecommendationStore()
+        except (sqlite3.Error, OSError) as e:
+            _store_failed = True
+            print(f"⚠️ [RecommendationStore] disabled: {e}")
+    return _store
@@ -0,0 +1,59 @@
+"""
+동일 요청 합치기 (single-flight)
+같은 키의 요청이 이미 계산 중이면 새로 계산하지 않고 진행 중인 계산의 결과를 함께 받음
+- 계산은 별도 task로 실행 → 먼저 온 요청이 취소(클라이언트 끊김)돼도 기다리는 요청은 결과를 받음
+- 예외도 기다리던 요청 모두에게 그대로 전달, 완료되면 키를 지워 다음 요청은 새로 계산
+- 완료된 결과는 보관하지 않음 (보관은 결과 캐시 담당)
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """do(key, fn): key별로 fn()을 동시에 하나만 실행"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Task"] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        # 지표
+        self.leaders = 0      # 실제로 계산한 요청
+        self.coalesced = 0    # 진행 중인 계산에 합쳐진 요청
+        self.max_waiters = 0  # 계산 1회를 기다린 최대 요청 수 (계산한 요청 포함)
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """key가 계산 중인지 (do 직전에 확인하면 이 요청이 합쳐질지 알 수 있음)"""
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._waiters[key] = 1
+            self.leaders += 1
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self._waiters[key] += 1
+            self.coalesced += 1
+            self.max_waiters = max(self.max_waiters, self._waiters[key])
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: "asyncio.Task") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            self._waiters.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # 기다리던 요청이 모두 취소된 경우 "never retrieved" 경고 방지
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / total, 4) if total else 0.0,
+            "max_waiters": max(self.max_waiters, 1 if self.leaders else 0),
+        }
@@ -0,0 +1,362 @@
+"""
+워커 간 공유 스냅샷 (카탈로그 + ANN 인덱스, 읽기 전용 mmap)
+
+디스크 형식 (SNAPSHOT_DIR):
+  CURRENT                      현재 스냅샷 디렉터리 이름 (임시 파일 → rename으로 원자적 교체)
+  .writer.lock                 리더 선출용 flock
+  <name>/manifest.json         형식 버전, 카탈로그 버전, 섹션별 파일 목록(dtype/shape) + 메타
+  <name>/catalog.<key>.npy     컬럼 배열 (id 오름차순)
+  <name>/catalog.<key>.bin     offset 인덱스 UTF-8 버퍼 (제품명, content)
+  <name>/index.<key>.npy       압축 벡터, scale, 재채점용 원본, 파티션 행/centroid
+
+- 리더(잠금을 얻은 워커 하나): 기존처럼 Supabase에서 로드/증분 갱신 후 변경이 있으면 새 스냅샷 발행
+  바뀌지 않은 섹션은 이전 스냅샷 파일을 하드 링크
+- 팔로워: SNAPSHOT_POLL_SEC마다 CURRENT를 확인해 새 스냅샷을 mmap으로 열고 참조를 교체
+  이전 스냅샷 파일이 지워져도 이미 mmap한 워커는 그대로 사용 가능 (POSIX unlink)
+- 리더가 죽으면 잠금이 풀려 팔로워 중 하나가 리더가 됨
+- flock을 쓸 수 없는 플랫폼에서는 워커마다 직접 로드 (스냅샷 미사용)
+"""
+import asyncio
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from config import (
+    ANN_INDEX_ENABLED, CATALOG_ENABLED, EMBED_MODEL,
+    SNAPSHOT_DIR, SNAPSHOT_POLL_SEC, SNAPSHOT_WAIT_SEC, SNAPSHOT_KEEP,
+)
+from shared.applog import get_logger
+from catalog import ProductCatalog, get_local_catalog
+from vector_index import ProductVectorIndex, get_local_product_index
+
+log = get_logger("recsys.snapshot")
+
+FORMAT_VERSION = 1
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".writer.lock"
+MANIFEST_FILE = "manifest.json"
+
+
+class Snapshot:
+    """열린 스냅샷 - catalog / index는 mmap 배열을 참조하는 읽기 전용 객체"""
+
+    def __init__(
+        self,
+        name: str,
+        manifest: Dict[str, Any],
+        catalog: Optional[ProductCatalog],
+        index: Optional[ProductVectorIndex],
+    ):
+        self.name = name
+        self.manifest = manifest
+        self.catalog = catalog
+        self.index = index
+
+
+# ============================================================================
+# 쓰기 / 읽기
+# ============================================================================
+
+def _write_file(path: str, value: Any) -> Dict[str, Any]:
+    """배열은 .npy, bytes는 .bin으로 저장하고 manifest 항목 반환"""
+    with open(path, "wb") as f:
+        if isinstance(value, (bytes, bytearray)):
+            f.write(value)
+            entry = {"file": os.path.basename(path), "kind": "bin", "size": len(value)}
+        else:
+            arr = np.ascontiguousarray(value)
+            np.save(f, arr)
+            entry = {"file": os.path.basename(path), "kind": "npy", "dtype": str(arr.dtype), "shape": list(arr.shape)}
+        f.flush()
+        os.fsync(f.fileno())
+    return entry
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def read_current(root: str = SNAPSHOT_DIR) -> Optional[str]:
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _set_current(root: str, name: str) -> None:
+    tmp = os.path.join(root, f".{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(root, CURRENT_FILE))
+
+
+def write_snapshot(
+    root: str = SNAPSHOT_DIR,
+    sections: Optional[Dict[str, Tuple[Dict[str, Any], Dict[str, Any], str]]] = None,
+    keep: int = SNAPSHOT_KEEP,
+) -> str:
+    """
+    새 스냅샷을 쓰고 CURRENT를 교체 - 디렉터리 이름 반환
+    sections: {"catalog" | "index": (arrays, meta, version)}, 빠진 섹션은 현재 스냅샷에서 하드 링크
+    """
+    os.makedirs(root, exist_ok=True)
+    previous = read_current(root)
+    prev_manifest = _read_manifest(root, previous) if previous else None
+
+    name = f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}"
+    tmp = os.path.join(root, f".{name}.tmp")
+    os.makedirs(tmp)
+    try:
+        manifest: Dict[str, Any] = {"format": FORMAT_VERSION, "created_at": time.time(), "sections": {}}
+        for section, (arrays, meta, version) in (sections or {}).items():
+            files = {}
+            for key, value in arrays.items():
+                ext = "bin" if isinstance(value, bytes) else "npy"
+                files[key] = _write_file(os.path.join(tmp, f"{section}.{key}.{ext}"), value)
+            manifest["sections"][section] = {"version": version, "meta": meta, "files": files}
+        for section, entry in (prev_manifest or {}).get("sections", {}).items():
+            if section in manifest["sections"]:
+                continue
+            for f in entry["files"].values():
+                _link_or_copy(os.path.join(root, previous, f["file"]), os.path.join(tmp, f["file"]))
+            manifest["sections"][section] = entry
+        catalog_section = manifest["sections"].get("catalog")
+        manifest["catalog_version"] = catalog_section["version"] if catalog_section else None
+        _write_file(os.path.join(tmp, MANIFEST_FILE), json.dumps(manifest, ensure_ascii=False).encode("utf-8"))
+        os.rename(tmp, os.path.join(root, name))
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    _set_current(root, name)
+    _remove_old(root, keep, name)
+    return name
+
+
+def _remove_old(root: str, keep: int, current: str) -> None:
+    """최근 keep개 외의 스냅샷과 1시간 지난 임시 디렉터리 삭제"""
+    names = sorted(n for n in os.listdir(root) if not n.startswith(".") and n != CURRENT_FILE)
+    for n in names[:-keep] if keep > 0 else names:
+        if n != current:
+            shutil.rmtree(os.path.join(root, n), ignore_errors=True)
+    for n in os.listdir(root):
+        path = os.path.join(root, n)
+        if n.endswith(".tmp") and os.path.isdir(path) and time.time() - os.path.getmtime(path) > 3600:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _read_manifest(root: str, name: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(root, name, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return manifest if manifest.get("format") == FORMAT_VERSION else None
+
+
+def _map_file(path: str, entry: Dict[str, Any]) -> np.ndarray:
+    if entry["kind"] == "npy":
+        return np.load(path, mmap_mode="r")
+    if entry["size"] == 0:
+        return np.zeros(0, dtype=np.uint8)  # 빈 파일은 mmap 불가
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+def open_snapshot(root: str = SNAPSHOT_DIR, name: Optional[str] = None) -> Optional[Snapshot]:
+    """스냅샷을 읽기 전용 mmap으로 열기 (name 미지정 시 CURRENT) - 없거나 형식이 다르면 None"""
+    name = name or read_current(root)
+    manifest = _read_manifest(root, name) if name else None
+    if manifest is None:
+        return None
+    loaded: Dict[str, Tuple[Dict[str, np.ndarray], Dict[str, Any]]] = {}
+    for section, entry in manifest["sections"].items():
+        arrays = {key: _map_file(os.path.join(root, name, f["file"]), f) for key, f in entry["files"].items()}
+        loaded[section] = (arrays, entry["meta"])
+    catalog = ProductCatalog.from_arrays(*loaded["catalog"]) if "catalog" in loaded else None
+    index = None
+    # 다른 임베딩 모델로 만든 인덱스는 쿼리 벡터와 공간이 달라 사용하지 않음 (리더가 곧 새로 발행)
+    if "index" in loaded and loaded["index"][1].get("embed_model") == EMBED_MODEL:
+        index = ProductVectorIndex.from_arrays(*loaded["index"])
+    return Snapshot(name, manifest, catalog, index)
+
+
+# ============================================================================
+# 리더 발행 / 팔로워 교체
+# ============================================================================
+
+_writer_fd: Optional[int] = None
+_writer_checked_at = 0.0
+_snapshot: Optional[Snapshot] = None
+_checked_at = 0.0
+_published: Dict[str, Any] = {}   # 섹션별 마지막 발행 키
+_publish_task: Optional["asyncio.Task"] = None
+_publish_checked_at = 0.0
+_wait_deadline: Optional[float] = None  # 팔로워가 첫 스냅샷을 기다리는 시한 (프로세스당 한 번)
+_stats = {"published": 0, "opened": 0, "errors": 0}
+
+
+def _role() -> str:
+    if fcntl is None:
+        return "local"
+    return "writer" if _writer_fd is not None else "follower"
+
+
+def _try_lead(root: str = SNAPSHOT_DIR) -> bool:
+    """리더 잠금 시도 (팔로워는 SNAPSHOT_POLL_SEC마다 재시도) - flock 미지원이면 항상 True"""
+    global _writer_fd, _writer_checked_at
+    if fcntl is None or _writer_fd is not None:
+        return True
+    now = time.time()
+    if now - _writer_checked_at < SNAPSHOT_POLL_SEC:
+        return False
+    _writer_checked_at = now
+    os.makedirs(root, exist_ok=True)
+    fd = os.open(os.path.join(root, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    _writer_fd = fd
+    log.info("snapshot_writer", pid=os.getpid())
+    return True
+
+
+async def _publish(sb) -> None:
+    """리더: 로컬 카탈로그/인덱스가 마지막 발행 이후 바뀌었으면 새 스냅샷 발행"""
+    try:
+        catalog = await get_local_catalog(sb) if CATALOG_ENABLED else None
+        index = await get_local_product_index(sb, wait=True) if ANN_INDEX_ENABLED else None  # 백그라운드 작업이므로 구성 완료까지 대기
+        current = {
+            "catalog": (catalog.version, catalog.revision) if catalog is not None else None,
+            "index": index.built_at if index is not None else None,
+        }
+        changed = {k: v for k, v in current.items() if v is not None and _published.get(k) != v}
+        if not changed:
+            return
+
+        def build_and_write() -> str:
+            sections = {}
+            if "catalog" in changed:
+                sections["catalog"] = (*catalog.to_arrays(), catalog.version)
+            if "index" in changed:
+                sections["index"] = (*index.to_arrays(), str(index.built_at))
+            return write_snapshot(SNAPSHOT_DIR, sections)
+
+        started = time.time()
+        name = await asyncio.to_thread(build_and_write)
+        _published.update(changed)
+        _stats["published"] += 1
+        log.info("snapshot_published", name=name, sections=list(changed), sec=round(time.time() - started, 2))
+    except Exception as e:
+        _stats["errors"] += 1
+        log.warning("snapshot_publish_failed", error=str(e))  # 워커는 이전 스냅샷 유지
+
+
+def _schedule_publish(sb) -> None:
+    """변경 확인은 SNAPSHOT_POLL_SEC마다 한 번 (요청마다 태스크를 만들지 않음)"""
+    global _publish_task, _publish_checked_at
+    now = time.time()
+    if now - _publish_checked_at < SNAPSHOT_POLL_SEC and _published:
+        return
+    if _publish_task is None or _publish_task.done():
+        _publish_checked_at = now
+        _publish_task = asyncio.create_task(_publish(sb))
+
+
+def _follow() -> Optional[Snapshot]:
+    """팔로워: CURRENT가 바뀌었으면 새 스냅샷을 열어 교체 (열기 실패 시 기존 스냅샷 유지)"""
+    global _snapshot, _checked_at
+    now = time.time()
+    if _snapshot is not None and now - _checked_at < SNAPSHOT_POLL_SEC:
+        return _snapshot
+    _checked_at = now
+    name = read_current(SNAPSHOT_DIR)
+    if name is None or (_snapshot is not None and name == _snapshot.name):
+        return _snapshot
+    try:
+        snap = open_snapshot(SNAPSHOT_DIR, name)
+    except Exception as e:
+        _stats["errors"] += 1
+        log.warning("snapshot_open_failed", name=name, error=str(e))  # 이전 스냅샷 유지
+        return _snapshot
+    if snap is not None:
+        _snapshot = snap
+        _stats["opened"] += 1
+        log.info("snapshot_switched", pid=os.getpid(), name=name, catalog=snap.manifest.get("catalog_version"))
+    return _snapshot
+
+
+async def _follow_until(attr: str, wait: bool) -> Any:
+    """
+    팔로워 스냅샷의 catalog/index 반환
+    wait이면 리더의 첫 발행을 기다림 - 시한은 프로세스 시작 후 SNAPSHOT_WAIT_SEC까지 (이후 요청은 바로 None → 폴백)
+    """
+    global _checked_at, _wait_deadline
+    if _wait_deadline is None:
+        _wait_deadline = time.time() + SNAPSHOT_WAIT_SEC
+    deadline = _wait_deadline if wait else 0.0
+    while True:
+        snap = _follow()
+        value = getattr(snap, attr) if snap is not None else None
+        if value is not None or time.time() >= deadline or _writer_fd is not None:
+            return value
+        await asyncio.sleep(0.5)
+        _checked_at = 0.0
+        _try_lead()
+
+
+async def get_shared_catalog(sb, wait: bool = False) -> Optional[ProductCatalog]:
+    """리더는 직접 로드/갱신한 카탈로그 (+ 변경 시 발행), 팔로워는 스냅샷 카탈로그"""
+    if _try_lead():
+        catalog = await get_local_catalog(sb, wait)
+        if fcntl is not None and catalog is not None:
+            _schedule_publish(sb)
+        return catalog
+    catalog = await _follow_until("catalog", wait)
+    if catalog is None and _try_lead():
+        return await get_local_catalog(sb, wait)
+    return catalog
+
+
+async def get_shared_product_index(sb, wait: bool = False) -> Optional[ProductVectorIndex]:
+    """
+    리더는 직접 구성한 인덱스 (+ 변경 시 발행), 팔로워는 스냅샷 인덱스
+    wait이면 첫 스냅샷까지 대기 (startup용) - 요청 경로는 스냅샷이 없으면 바로 None → RPC 폴백
+    """
+    if _try_lead():
+        index = await get_local_product_index(sb, wait)
+        if fcntl is not None and index is not None:
+            _schedule_publish(sb)
+        return index
+    index = await _follow_until("index", wait)
+    if index is None and _try_lead():
+        return await get_local_product_index(sb, wait)
+    return index
+
+
+def get_snapshot_stats() -> Dict[str, Any]:
+    snap = _snapshot
+    return {
+        "role": _role(),
+        "pid": os.getpid(),
+        "current": read_current(SNAPSHOT_DIR),
+        "snapshot": snap.name if snap is not None else None,
+        "catalog_version": snap.manifest.get("catalog_version") if snap is not None else None,
+        **_stats,
+    }
@@ -0,0 +1,391 @@
+"""
+벤치마크/부하 테스트용 로컬 대역 (네트워크·모델 없이 추천 파이프라인 전체 실행)
+- SyntheticCatalog: 합성 products / products_vector / customers (1k ~ 100k 제품)
+- FakeSupabase: table 조회(select/in_/eq/gt/order/range/limit) + match_products RPC (NumPy 전수 탐색)
+- FakeOpenAI: embeddings.create 호환, 텍스트에 포함된 키워드 토픽으로 결정적 벡터 생성
+- FakeCrossEncoder: 쿼리 토큰-content 겹침 점수 (ms_per_pair로 추론 비용 흉내)
+install()로 recommendation_model_API 전역 클라이언트를 교체 (스냅샷/사전 계산/디스크 임베딩 캐시 비활성화)
+
+대역은 실제 서비스의 지연을 재현하지 않음 - 필요하면 latency_ms로 왕복 지연만 더함
+"""
+import asyncio
+import os
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import (
+    EMBED_DIM, EMBED_MODEL, EMBED_VECTOR_COL, CUSTOMER_ID_COL, PRODUCT_VECTOR_FK_COL, CATALOG_UPDATED_AT_COL,
+    SKIN_TYPE_MAP, CONCERN_MAP, TONE_MAP, KEYWORD_TRANSLATION, EMBED_CACHE_SIZE, CE_SCORE_CACHE_SIZE,
+)
+
+BRANDS = ["설화수", "헤라", "라네즈", "이니스프리", "아이오페", "마몽드", "한율", "에뛰드", "프리메라", "에스트라"]
+CATEGORIES = [
+    ("스킨케어", "크림", "수분크림"), ("스킨케어", "에센스", "앰플"), ("스킨케어", "토너", "스킨"),
+    ("스킨케어", "로션", "에멀전"), ("메이크업", "베이스", "쿠션"), ("메이크업", "립", "립스틱"),
+    ("클렌징", "폼", "클렌징폼"), ("선케어", "선크림", "선크림"), ("마스크팩", "시트", "시트마스크"),
+]
+FILLER = [
+    "피부에 부드럽게 펴 발리며 빠르게 흡수됩니다.",
+    "매일 아침 저녁 세안 후 적당량을 덜어 사용하세요.",
+    "피부 장벽을 건강하게 가꾸어 주는 데일리 케어 제품입니다.",
+    "끈적임 없이 마무리되어 메이크업 전에도 사용하기 좋습니다.",
+    "피부과 테스트를 완료한 저자극 포뮬러입니다.",
+    "자연 유래 성분을 담아 하루 종일 편안하게 유지됩니다.",
+]
+
+
+def _seed(text: str) -> int:
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def _normalize(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    return mat / np.maximum(norms, 1e-12)
+
+
+class SyntheticCatalog:
+    """
+    합성 카탈로그 + 고객 (seed가 같으면 같은 데이터)
+    토픽 = KEYWORD_TRANSLATION 키 + 피부고민, 제품 content와 쿼리 임베딩이 같은 토픽 벡터를 공유해
+    검색/키워드 보너스/CE 점수가 고객 프로필과 상관되도록 함
+    """
+
+    def __init__(
+        self,
+        n_products: int,
+        n_customers: int = 1000,
+        dim: int = EMBED_DIM,
+        n_brands: int = len(BRANDS),
+        seed: int = 0,
+    ):
+        self.dim = dim
+        self.rng = np.random.default_rng(seed)
+        self.brands = [BRANDS[i % len(BRANDS)] + (f" {i // len(BRANDS) + 1}" if i >= len(BRANDS) else "")
+                       for i in range(n_brands)]
+
+        # 토픽별 대표어 (content에 쓰는 한글 동의어) + 쿼리에서 토픽을 찾는 검색어
+        topics: Dict[str, List[str]] = {k: list(v) for k, v in KEYWORD_TRANSLATION.items()}
+        for en, kr in CONCERN_MAP.items():
+            topics.setdefault(en.lower(), []).append(kr)
+        self.topic_names = list(topics)
+        self.topic_words = [topics[t] for t in self.topic_names]
+        self.terms: List[Tuple[str, int]] = []
+        for ti, name in enumerate(self.topic_names):
+            self.terms.append((name, ti))
+            self.terms.extend((w.lower(), ti) for w in topics[name])
+        self.topic_vectors = _normalize(
+            self.rng.normal(size=(len(self.topic_names), dim)).astype(np.float32)
+        )
+        self.category_vectors = _normalize(self.rng.normal(size=(len(CATEGORIES), dim)).astype(np.float32))
+
+        self.products: List[Dict[str, Any]] = []
+        self.product_vectors: List[Dict[str, Any]] = []
+        self.vectors = np.empty((n_products, dim), dtype=np.float32)
+        self.brand_codes = np.empty(n_products, dtype=np.int32)
+        self._build_products(n_products)
+        self.ids = np.array([p["id"] for p in self.products], dtype=np.int64)
+        self.customers = [self._customer(i) for i in range(1, n_customers + 1)]
+
+    def _build_products(self, n: int, chunk: int = 4096) -> None:
+        rng = self.rng
+        base_time = datetime(2026, 1, 1)
+        for start in range(0, n, chunk):
+            stop = min(start + chunk, n)
+            mix = np.zeros((stop - start, len(self.topic_names)), dtype=np.float32)
+            cats = rng.integers(0, len(CATEGORIES), size=stop - start)
+            for j in range(stop - start):
+                i = start + j
+                pid = i + 1
+                brand_code = int(rng.integers(0, len(self.brands)))
+                major, middle, small = CATEGORIES[cats[j]]
+                picked = rng.choice(len(self.topic_names), size=int(rng.integers(2, 6)), replace=False)
+                mix[j, picked] = 1.0
+                brand = self.brands[brand_code]
+                words = [w for t in picked for w in rng.choice(self.topic_words[t], size=min(3, len(self.topic_words[t])), replace=False)]
+                updated_at = (base_time + timedelta(seconds=i)).isoformat()
+                self.brand_codes[i] = brand_code
+                self.products.append({
+                    "id": pid,
+                    "brand": brand,
+                    "name": f"{brand} {words[0]} {small} {pid}",
+                    "category_major": major,
+                    "category_middle": middle,
+                    "category_small": small,
+                    "price_final": int(rng.integers(8, 200)) * 1000,
+                    "discount_rate": None if rng.random() < 0.2 else int(rng.integers(0, 60)),
+                    "review_score": round(float(rng.uniform(3.0, 5.0)), 1),
+                    "review_count": int(rng.integers(0, 5000)),
+                    CATALOG_UPDATED_AT_COL: updated_at,
+                })
+                filler = " ".join(rng.choice(FILLER, size=int(rng.integers(4, 12))))
+                self.product_vectors.append({
+                    PRODUCT_VECTOR_FK_COL: pid,
+                    "content": (
+                        f"브랜드: {brand}\n카테고리: {major} > {middle} > {small}\n"
+                        f"특징: {', '.join(words)}\n설명: {filler}"
+                    ),
+                    CATALOG_UPDATED_AT_COL: updated_at,
+                    EMBED_VECTOR_COL: None,  # 아래에서 vectors 행(view)으로 채움
+                })
+            block = mix @ self.topic_vectors + 0.5 * self.category_vectors[cats]
+            block += 0.3 * rng.normal(size=block.shape).astype(np.float32) / np.sqrt(self.dim)
+            self.vectors[start:stop] = _normalize(block)
+        for i, row in enumerate(self.product_vectors):
+            # pgvector 문자열 대신 배열 행을 그대로 반환 (parse_embedding이 그대로 받음, 파싱 비용 제외)
+            row[EMBED_VECTOR_COL] = self.vectors[i]
+
+    def _customer(self, i: int) -> Dict[str, Any]:
+        rng = self.rng
+        return {
+            CUSTOMER_ID_COL: f"user_{i:06d}",
+            "skin_type": [str(rng.choice(list(SKIN_TYPE_MAP)))],
+            "skin_concerns": [str(c) for c in rng.choice(list(CONCERN_MAP), size=int(rng.integers(1, 4)), replace=False)],
+            "keywords": [str(k) for k in rng.choice(list(KEYWORD_TRANSLATION), size=int(rng.integers(1, 5)), replace=False)],
+            "preferred_tone": str(rng.choice(list(TONE_MAP))),
+        }
+
+    @property
+    def user_ids(self) -> List[str]:
+        return [c[CUSTOMER_ID_COL] for c in self.customers]
+
+    def topics_in(self, text: str) -> List[int]:
+        lowered = text.lower()
+        return sorted({ti for term, ti in self.terms if term in lowered})
+
+    def embed(self, text: str) -> List[float]:
+        """텍스트에 등장한 토픽 벡터 합 + 텍스트 해시 잡음 (같은 텍스트 → 같은 벡터)"""
+        noise = np.random.default_rng(_seed(text)).normal(size=self.dim).astype(np.float32)
+        vec = 0.3 * noise / np.sqrt(self.dim)
+        topics = self.topics_in(text)
+        if topics:
+            vec = vec + self.topic_vectors[topics].sum(axis=0)
+        return _normalize(vec).tolist()
+
+    def match(self, query: Sequence[float], count: int, brands: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """match_products RPC와 같은 형식 ([{product_id, similarity}], 유사도 내림차순)"""
+        sims = self.vectors @ _normalize(np.asarray(query, dtype=np.float32))
+        rows = np.arange(len(sims))
+        if brands:
+            codes = [i for i, b in enumerate(self.brands) if b in set(brands)]
+            rows = rows[np.isin(self.brand_codes, codes)]
+        if len(rows) == 0:
+            return []
+        k = min(count, len(rows))
+        top = rows[np.argpartition(-sims[rows], k - 1)[:k]]
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return [{"product_id": int(self.ids[i]), "similarity": float(sims[i])} for i in top]
+
+
+class _FakeTable:
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = rows
+        self._indexes: Dict[str, Dict[Any, List[Dict[str, Any]]]] = {}
+
+    def index(self, col: str) -> Dict[Any, List[Dict[str, Any]]]:
+        if col not in self._indexes:
+            idx: Dict[Any, List[Dict[str, Any]]] = {}
+            for r in self.rows:
+                idx.setdefault(r.get(col), []).append(r)
+            self._indexes[col] = idx
+        return self._indexes[col]
+
+
+class _FakeQuery:
+    """PostgREST 쿼리 빌더 중 RecSys가 쓰는 부분만 (in_/eq는 컬럼 인덱스로 조회)"""
+
+    def __init__(self, sb: "FakeSupabase", table: _FakeTable):
+        self.sb = sb
+        self.table = table
+        self.columns: Optional[List[str]] = None
+        self.lookups: List[Tuple[str, List[Any]]] = []
+        self.filters: List[Tuple[str, Any]] = []
+        self.order_by: List[Tuple[str, bool]] = []
+        self.bounds: Optional[Tuple[int, int]] = None
+        self.max_rows: Optional[int] = None
+
+    def select(self, columns: str = "*") -> "_FakeQuery":
+        cols = [c.strip() for c in columns.split(",")]
+        self.columns = None if cols == ["*"] else cols
+        return self
+
+    def in_(self, col: str, values: Iterable[Any]) -> "_FakeQuery":
+        self.lookups.append((col, list(values)))
+        return self
+
+    def eq(self, col: str, value: Any) -> "_FakeQuery":
+        return self.in_(col, [value])
+
+    def gt(self, col: str, value: Any) -> "_FakeQuery":
+        self.filters.append((col, value, False))
+        return self
+
+    def gte(self, col: str, value: Any) -> "_FakeQuery":
+        self.filters.append((col, value, True))
+        return self
+
+    def order(self, col: str, desc: bool = False) -> "_FakeQuery":
+        self.order_by.append((col, desc))
+        return self
+
+    def range(self, start: int, end: int) -> "_FakeQuery":
+        self.bounds = (start, end)
+        return self
+
+    def limit(self, n: int) -> "_FakeQuery":
+        self.max_rows = n
+        return self
+
+    async def execute(self) -> SimpleNamespace:
+        await self.sb.wait()
+        rows = self.table.rows
+        for col, values in self.lookups:
+            if rows is self.table.rows:
+                idx = self.table.index(col)
+                rows = [r for v in dict.fromkeys(values) for r in idx.get(v, ())]
+            else:
+                wanted = set(values)
+                rows = [r for r in rows if r.get(col) in wanted]
+        for col, value, inclusive in self.filters:
+            rows = [
+                r for r in rows
+                if r.get(col) is not None and (str(r[col]) > str(value) or inclusive and str(r[col]) == str(value))
+            ]
+        for col, desc in reversed(self.order_by):  # 앞의 order가 우선 (안정 정렬)
+            rows = sorted(rows, key=lambda r: (r.get(col) is None, r.get(col)), reverse=desc)
+        if self.bounds is not None:
+            rows = rows[self.bounds[0]:self.bounds[1] + 1]
+        if self.max_rows is not None:
+            rows = rows[:self.max_rows]
+        if self.columns is not None:
+            rows = [{c: r.get(c) for c in self.columns} for r in rows]
+        return SimpleNamespace(data=list(rows))
+
+
+class _FakeRPC:
+    def __init__(self, sb: "FakeSupabase", payload: Dict[str, Any]):
+        self.sb = sb
+        self.payload = payload
+
+    async def execute(self) -> SimpleNamespace:
+        await self.sb.wait()
+        p = self.payload
+        return SimpleNamespace(data=self.sb.data.match(p["query_embedding"], p["match_count"], p.get("filter_brands")))
+
+
+class FakeSupabase:
+    """Supabase AsyncClient 대역 (latency_ms: 요청마다 더하는 왕복 지연)"""
+
+    def __init__(self, data: SyntheticCatalog, latency_ms: float = 0.0):
+        self.data = data
+        self.latency = latency_ms / 1000.0
+        self.tables = {
+            "products": _FakeTable(data.products),
+            "products_vector": _FakeTable(data.product_vectors),
+            "customers": _FakeTable(data.customers),
+        }
+        self.calls: Counter = Counter()
+
+    async def wait(self) -> None:
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+    def table(self, name: str) -> _FakeQuery:
+        self.calls[name] += 1
+        return _FakeQuery(self, self.tables[name])
+
+    def rpc(self, name: str, payload: Dict[str, Any]) -> _FakeRPC:
+        self.calls[f"rpc:{name}"] += 1
+        return _FakeRPC(self, payload)
+
+
+class _FakeEmbeddings:
+    def __init__(self, data: SyntheticCatalog, latency_ms: float):
+        self.data = data
+        self.latency = latency_ms / 1000.0
+        self.calls = 0
+        self.inputs = 0
+
+    async def create(self, model: str, input: List[str], encoding_format: Optional[str] = None, **kwargs):
+        self.calls += 1
+        self.inputs += len(input)
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        return SimpleNamespace(data=[SimpleNamespace(embedding=self.data.embed(t)) for t in input])
+
+
+class FakeOpenAI:
+    """AsyncOpenAI 대역 (embeddings.create만)"""
+
+    def __init__(self, data: SyntheticCatalog, latency_ms: float = 0.0):
+        self.embeddings = _FakeEmbeddings(data, latency_ms)
+
+
+class FakeCrossEncoder:
+    """
+    CrossEncoder.predict 대역 - 쿼리 토큰이 content에 나오는 비율 + 쌍 해시 잡음
+    ms_per_pair: 쌍마다 CE executor 스레드를 점유하는 시간 (sleep이라 GIL은 잡지 않음)
+    """
+
+    def __init__(self, ms_per_pair: float = 0.0):
+        self.ms_per_pair = ms_per_pair
+        self.pairs = 0
+
+    def predict(self, pairs: List[Tuple[str, str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        self.pairs += len(pairs)
+        if self.ms_per_pair > 0:
+            time.sleep(self.ms_per_pair * len(pairs) / 1000.0)
+        scores = np.empty(len(pairs), dtype=np.float32)
+        for i, (query, content) in enumerate(pairs):
+            tokens = [t for t in query.replace(",", " ").split() if len(t) > 1]
+            overlap = sum(t in content for t in tokens) / max(len(tokens), 1)
+            scores[i] = overlap + 0.05 * (_seed(query + content) % 1000) / 1000.0
+        return scores
+
+
+def install(
+    data: SyntheticCatalog,
+    db_latency_ms: float = 0.0,
+    embed_latency_ms: float = 0.0,
+    cross_encoder: Optional[Any] = None,
+    work_dir: Optional[str] = None,
+) -> Tuple[FakeSupabase, FakeOpenAI]:
+    """
+    recommendation_model_API가 대역을 쓰도록 전역 상태 교체 (같은 프로세스에서 다시 호출하면 새 데이터로 교체)
+    cross_encoder: None이면 CE_MODEL을 실제로 로드 (get_cross_encoder)
+    work_dir: 재채점용 원본 벡터 파일 위치 (None이면 재채점 없이 압축 벡터만 사용)
+    """
+    import catalog
+    import recommendation_model_API as api
+    import vector_index
+    from cache import CEScoreCache, EmbeddingCache, LRUCache
+    from embedding_provider import OpenAIEmbeddingProvider
+
+    sb = FakeSupabase(data, db_latency_ms)
+    oa = FakeOpenAI(data, embed_latency_ms)
+    api._async_supabase = sb
+    api._async_openai = oa
+    api._embedding_provider = OpenAIEmbeddingProvider(lambda: oa, model=EMBED_MODEL, dim=data.dim)
+    if cross_encoder is not None:
+        api._cross_encoder_cache = cross_encoder
+
+    # 워커 간 스냅샷 / 사전 계산 / 디스크 캐시는 실제 서비스 상태를 건드리므로 끔
+    catalog.SNAPSHOT_ENABLED = False
+    vector_index.SNAPSHOT_ENABLED = False
+    api.PRECOMPUTE_ENABLED = False
+    catalog._catalog = None
+    catalog._catalog_task = None
+    catalog._catalog_retry_at = 0.0
+    vector_index._product_index_cache = None
+    vector_index._index_build_task = None
+    vector_index._index_retry_at = 0.0
+    vector_index.VECTOR_FULL_PATH = os.path.join(work_dir, "product_vectors_f32.npy") if work_dir else None
+    api._embedding_cache = EmbeddingCache(EMBED_MODEL, EMBED_CACHE_SIZE, None)
+    api._ce_score_cache = CEScoreCache(CE_SCORE_CACHE_SIZE)
+    api._result_cache = LRUCache(api.RESULT_CACHE_SIZE, ttl=api.RESULT_CACHE_TTL_SEC)
+    return sb, oa
@@ -0,0 +1,51 @@
+import io
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))  # 저장소 루트 (shared/)
+
+from shared.applog import configure_logging, get_logger, request_scope
+
+
+class TestAppLog(unittest.TestCase):
+    def setUp(self):
+        self.out = io.StringIO()
+
+    def tearDown(self):
+        configure_logging("INFO", 1.0, "json")
+
+    def lines(self):
+        return [json.loads(l) for l in self.out.getvalue().splitlines()]
+
+    def test_disabled_debug_payload_is_not_computed(self):
+        configure_logging("INFO", 1.0, "json", stream=self.out)
+        log = get_logger("test")
+        calls = []
+        log.debug("expensive", payload=lambda: calls.append(1))
+        log.info("cheap", n=1)
+        self.assertEqual(calls, [])
+        self.assertEqual([(l["event"], l["n"]) for l in self.lines()], [("cheap", 1)])
+
+    def test_lazy_fields_and_request_id(self):
+        configure_logging("DEBUG", 1.0, "json", stream=self.out)
+        with request_scope("req-1"):
+            get_logger("test").debug("pool", sizes=lambda: [1, 2])
+        (line,) = self.lines()
+        self.assertEqual((line["request_id"], line["sizes"], line["level"]), ("req-1", [1, 2], "DEBUG"))
+
+    def test_debug_sampling_is_per_request(self):
+        configure_logging("DEBUG", 0.0, "json", stream=self.out)
+        log = get_logger("test")
+        with request_scope():
+            self.assertFalse(log.enabled())
+            log.debug("dropped")
+            log.warning("kept")
+        with request_scope(sample_rate=1.0):
+            log.debug("sampled")
+        self.assertEqual([l["event"] for l in self.lines()], ["kept", "sampled"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+from cache import CEScoreCache, EmbeddingCache, LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        c = LRUCache(2)
+        c.put("a", 1)
+        c.put("b", 2)
+        c.get("a")
+        c.put("c", 3)
+        self.assertEqual(c.get("a"), 1)
+        self.assertIsNone(c.get("b"))
+        self.assertEqual(len(c), 2)
+
+    def test_ttl_expires_entries(self):
+        c = LRUCache(2, ttl=60)
+        c.put("a", 1)
+        self.assertEqual(c.get("a"), 1)
+        c._expires["a"] -= 120
+        self.assertIsNone(c.get("a"))
+        self.assertEqual((c.expired, len(c)), (1, 0))
+        c.put("a", 2)
+        self.assertEqual(c.get("a"), 2)
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def test_disk_tier_survives_restart(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "emb.sqlite3")
+            c1 = EmbeddingCache("text-embedding-3-small", 8, path)
+            c1.put("query", [0.25, 0.5, 0.75])
+
+            c2 = EmbeddingCache("text-embedding-3-small", 8, path)
+            self.assertEqual(c2.get("query"), [0.25, 0.5, 0.75])
+            self.assertEqual(c2.disk_hits, 1)
+            self.assertIsNone(c2.get("other query"))
+
+    def test_disk_tier_opens_on_first_use(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "sub", "emb.sqlite3")
+            c = EmbeddingCache("text-embedding-3-small", 8, path)
+            self.assertFalse(os.path.exists(path))
+            self.assertIsNone(c.get("query"))
+            self.assertTrue(os.path.exists(path))
+
+    def test_batched_disk_tier(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "emb.sqlite3")
+            EmbeddingCache("m", 8, path).put_disk({"a": [1.0], "b": [2.0]})
+            c = EmbeddingCache("m", 8, path)
+            self.assertIsNone(c.get_memory("a"))
+            self.assertEqual(c.get_disk(["a", "b", "c"]), {"a": [1.0], "b": [2.0]})
+            self.assertEqual(c.get_memory("b"), [2.0])
+            self.assertEqual(c.disk_hits, 2)
+
+    def test_key_includes_model(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "emb.sqlite3")
+            EmbeddingCache("model-a", 8, path).put("query", [1.0])
+            self.assertIsNone(EmbeddingCache("model-b", 8, path).get("query"))
+
+
+class TestCEScoreCache(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+    def predict(self, pairs):
+        self.calls.append(list(pairs))
+        return [float(len(c)) for _, c in pairs]
+
+    def test_only_uncached_pairs_are_predicted(self):
+        c = CEScoreCache(100)
+        self.assertEqual(c.score(self.predict, "q", [(1, "aa"), (2, "bbb")]), [2.0, 3.0])
+        self.assertEqual(c.score(self.predict, "q", [(1, "aa"), (3, "c")]), [2.0, 1.0])
+        self.assertEqual(self.calls[1], [("q", "c")])
+        self.assertEqual(c.hits, 1)
+
+    def test_content_change_invalidates_product(self):
+        c = CEScoreCache(100)
+        c.score(self.predict, "q1", [(1, "old")])
+        c.score(self.predict, "q2", [(1, "old")])
+        self.assertEqual(len(c), 2)
+
+        self.assertEqual(c.score(self.predict, "q1", [(1, "new content")]), [11.0])
+        self.assertEqual(len(c), 1)
+
+
+    def test_evicted_keys_leave_product_index(self):
+        c = CEScoreCache(2)
+        c.score(self.predict, "q", [(1, "a"), (2, "b"), (3, "c")])
+        self.assertEqual(len(c), 2)
+        self.assertEqual(sorted(c._keys_by_pid), [2, 3])
+
+        c0 = CEScoreCache(0)
+        c0.score(self.predict, "q", [(1, "a")])
+        self.assertEqual(c0._keys_by_pid, {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,228 @@
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+from catalog import ProductCatalog, fetch_all_rows, load_catalog, refresh_catalog
+
+
+class _Resp:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.cols = None
+        self.bounds = None
+        self.orders = []
+
+    def select(self, columns):
+        self.cols = [c.strip() for c in columns.split(",")]
+        return self
+
+    def gt(self, col, value):
+        self.rows = [r for r in self.rows if str(r.get(col)) > str(value)]
+        return self
+
+    def gte(self, col, value):
+        self.rows = [r for r in self.rows if str(r.get(col)) >= str(value)]
+        return self
+
+    def order(self, col):
+        self.orders.append(col)
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    async def execute(self):
+        for col in reversed(self.orders):
+            self.rows.sort(key=lambda r: r.get(col))
+        rows = self.rows[self.bounds[0]:self.bounds[1] + 1]
+        return _Resp([{c: r.get(c) for c in self.cols} for r in rows])
+
+
+class _FakeSupabase:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def table(self, name):
+        return _Query(self.tables[name])
+
+
+def _product(pid, **kw):
+    row = {
+        "id": pid, "brand": "헤라", "name": f"제품{pid}", "category_major": "스킨케어",
+        "category_middle": None, "category_small": None, "price_final": 10000 + pid,
+        "discount_rate": 10, "review_score": 4.5, "review_count": None, "updated_at": "2026-01-01",
+    }
+    row.update(kw)
+    return row
+
+
+class TestProductCatalog(unittest.TestCase):
+    def test_round_trip_keeps_types_and_nulls(self):
+        c = ProductCatalog()
+        c.apply_products([_product(1), _product(2, brand="설화수", review_count=3)])
+        c.apply_vectors([{"product_id": 1, "content": "보습 크림"}])
+
+        d = c.get_detail(1)
+        self.assertEqual(d["brand"], "헤라")
+        self.assertIsInstance(d["price_final"], int)
+        self.assertIsNone(d["review_count"])
+        self.assertIsNone(d["category_middle"])
+        self.assertEqual(c.get_detail(2)["review_count"], 3)
+
+        prod_map, pv_map, missing = c.lookup([1, 2, 99])
+        self.assertEqual(set(prod_map), {1, 2})
+        self.assertEqual(pv_map, {1: "보습 크림"})
+        self.assertEqual(missing, [99])
+
+
+    def test_updates_are_compacted(self):
+        c = ProductCatalog()
+        c.apply_products([_product(1), _product(2)])
+        for i in range(50):
+            c.apply_vectors([{"product_id": 1, "content": f"내용 {i}" * 20}])
+        self.assertGreater(c.contents.wasted_bytes, c.contents.live_bytes)
+        self.assertTrue(c.compact(min_wasted=0))
+        self.assertEqual(c.contents.wasted_bytes, 0)
+        self.assertEqual(c.get_content(1), "내용 49" * 20)
+        self.assertEqual(c.get_detail(2)["name"], "제품2")
+        self.assertFalse(c.compact(min_wasted=0))
+
+class TestCatalogRefresh(unittest.IsolatedAsyncioTestCase):
+    async def test_incremental_refresh_uses_watermark(self):
+        products = [_product(i) for i in range(1, 4)]
+        vectors = [{"product_id": i, "content": f"c{i}", "updated_at": "2026-01-01"} for i in range(1, 4)]
+        sb = _FakeSupabase({"products": products, "products_vector": vectors})
+
+        catalog = await load_catalog(sb)
+        self.assertEqual(len(catalog), 3)
+        catalog, applied = await refresh_catalog(sb, catalog)
+        self.assertEqual(applied, 0)
+
+        products[0].update(price_final=1, updated_at="2026-02-01")
+        products.append(_product(4, updated_at="2026-02-02"))
+        vectors[1].update(content="new", updated_at="2026-02-01")
+
+        catalog, applied = await refresh_catalog(sb, catalog)
+        self.assertEqual(applied, 3)
+        self.assertEqual(catalog.get_detail(1)["price_final"], 1)
+        self.assertIn(4, catalog)
+        self.assertEqual(catalog.get_content(2), "new")
+        self.assertEqual(catalog.version, "2026-02-02|2026-02-01")
+
+    async def test_rows_sharing_watermark_are_not_skipped(self):
+        products = [_product(1, updated_at="2026-02-01")]
+        vectors = [{"product_id": 1, "content": "c1", "updated_at": "2026-02-01"}]
+        sb = _FakeSupabase({"products": products, "products_vector": vectors})
+        catalog = await load_catalog(sb)
+
+        # 워터마크와 같은 시각에 늦게 커밋된 행
+        products.append(_product(2, updated_at="2026-02-01"))
+        catalog, applied = await refresh_catalog(sb, catalog)
+        self.assertEqual(applied, 1)
+        self.assertIn(2, catalog)
+        catalog, applied = await refresh_catalog(sb, catalog)
+        self.assertEqual(applied, 0)
+
+    async def test_reconcile_removes_deleted_products(self):
+        products = [_product(i) for i in range(1, 4)]
+        vectors = [{"product_id": i, "content": f"c{i}", "updated_at": "2026-01-01"} for i in range(1, 4)]
+        sb = _FakeSupabase({"products": products, "products_vector": vectors})
+        catalog = await load_catalog(sb)
+        version = catalog.version
+
+        del products[1], vectors[1]
+        vectors[0]["content"] = "x"  # 증분 대상 아님 (updated_at 그대로)
+        catalog, applied = await refresh_catalog(sb, catalog, reconcile=True)
+        self.assertEqual(applied, 2)
+        self.assertNotIn(2, catalog)
+        self.assertIsNone(catalog.get_content(2))
+        self.assertEqual(len(catalog), 2)
+        self.assertEqual(catalog.get_detail(3)["name"], "제품3")
+        self.assertNotEqual(catalog.version, version)
+
+    async def test_refresh_swaps_in_a_copy_built_off_the_loop(self):
+        import threading
+
+        products = [_product(i) for i in range(1, 4)]
+        vectors = [{"product_id": i, "content": f"c{i}", "updated_at": "2026-01-01"} for i in range(1, 4)]
+        sb = _FakeSupabase({"products": products, "products_vector": vectors})
+        old = await load_catalog(sb)
+
+        threads = []
+        apply_products = ProductCatalog.apply_products
+
+        def record(self, rows):
+            threads.append(threading.current_thread())
+            return apply_products(self, rows)
+
+        products[0].update(name="바뀐 이름", updated_at="2026-02-01")
+        del products[2], vectors[2]
+        with mock.patch.object(ProductCatalog, "apply_products", record):
+            new, applied = await refresh_catalog(sb, old, reconcile=True)
+
+        self.assertEqual(applied, 3)  # 이름 변경 1 + 제품/content 삭제 2
+        self.assertIsNot(new, old)
+        self.assertNotIn(threading.main_thread(), threads)
+        # 교체 전까지 읽던 카탈로그는 그대로
+        self.assertEqual(old.get_detail(1)["name"], "제품1")
+        self.assertIn(3, old)
+        self.assertEqual(new.get_detail(1)["name"], "바뀐 이름")
+        self.assertNotIn(3, new)
+        self.assertEqual(new.get_detail(2)["brand"], old.get_detail(2)["brand"])
+
+        # 변경이 없으면 복제 없이 같은 카탈로그
+        same, applied = await refresh_catalog(sb, new)
+        self.assertIs(same, new)
+        self.assertEqual(applied, 0)
+
+    async def test_full_load_pages_in_key_order(self):
+        import catalog as catalog_module
+
+        products = [_product(i) for i in (5, 3, 1, 4, 2)]
+        sb = _FakeSupabase({"products": products})
+        saved = catalog_module.CATALOG_PAGE_SIZE
+        catalog_module.CATALOG_PAGE_SIZE = 2
+        try:
+            rows = await fetch_all_rows(sb, "products", "id")
+        finally:
+            catalog_module.CATALOG_PAGE_SIZE = saved
+        self.assertEqual([r["id"] for r in rows], [1, 2, 3, 4, 5])
+
+
+class TestCatalogRetry(unittest.IsolatedAsyncioTestCase):
+    async def test_failed_load_backs_off(self):
+        import catalog as catalog_module
+
+        calls = []
+
+        class _Broken:
+            def table(self, name):
+                calls.append(name)
+                raise RuntimeError("column products.updated_at does not exist")
+
+        saved = (catalog_module._catalog, catalog_module._catalog_task, catalog_module._catalog_retry_at)
+        catalog_module._catalog, catalog_module._catalog_task, catalog_module._catalog_retry_at = None, None, 0.0
+        try:
+            self.assertIsNone(await catalog_module.get_local_catalog(_Broken(), wait=True))
+            attempts = len(calls)
+            for _ in range(5):
+                self.assertIsNone(await catalog_module.get_local_catalog(_Broken()))
+                await asyncio.sleep(0)
+            self.assertEqual(len(calls), attempts)
+        finally:
+            catalog_module._catalog, catalog_module._catalog_task, catalog_module._catalog_retry_at = saved
+
+
+if __name__ == "__main__":
+    unittest.main()
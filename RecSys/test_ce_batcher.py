@@ -0,0 +1,75 @@
+import asyncio
+import os
+import unittest
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+from ce_batcher import CrossEncoderBatcher
+
+
+class TestCrossEncoderBatcher(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.calls = []
+
+    async def predict(self, pairs):
+        self.calls.append(list(pairs))
+        await asyncio.sleep(0)
+        return [float(len(q) + len(d)) for q, d in pairs]
+
+    async def test_concurrent_requests_share_one_batch(self):
+        b = CrossEncoderBatcher(self.predict, window_ms=20, max_pairs=100)
+        results = await asyncio.gather(
+            b.score([("q", "a"), ("q", "bb")]),
+            b.score([("qq", "c")]),
+            b.score([("q", "a")]),
+        )
+        self.assertEqual(results, [[2.0, 3.0], [3.0], [2.0]])
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len(self.calls[0]), 3)
+
+        stats = b.stats()
+        self.assertEqual(stats["batches"], 1)
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["deduped_pairs"], 1)
+        self.assertEqual(stats["queued_pairs"], 0)
+        self.assertEqual(stats["batch_size_histogram"]["<=8"], 1)
+
+    async def test_max_pairs_splits_batches(self):
+        b = CrossEncoderBatcher(self.predict, window_ms=50, max_pairs=2, max_concurrent=1)
+        await asyncio.gather(*[b.score([(f"q{i}", "d")]) for i in range(5)])
+        self.assertEqual([len(c) for c in self.calls], [2, 2, 1])
+        self.assertEqual(b.stats()["max_batch_pairs"], 2)
+        self.assertEqual(len(b._flushes), 0)  # 완료된 배치 작업은 참조에서 제거
+
+    async def test_predict_error_reaches_every_waiter(self):
+        async def fail(pairs):
+            raise RuntimeError("boom")
+
+        b = CrossEncoderBatcher(fail, window_ms=10)
+        results = await asyncio.gather(b.score([("q", "a")]), b.score([("q", "b")]), return_exceptions=True)
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+    async def test_restarted_worker_keeps_queued_requests(self):
+        release = asyncio.Event()
+
+        async def gated(pairs):
+            await release.wait()
+            return await self.predict(pairs)
+
+        b = CrossEncoderBatcher(gated, window_ms=0, max_pairs=1, max_concurrent=1)
+        first = asyncio.ensure_future(b.score([("q", "a")]))
+        second = asyncio.ensure_future(b.score([("q", "bb")]))
+        await asyncio.sleep(0.01)  # 워커: first 추론 중, second는 대기열에서 슬롯 대기
+        b._worker.cancel()
+        await asyncio.sleep(0)
+        third = asyncio.ensure_future(b.score([("q", "ccc")]))  # 워커 재시작 - 같은 대기열 이어받음
+        release.set()
+        results = await asyncio.wait_for(asyncio.gather(first, second, third), 1.0)
+        self.assertEqual(results, [[2.0], [3.0], [4.0]])
+        self.assertEqual(b.stats()["queued_pairs"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
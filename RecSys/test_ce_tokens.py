@@ -0,0 +1,67 @@
+import os
+import unittest
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+from ce_tokens import PairEncoder, bucket_length, pad_batches, plan_batches
+
+
+class _CharTokenizer:
+    """문자 1개 = 토큰 1개, <s>=0 </s>=2 pad=1 (XLM-R 형식)"""
+
+    pad_token_id = 1
+
+    def __init__(self):
+        self.calls = 0
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 4 if pair else 2
+
+    def __call__(self, texts, add_special_tokens=True):
+        self.calls += 1
+        return {"input_ids": [[ord(ch) for ch in t] for t in texts]}
+
+    def build_inputs_with_special_tokens(self, a, b):
+        return [0] + a + [2, 2] + b + [2]
+
+
+class TestBucketing(unittest.TestCase):
+    def test_bucket_length(self):
+        self.assertEqual(bucket_length(3, (8, 16)), 8)
+        self.assertEqual(bucket_length(9, (8, 16)), 16)
+        self.assertEqual(bucket_length(99, (8, 16)), 16)
+
+    def test_plan_groups_by_bucket_and_batch_size(self):
+        plan = plan_batches([20, 3, 5, 12, 4], (8, 16, 32), batch_size=2)
+        self.assertEqual(plan, [([1, 4], 8), ([2], 8), ([3], 16), ([0], 32)])
+
+    def test_pad_batches_masks_padding(self):
+        (batch, ids, mask), = pad_batches([[5, 6, 7], [8]], (4,), batch_size=8, pad_token_id=1)
+        self.assertEqual(batch, [1, 0])
+        self.assertEqual(ids.tolist(), [[8, 1, 1, 1], [5, 6, 7, 1]])
+        self.assertEqual(mask.tolist(), [[1, 0, 0, 0], [1, 1, 1, 0]])
+
+
+class TestPairEncoder(unittest.TestCase):
+    def test_truncates_at_token_level_to_model_budget(self):
+        enc = PairEncoder(_CharTokenizer(), max_length=16, query_max_tokens=4)
+        ids = enc.pair_ids("query!", "p" * 100)
+        self.assertEqual(len(ids), 16)
+        self.assertEqual(ids[:5], [0] + [ord(c) for c in "quer"])
+
+    def test_passage_tokens_are_cached_by_content(self):
+        tok = _CharTokenizer()
+        enc = PairEncoder(tok, max_length=32, query_max_tokens=8)
+        self.assertEqual(enc.warm(["aa", "bb", "aa", ""]), 2)
+        calls = tok.calls
+        enc.encode([("q1", "aa"), ("q1", "bb"), ("q2", "aa")])
+        self.assertEqual(tok.calls - calls, 2)  # 쿼리 2개만 토큰화
+        self.assertEqual(len(enc), 2)
+        enc.pair_ids("q1", "cc")
+        self.assertEqual(len(enc), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import unittest
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+import numpy as np
+
+import embedding_provider
+from embedding_provider import (
+    EmbeddingProvider, LocalEmbeddingProvider, OpenAIEmbeddingProvider, PASSAGE, QUERY, create_embedding_provider,
+)
+
+
+class _FakeSentenceTransformer:
+    def __init__(self, dim):
+        self.dim = dim
+        self.inputs = []
+
+    def encode(self, texts, **kwargs):
+        self.inputs.extend(texts)
+        return np.ones((len(texts), self.dim), dtype=np.float32) / np.sqrt(self.dim)
+
+
+class _FakeOpenAI:
+    def __init__(self, dim):
+        self.dim = dim
+        self.calls = []
+        self.embeddings = self
+
+    async def create(self, model, input, encoding_format=None):
+        self.calls.append(len(input))
+
+        class _Item:
+            embedding = [0.0] * self.dim
+
+        class _Resp:
+            data = [_Item() for _ in input]
+
+        return _Resp()
+
+
+class TestEmbeddingProvider(unittest.TestCase):
+    def test_local_provider_applies_query_and_passage_prefixes(self):
+        provider = LocalEmbeddingProvider(dim=8)
+        provider._model = _FakeSentenceTransformer(8)
+        vecs = asyncio.run(provider.embed(["건성 보습"], QUERY))
+        provider.encode(["수분 크림"], PASSAGE)
+        self.assertEqual(provider._model.inputs, ["query: 건성 보습", "passage: 수분 크림"])
+        self.assertEqual(len(vecs[0]), 8)
+
+    def test_dimension_mismatch_is_an_error(self):
+        provider = LocalEmbeddingProvider(dim=8)
+        provider._model = _FakeSentenceTransformer(4)
+        with self.assertRaises(ValueError):
+            provider.encode(["x"])
+
+    def test_openai_provider_chunks_requests(self):
+        client = _FakeOpenAI(6)
+        provider = OpenAIEmbeddingProvider(lambda: client, dim=6)
+        original = embedding_provider.EMBED_MAX_INPUTS
+        embedding_provider.EMBED_MAX_INPUTS = 2
+        try:
+            vecs = asyncio.run(provider.embed(["a", "b", "c"]))
+        finally:
+            embedding_provider.EMBED_MAX_INPUTS = original
+        self.assertEqual(client.calls, [2, 1])
+        self.assertEqual(len(vecs), 3)
+
+    def test_factory(self):
+        self.assertIsInstance(create_embedding_provider("local"), LocalEmbeddingProvider)
+        self.assertIsInstance(create_embedding_provider("openai", lambda: None), OpenAIEmbeddingProvider)
+        with self.assertRaises(ValueError):
+            create_embedding_provider("cohere")
+        with self.assertRaises(TypeError):
+            EmbeddingProvider("m", 3)  # embed() 미구현 기반 클래스
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import random
+import unittest
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+from config import KEYWORD_TRANSLATION, WEATHER_KEYWORDS, WEATHER_PRIORITY_KEYWORDS
+from keyword_matcher import AhoCorasick, keyword_matcher
+
+
+def _reference_hits(kws, content, product_keywords, season):
+    """기존 keyword_bonus의 매칭/가중치 로직"""
+    search_text = (content or "").lower()
+    if product_keywords:
+        search_text += " " + " ".join([str(k).lower() for k in product_keywords])
+    normalized = search_text.replace(" ", "")
+    priority_kws = [k.lower() for k in WEATHER_PRIORITY_KEYWORDS.get(season, [])] if season else []
+    matched, hit = [], 0.0
+    for kw in kws:
+        k = kw.lower()
+        if (k in search_text) or (k.replace(" ", "") in normalized):
+            matched.append(kw)
+            hit += 2.0 if any(pk in k or k in pk for pk in priority_kws) else 1.0
+    return matched, hit
+
+
+class TestAhoCorasick(unittest.TestCase):
+    def test_finds_overlapping_patterns(self):
+        ac = AhoCorasick(["보습", "고보습", "습", "크림", "he", "she", "hers"])
+        self.assertEqual(ac.find("고보습크림"), {"보습", "고보습", "습", "크림"})
+        self.assertEqual(ac.find("ushers"), {"he", "she", "hers"})
+        self.assertEqual(ac.find("없음"), set())
+
+
+class TestKeywordMatcher(unittest.TestCase):
+    def test_matches_reference_keyword_bonus(self):
+        rng = random.Random(7)
+        vocab = [w for ws in KEYWORD_TRANSLATION.values() for w in ws]
+        vocab += [w for ws in WEATHER_KEYWORDS.values() for w in ws]
+        extra = ["Vegan", "Anti-aging", "Clean Beauty", "Wrinkle(주름)", "촉촉한 보습감"]
+        for _ in range(200):
+            words = rng.sample(vocab + extra, 12)
+            content = " ".join(rng.sample(words, 6)) + " 제품 설명"
+            product_keywords = rng.sample(vocab, 2) if rng.random() < 0.5 else None
+            kws = rng.sample(vocab + extra, 15)
+            season = rng.choice([None, "spring", "summer", "fall", "winter"])
+
+            text = keyword_matcher.product_text(content, product_keywords)
+            matched = keyword_matcher.match_terms(text, kws)
+            hit = sum(2.0 if keyword_matcher.is_priority(kw, season) else 1.0 for kw in matched)
+            self.assertEqual((matched, hit), _reference_hits(kws, content, product_keywords, season))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKEND_STANDINS = os.path.join(os.path.dirname(HERE), "backend", "utils", "standins.py")
+
+
+@unittest.skipUnless(
+    os.path.exists(BACKEND_STANDINS) and all(importlib.util.find_spec(m) for m in ("uvicorn", "langgraph")),
+    "backend 대역 서버 실행 환경 없음",
+)
+class TestMessageLoadtest(unittest.TestCase):
+    def test_message_step_against_standin_stack(self):
+        # --url 없이 RecSys/backend 대역 서버를 하위 프로세스로 띄워 /message 동시성 1단계
+        proc = subprocess.run(
+            [
+                sys.executable, os.path.join(HERE, "loadtest.py"), "run", "--target", "message",
+                "--concurrency", "1", "--duration", "1", "--warmup", "0", "--cooldown", "0",
+                "--products", "100", "--users", "20",
+            ],
+            cwd=HERE, capture_output=True, text=True, timeout=300,
+        )
+        self.assertEqual(proc.returncode, 0, proc.stderr[-2000:])
+        report = json.loads(proc.stdout)
+        self.assertEqual(report["url"], "stand-in processes")
+        level = report["levels"][0]
+        self.assertGreater(level["completed"], 0)
+        self.assertEqual(level["errors"], 0, level["outcomes"])
+        # 루프 지연은 backend 프로세스의 /stats/event-loop에서 읽음
+        self.assertIsNotNone(level["event_loop_lag"])
+        self.assertGreater(level["event_loop_lag"]["count"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))  # 저장소 루트 (shared/)
+
+from shared.loop_monitor import LoopLagMonitor, percentile
+
+
+class TestLoopLagMonitor(unittest.TestCase):
+    def test_percentile_interpolates(self):
+        self.assertEqual(percentile([], 50), 0.0)
+        self.assertEqual(percentile([1.0, 2.0, 3.0, 4.0], 50), 2.5)
+        self.assertEqual(percentile([1.0, 2.0, 3.0, 4.0], 100), 4.0)
+
+    def test_blocking_call_shows_up_as_lag(self):
+        seen = []
+
+        async def run():
+            monitor = LoopLagMonitor(interval=0.01, on_sample=seen.append)
+            monitor.start()
+            await asyncio.sleep(0.05)
+            time.sleep(0.1)  # 루프를 막는 동기 호출
+            await asyncio.sleep(0.05)
+            monitor.stop()
+            return monitor.stats()
+
+        stats = asyncio.run(run())
+        self.assertEqual(stats["count"], len(seen))
+        self.assertGreaterEqual(stats["max_ms"], 80)
+        self.assertLess(stats["p50_ms"], stats["max_ms"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from metrics import MetricsRegistry, _Metric, request_labels
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_counter_and_gauge_render(self):
+        reg = MetricsRegistry()
+        c = reg.counter("t_requests_total", "Requests.", ("intent",))
+        c.inc(intent="event")
+        c.inc(2, intent="event")
+        g = reg.gauge("t_entries", "Entries.")
+        reg.on_collect(lambda: g.set(7))
+        text = reg.render()
+        self.assertIn("# TYPE t_requests_total counter", text)
+        self.assertIn('t_requests_total{intent="event"} 3', text)
+        self.assertIn("t_entries 7", text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        reg = MetricsRegistry()
+        h = reg.histogram("t_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+        for v in (0.05, 0.5, 3.0):
+            h.observe(v, stage="ce")
+        lines = reg.render().splitlines()
+        self.assertIn('t_seconds_bucket{stage="ce",le="0.1"} 1', lines)
+        self.assertIn('t_seconds_bucket{stage="ce",le="1"} 2', lines)
+        self.assertIn('t_seconds_bucket{stage="ce",le="+Inf"} 3', lines)
+        self.assertIn('t_seconds_count{stage="ce"} 3', lines)
+        self.assertEqual(h.count(stage="ce"), 3)
+
+    def test_request_labels(self):
+        self.assertEqual(request_labels("", None), {"intent": "regular", "brand_filtered": "false"})
+        self.assertEqual(request_labels("event", ["헤라"]), {"intent": "event", "brand_filtered": "true"})
+        self.assertEqual(request_labels("할인행사", None)["intent"], "other")
+
+    def test_metric_base_is_abstract(self):
+        with self.assertRaises(TypeError):
+            _Metric("x", "doc")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import unittest
+
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+from onnx_cross_encoder import OnnxCrossEncoder, check_parity
+
+
+class _Input:
+    def __init__(self, name):
+        self.name = name
+
+
+class _FakeTokenizer:
+    pad_token_id = 1
+
+    def __call__(self, queries, docs, truncation, max_length):
+        ids = [[0] + [5] * len(q) + [2] + [7] * len(d) for q, d in zip(queries, docs)]
+        return {"input_ids": [x[:max_length] for x in ids]}
+
+
+class _FakeSession:
+    """로짓 = 실제 토큰 수 (attention_mask 합) - 패딩 영향이 없는지 확인"""
+
+    def __init__(self):
+        self.shapes = []
+
+    def get_inputs(self):
+        return [_Input("input_ids"), _Input("attention_mask")]
+
+    def run(self, _, feeds):
+        self.shapes.append(feeds["input_ids"].shape)
+        return [feeds["attention_mask"].sum(axis=1, keepdims=True).astype(np.float32) - 10.0]
+
+
+class TestOnnxCrossEncoder(unittest.TestCase):
+    def test_scores_are_sigmoid_in_input_order(self):
+        session = _FakeSession()
+        ce = OnnxCrossEncoder(session, _FakeTokenizer(), buckets=(8, 16, 32), batch_size=2)
+        pairs = [("q", "a" * 20), ("q", "a"), ("qq", "aaaa"), ("q", "a" * 100)]
+        scores = ce.predict(pairs)
+
+        lengths = np.array([23, 4, 8, 32], dtype=np.float32)
+        np.testing.assert_allclose(scores, 1.0 / (1.0 + np.exp(-(lengths - 10.0))), rtol=1e-6)
+        self.assertEqual(session.shapes, [(2, 8), (2, 32)])
+        self.assertEqual(check_parity(ce, ce, pairs), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
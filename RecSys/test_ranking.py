@@ -0,0 +1,80 @@
+import asyncio
+import contextlib
+import io
+import os
+import threading
+import unittest
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+from config import CE_FORWARD_BATCH_SIZE
+import recommendation_model_API as api
+from recommendation_model_API import predict_pairs, rank_candidates
+
+
+def _rank(intent, ce_scores, kwb, discounts, limit=None):
+    prod_map = {i: {"brand": "b", "name": f"p{i}", "discount_rate": d} for i, d in enumerate(discounts)}
+    scored = [(i, "content", s) for i, s in enumerate(ce_scores)]
+    kw_scores = {i: (b, {}) for i, b in enumerate(kwb)}
+    with contextlib.redirect_stdout(io.StringIO()):
+        ranked = rank_candidates({}, intent, scored, prod_map, {}, kw_scores, limit)
+    return [int(r["product_id"]) for r in ranked]
+
+
+class TestRankCandidates(unittest.TestCase):
+    def test_final_score_order_and_limit(self):
+        ce = [0.1, 0.9, 0.5, 0.3]
+        kwb = [0.5, 0.0, 0.0, 0.0]  # 0.1 + 1.2 * 0.5 = 0.7
+        self.assertEqual(_rank("", ce, kwb, [0] * 4), [1, 0, 2, 3])
+        self.assertEqual(_rank("", ce, kwb, [0] * 4, limit=2), [1, 0])
+
+    def test_event_reorders_top5_by_discount(self):
+        ce = [0.9, 0.8, 0.7, 0.6, 0.5, 0.4, 0.3]
+        discounts = [0, 10, None, 30, 10, 50, 0]
+        self.assertEqual(_rank("event", ce, [0] * 7, discounts), [3, 1, 4, 0, 2, 5, 6])
+        # limit이 5보다 작아도 Top 5 전체에서 할인율 우선
+        self.assertEqual(_rank("event", ce, [0] * 7, discounts, limit=1), [3])
+
+    def test_empty(self):
+        self.assertEqual(_rank("", [], [], []), [])
+
+
+class TestPredictPairs(unittest.TestCase):
+    def test_forward_batch_is_capped(self):
+        seen = []
+
+        class _CE:
+            tokenizer = None
+
+            def predict(self, pairs, batch_size):
+                seen.append(batch_size)
+                return [0.0] * len(pairs)
+
+        scores = predict_pairs(_CE(), [("q", f"c{i}") for i in range(2000)])
+        self.assertEqual(len(scores), 2000)
+        self.assertEqual(seen, [CE_FORWARD_BATCH_SIZE])
+
+
+
+class TestLoadCrossEncoder(unittest.TestCase):
+    def test_cold_load_runs_off_the_event_loop(self):
+        threads = []
+
+        def get_cross_encoder():
+            threads.append(threading.current_thread().name)
+            api._cross_encoder_cache = "ce"
+            return "ce"
+
+        with mock.patch.object(api, "_cross_encoder_cache", None), \
+                mock.patch.object(api, "get_cross_encoder", get_cross_encoder):
+            self.assertEqual(asyncio.run(api.load_cross_encoder()), "ce")
+            self.assertEqual(asyncio.run(api.load_cross_encoder()), "ce")  # 로드 후에는 스레드 없이 바로
+        self.assertEqual(len(threads), 1)
+        self.assertNotIn("MainThread", threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
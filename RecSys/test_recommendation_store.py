@@ -0,0 +1,106 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+import recommendation_model_API as api
+from precompute_recommendations import build_jobs, load_persona_brands
+from recommendation_store import RecommendationStore, brands_key, intent_key
+
+
+class TestRecommendationStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.store = RecommendationStore(os.path.join(self.dir.name, "rec.sqlite3"), max_age_sec=60)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_brand_order_does_not_matter(self):
+        self.store.put_many([("u1", "event", ["헤라", "설화수"], [{"product_id": "1"}])])
+        self.assertEqual(self.store.get("u1", "event", ["설화수", "헤라", "헤라"]), [{"product_id": "1"}])
+        self.assertIsNone(self.store.get("u1", "event", []))
+        self.assertIsNone(self.store.get("u1", "", ["헤라", "설화수"]))
+
+    def test_entries_past_staleness_bound_are_misses(self):
+        self.store.put_many([("u1", "", [], [{"product_id": "1"}])])
+        self.assertIsNotNone(self.store.get("u1", "", []))
+        self.assertIsNone(self.store.get("u1", "", [], max_age_sec=-1))
+        self.assertEqual(self.store.stats()["expired"], 1)
+
+        self.store._db.execute("UPDATE precomputed_recommendations SET computed_at = ?", (time.time() - 120,))
+        self.assertIsNone(self.store.get("u1", "", []))
+        self.assertEqual(self.store.purge_older_than(60), 1)
+        self.assertEqual(len(self.store), 0)
+
+    def test_keys(self):
+        self.assertEqual(intent_key("weather", "winter"), "weather:winter")
+        self.assertEqual(intent_key("event", "winter"), "event")
+        self.assertEqual(brands_key([" 헤라", "설화수", ""]), "설화수|헤라")
+
+
+    def test_lookup_runs_off_the_event_loop(self):
+        self.store.put_many([("u1", "event", ["헤라"], [{"product_id": 7}])])
+        threads = []
+        real_get = self.store.get
+
+        def get(*args):
+            threads.append(threading.current_thread().name)
+            return real_get(*args)
+
+        with mock.patch.object(api, "get_recommendation_store", lambda: self.store), \
+                mock.patch.object(self.store, "get", get):
+            found = asyncio.run(api.lookup_precomputed_many([("u1", "event", ["헤라"]), ("u2", "", [])]))
+        self.assertEqual(found, [{"product_id": 7}, None])
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn("MainThread", threads)
+
+    def test_metrics_count_rows_off_the_event_loop(self):
+        self.store.put_many([("u1", "event", [], [{"product_id": 7}]), ("u2", "", [], [{"product_id": 8}])])
+        threads = []
+        real_len = RecommendationStore.__len__
+
+        def count(store):
+            threads.append(threading.current_thread().name)
+            return real_len(store)
+
+        with mock.patch.object(api, "get_recommendation_store", lambda: self.store), \
+                mock.patch.object(RecommendationStore, "__len__", count):
+            asyncio.run(api.collect_precomputed_metrics())
+            rendered = api.registry.render()
+        self.assertEqual(len(threads), 1)
+        self.assertNotIn("MainThread", threads)
+        self.assertIn('recsys_cache_entries{cache="precomputed"} 2', rendered)
+
+
+class TestBuildJobs(unittest.TestCase):
+    def test_persona_brands_follow_customers_persona_id(self):
+        customers = [{"user_id": "u1", "persona_id": "1"}, {"user_id": "u2", "persona_id": None}]
+        jobs = build_jobs(customers, {"1": ["설화수", "헤라"]}, intents=[""])
+        self.assertEqual(
+            [(j["user_id"], j["target_brands"]) for j in jobs],
+            [("u1", []), ("u1", ["설화수", "헤라"]), ("u2", [])],
+        )
+
+    def test_persona_file_is_explicit(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(load_persona_brands(""), {})  # 기본값은 backend 트리를 읽지 않음
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "personas.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"P2": {"recommended_brands": ["헤라"]}}, f)
+            self.assertEqual(load_persona_brands(path), {"2": ["헤라"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import asyncio
+import os
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+import recommendation_model_API as api
+from singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.calls = 0
+
+    async def compute(self, value="ok"):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return value
+
+    async def test_concurrent_calls_share_one_execution(self):
+        sf = SingleFlight()
+        results = await asyncio.gather(*(sf.do("k", self.compute) for _ in range(5)))
+        self.assertEqual(results, ["ok"] * 5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(sf), 0)
+
+        stats = sf.stats()
+        self.assertEqual((stats["leaders"], stats["coalesced"], stats["max_waiters"]), (1, 4, 5))
+        self.assertEqual(stats["coalesced_ratio"], 0.8)
+
+        # 완료 후에는 다시 계산, 다른 키는 합치지 않음
+        await asyncio.gather(sf.do("k", self.compute), sf.do("other", self.compute))
+        self.assertEqual(self.calls, 3)
+
+    async def test_exception_reaches_every_waiter(self):
+        sf = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(sf.do("k", fail), sf.do("k", fail), return_exceptions=True)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertNotIn("k", sf)
+
+    async def test_leader_cancel_does_not_cancel_followers(self):
+        sf = SingleFlight()
+        leader = asyncio.ensure_future(sf.do("k", self.compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(sf.do("k", self.compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        self.assertEqual(await follower, "ok")
+        self.assertEqual(self.calls, 1)
+
+
+class TestGetRecommendationCoalescing(unittest.IsolatedAsyncioTestCase):
+    async def test_identical_requests_run_pipeline_once(self):
+        calls = []
+
+        async def fake_recommend(user_id, user_data, target_brands, top_k, intent):
+            calls.append((user_id, tuple(target_brands), intent))
+            await asyncio.sleep(0.01)
+            return None
+
+        def req(user_id, brands, intention="event"):
+            return SimpleNamespace(user_id=user_id, target_brand=brands, intention=intention)
+
+        with mock.patch.object(api, "recommend_product_with_brands", fake_recommend), \
+                mock.patch.object(api, "lookup_precomputed", mock.AsyncMock(return_value=None)), \
+                mock.patch.object(api, "_recommend_flight", SingleFlight()), \
+                mock.patch.object(api, "SINGLEFLIGHT_ENABLED", True):
+            results = await asyncio.gather(
+                api.get_recommendation(req("u1", ["헤라", "설화수"])),
+                api.get_recommendation(req("u1", ["설화수", "헤라"])),
+                api.get_recommendation(req("u1", ["헤라"])),
+                api.get_recommendation(req("u2", ["헤라", "설화수"])),
+            )
+            stats = api.get_singleflight_stats()
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual((stats["leaders"], stats["coalesced"]), (3, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
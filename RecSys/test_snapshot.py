@@ -0,0 +1,125 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+import numpy as np
+
+import snapshot
+import vector_index
+from catalog import ProductCatalog
+from config import EMBED_DIM
+from snapshot import open_snapshot, read_current, write_snapshot
+from vector_index import ProductVectorIndex
+
+
+def _catalog() -> ProductCatalog:
+    catalog = ProductCatalog()
+    catalog.apply_products([
+        {"id": 30, "brand": "헤라", "name": "쿠션", "price_final": 30000, "discount_rate": None, "updated_at": "1"},
+        {"id": 10, "brand": "설화수", "name": "윤조에센스", "review_score": 4.8, "updated_at": "2"},
+    ])
+    catalog.apply_vectors([{"product_id": 10, "content": "보습 에센스"}, {"product_id": 30, "content": ""}])
+    catalog.apply_products([{"id": 30, "brand": "헤라", "name": "블랙 쿠션", "updated_at": "3"}])
+    return catalog
+
+
+def _index(n: int = 600) -> ProductVectorIndex:
+    vecs = np.random.default_rng(0).normal(size=(n, EMBED_DIM)).astype(np.float32)
+    rows = [(i + 1, ("헤라", "라네즈")[i % 2], vecs[i]) for i in range(n)]
+    original = vector_index.ANN_MIN_IVF_SIZE
+    vector_index.ANN_MIN_IVF_SIZE = 256
+    try:
+        return ProductVectorIndex(nprobe=4, dtype="int8", dim=256, full_path=None).build(rows)
+    finally:
+        vector_index.ANN_MIN_IVF_SIZE = original
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.root = self._dir.name
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_catalog_round_trip_is_read_only_mmap(self):
+        catalog = _catalog()
+        write_snapshot(self.root, {"catalog": (*catalog.to_arrays(), catalog.version)})
+        snap = open_snapshot(self.root)
+        restored = snap.catalog
+
+        self.assertEqual(snap.manifest["catalog_version"], catalog.version)
+        self.assertIsInstance(restored.ids, np.memmap)
+        self.assertEqual(len(restored), 2)
+        for pid in (10, 30):
+            self.assertEqual(restored.get_detail(pid), catalog.get_detail(pid))
+            self.assertEqual(restored.get_content(pid), catalog.get_content(pid))
+        self.assertEqual(restored.get_detail(30)["name"], "블랙 쿠션")
+        self.assertIsNone(restored.get_detail(20))
+        self.assertIsNone(restored.get_detail("10"))
+        self.assertEqual(restored.lookup([10, 99])[2], [99])
+        with self.assertRaises(RuntimeError):
+            restored.apply_products([{"id": 40}])
+
+    def test_index_round_trip_matches_search(self):
+        index = _index()
+        write_snapshot(self.root, {"index": (*index.to_arrays(), str(index.built_at))})
+        restored = open_snapshot(self.root).index
+
+        self.assertIsNotNone(restored._partitions[ProductVectorIndex.ALL].centroids)
+        q = np.random.default_rng(1).normal(size=EMBED_DIM)
+        self.assertEqual(restored.search(q, 10), index.search(q, 10))
+        self.assertEqual(restored.search(q, 5, brands=["라네즈"]), index.search(q, 5, brands=["라네즈"]))
+
+    def test_unchanged_section_is_linked_and_old_snapshots_removed(self):
+        catalog = _catalog()
+        first = write_snapshot(self.root, {"catalog": (*catalog.to_arrays(), catalog.version)}, keep=2)
+        index = _index(50)
+        second = write_snapshot(self.root, {"index": (*index.to_arrays(), "v1")}, keep=2)
+        self.assertEqual(read_current(self.root), second)
+
+        snap = open_snapshot(self.root)
+        self.assertEqual(sorted(snap.manifest["sections"]), ["catalog", "index"])
+        self.assertEqual(snap.catalog.get_content(10), "보습 에센스")
+        ids_file = snap.manifest["sections"]["catalog"]["files"]["ids"]["file"]
+        self.assertEqual(
+            os.stat(os.path.join(self.root, first, ids_file)).st_ino,
+            os.stat(os.path.join(self.root, second, ids_file)).st_ino,
+        )
+
+        third = write_snapshot(self.root, {"index": (*index.to_arrays(), "v2")}, keep=2)
+        self.assertFalse(os.path.exists(os.path.join(self.root, first)))
+        # 이전 스냅샷을 열어 둔 워커는 파일이 지워져도 계속 읽을 수 있음
+        self.assertEqual(snap.catalog.get_content(10), "보습 에센스")
+        self.assertEqual(open_snapshot(self.root).name, third)
+
+
+
+class TestFollowerFallback(unittest.TestCase):
+    def test_request_path_does_not_wait_for_first_snapshot(self):
+        with tempfile.TemporaryDirectory() as root, \
+                mock.patch.object(snapshot, "SNAPSHOT_DIR", root), \
+                mock.patch.object(snapshot, "_try_lead", lambda *a: False), \
+                mock.patch.object(snapshot, "_snapshot", None), \
+                mock.patch.object(snapshot, "_checked_at", 0.0), \
+                mock.patch.object(snapshot, "_wait_deadline", None):
+            started = time.time()
+            self.assertIsNone(asyncio.run(snapshot.get_shared_product_index(None)))
+            self.assertLess(time.time() - started, 0.4)
+
+            # startup(wait=True)은 첫 발행을 기다림
+            snapshot._wait_deadline = time.time() + 0.6
+            started = time.time()
+            self.assertIsNone(asyncio.run(snapshot.get_shared_product_index(None, wait=True)))
+            self.assertGreaterEqual(time.time() - started, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
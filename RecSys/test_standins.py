@@ -0,0 +1,77 @@
+import asyncio
+import os
+import unittest
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+import catalog
+import recommendation_model_API as api
+import vector_index
+from catalog import fetch_all_rows
+from standins import FakeCrossEncoder, FakeSupabase, SyntheticCatalog, install
+
+# install()이 교체하는 전역 상태 (테스트 후 복원)
+_PATCHED = [
+    (api, "_async_supabase"), (api, "_async_openai"), (api, "_embedding_provider"), (api, "_cross_encoder_cache"),
+    (api, "_embedding_cache"), (api, "_ce_score_cache"), (api, "_result_cache"), (api, "PRECOMPUTE_ENABLED"),
+    (catalog, "SNAPSHOT_ENABLED"), (catalog, "_catalog"), (catalog, "_catalog_task"), (catalog, "_catalog_retry_at"),
+    (vector_index, "SNAPSHOT_ENABLED"), (vector_index, "_product_index_cache"), (vector_index, "_index_build_task"),
+    (vector_index, "_index_retry_at"), (vector_index, "VECTOR_FULL_PATH"),
+]
+
+
+class TestStandins(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data = SyntheticCatalog(300, 20, seed=3)
+
+    def test_generator_is_deterministic(self):
+        again = SyntheticCatalog(300, 20, seed=3)
+        self.assertEqual(again.products[:5], self.data.products[:5])
+        self.assertEqual(again.customers, self.data.customers)
+        self.assertEqual(len(self.data.product_vectors), 300)
+        self.assertEqual(self.data.embed("보습 크림"), self.data.embed("보습 크림"))
+
+    def test_table_queries(self):
+        sb = FakeSupabase(self.data)
+        rows = asyncio.run(fetch_all_rows(sb, "products", "id, brand"))
+        self.assertEqual([r["id"] for r in rows], list(range(1, 301)))
+        self.assertEqual(set(rows[0]), {"id", "brand"})
+
+        since = self.data.products[249]["updated_at"]
+        newer = asyncio.run(fetch_all_rows(sb, "products", "id", since=since))
+        self.assertEqual([r["id"] for r in newer], list(range(250, 301)))  # 워터마크 시각 포함 (gte)
+
+        resp = asyncio.run(sb.table("customers").select("user_id").in_("user_id", ["user_000002", "nobody"]).execute())
+        self.assertEqual(resp.data, [{"user_id": "user_000002"}])
+
+    def test_match_filters_brands(self):
+        brand = self.data.brands[0]
+        matches = self.data.match(self.data.embed("수분 보습"), 10, [brand])
+        by_id = {p["id"]: p for p in self.data.products}
+        self.assertTrue(all(by_id[m["product_id"]]["brand"] == brand for m in matches))
+        sims = [m["similarity"] for m in matches]
+        self.assertEqual(sims, sorted(sims, reverse=True))
+
+    def test_pipeline_runs_end_to_end(self):
+        saved = [(mod, name, getattr(mod, name)) for mod, name in _PATCHED]
+        try:
+            ce = FakeCrossEncoder()
+            sb, oa = install(self.data, cross_encoder=ce)
+            brand = self.data.brands[1]
+            result = asyncio.run(
+                api.recommend_product_with_brands("user_000001", None, target_brands=[brand], top_k=3)
+            )
+        finally:
+            for mod, name, value in saved:
+                setattr(mod, name, value)
+        self.assertEqual(len(result), 3)
+        self.assertTrue(all(r["brand"] == brand for r in result))
+        self.assertGreater(ce.pairs, 0)
+        self.assertEqual(oa.embeddings.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+import numpy as np
+
+import vector_index
+from config import EMBED_DIM
+from vector_index import ProductVectorIndex, parse_embedding
+
+
+def _random_rows(n: int, brands, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vecs = rng.normal(size=(n, EMBED_DIM)).astype(np.float32)
+    return [(i + 1, brands[i % len(brands)], vecs[i]) for i in range(n)], vecs
+
+
+def _exact_index(**kwargs) -> ProductVectorIndex:
+    """압축/절단 없는 float32 인덱스 (전수 탐색 결과가 정확해야 하는 테스트용)"""
+    return ProductVectorIndex(dtype="float32", dim=EMBED_DIM, full_path=None, **kwargs)
+
+
+def _exact_top(vecs, ids_brands, q, k, brands=None):
+    vn = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+    sims = vn @ (q / np.linalg.norm(q))
+    order = [i for i in np.argsort(-sims) if brands is None or ids_brands[i][1] in brands]
+    return [ids_brands[i][0] for i in order[:k]]
+
+
+class TestProductVectorIndex(unittest.TestCase):
+    def test_parse_embedding_pgvector_string(self):
+        emb = parse_embedding("[" + ",".join(["0.5"] * EMBED_DIM) + "]")
+        self.assertEqual(emb.shape, (EMBED_DIM,))
+        self.assertIsNone(parse_embedding("[1,2,3]"))
+        self.assertIsNone(parse_embedding(None))
+
+    def test_exact_search_matches_brute_force(self):
+        rows, vecs = _random_rows(300, ["설화수", "헤라", "라네즈"])
+        index = _exact_index().build(rows)
+        q = np.random.default_rng(1).normal(size=EMBED_DIM)
+
+        got = [m["product_id"] for m in index.search(q, 10)]
+        self.assertEqual(got, _exact_top(vecs, rows, q, 10))
+
+    def test_brand_filter_is_partition_lookup(self):
+        rows, vecs = _random_rows(300, ["설화수", "헤라", "라네즈"])
+        index = _exact_index().build(rows)
+        q = np.random.default_rng(2).normal(size=EMBED_DIM)
+
+        matches = index.search(q, 30, brands=["헤라", "라네즈"])
+        got = [m["product_id"] for m in matches]
+        self.assertEqual(got, _exact_top(vecs, rows, q, 30, brands={"헤라", "라네즈"}))
+        sims = [m["similarity"] for m in matches]
+        self.assertEqual(sims, sorted(sims, reverse=True))
+        self.assertEqual(index.search(q, 5, brands=["없는브랜드"]), [])
+
+    def test_ivf_partition_recall(self):
+        original = vector_index.ANN_MIN_IVF_SIZE
+        vector_index.ANN_MIN_IVF_SIZE = 256
+        try:
+            rows, vecs = _random_rows(1024, ["A"])
+            index = _exact_index(nprobe=32).build(rows)
+        finally:
+            vector_index.ANN_MIN_IVF_SIZE = original
+        self.assertIsNotNone(index._partitions[ProductVectorIndex.ALL].centroids)
+
+        q = vecs[17] + 0.01
+        got = [m["product_id"] for m in index.search(q, 5)]
+        self.assertEqual(got[0], 18)
+
+    def test_int8_store_rescored_to_exact_similarity(self):
+        rows, vecs = _random_rows(300, ["설화수", "헤라"])
+        index = ProductVectorIndex(dtype="int8", dim=EMBED_DIM, rescore=True, full_path=None).build(rows)
+        q = np.random.default_rng(3).normal(size=EMBED_DIM)
+
+        matches = index.search(q, 10)
+        self.assertEqual([m["product_id"] for m in matches], _exact_top(vecs, rows, q, 10))
+        vn = vecs[matches[0]["product_id"] - 1]
+        expected = float(vn @ q / np.linalg.norm(vn) / np.linalg.norm(q))
+        self.assertAlmostEqual(matches[0]["similarity"], expected, places=5)
+
+
+
+class TestLocalIndexCache(unittest.TestCase):
+    def test_requests_fall_back_while_building_and_back_off_after_failure(self):
+        loads = []
+
+        async def failing_load(sb):
+            loads.append(sb)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("products_vector unavailable")
+
+        async def run():
+            # 요청 경로: 구성을 기다리지 않고 바로 None (RPC 폴백)
+            self.assertIsNone(await vector_index.get_local_product_index("sb"))
+            await vector_index._index_build_task
+            # 실패 후 재시도 간격 안에서는 새 구성을 시작하지 않음 (startup wait=True도 동일)
+            self.assertIsNone(await vector_index.get_local_product_index("sb"))
+            self.assertIsNone(await vector_index.get_local_product_index("sb", wait=True))
+            self.assertEqual(len(loads), 1)
+            vector_index._index_retry_at = 0.0
+            self.assertIsNone(await vector_index.get_local_product_index("sb", wait=True))
+            self.assertEqual(len(loads), 2)
+
+        with mock.patch.object(vector_index, "load_product_index", failing_load), \
+                mock.patch.object(vector_index, "_product_index_cache", None), \
+                mock.patch.object(vector_index, "_index_build_task", None), \
+                mock.patch.object(vector_index, "_index_retry_at", 0.0):
+            asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+import numpy as np
+
+from vector_store import QuantizedVectorStore, build_vector_store, normalize, save_full_vectors
+
+
+def _vectors(n: int = 200, dim: int = 64, seed: int = 0) -> np.ndarray:
+    return normalize(np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32))
+
+
+class TestQuantizedVectorStore(unittest.TestCase):
+    def test_int8_truncated_store_is_compact(self):
+        vecs = _vectors()
+        store = QuantizedVectorStore(vecs, "int8", 32)
+        self.assertEqual(store.codes.dtype, np.int8)
+        self.assertEqual(store.codes.shape, (200, 32))
+        self.assertEqual(store.nbytes, 200 * 32 + 200 * 4)
+        # 절단 후 재정규화 → 복원 벡터는 거의 단위 벡터
+        np.testing.assert_allclose(np.linalg.norm(store.decode(), axis=1), 1.0, atol=0.02)
+
+    def test_approximate_scores_track_exact(self):
+        vecs = _vectors()
+        q = normalize(np.random.default_rng(1).normal(size=64).astype(np.float32))
+        rows = np.arange(len(vecs))
+        for dtype in ("float16", "int8"):
+            store = QuantizedVectorStore(vecs, dtype, 64)
+            np.testing.assert_allclose(store.scores(rows, store.prepare_query(q)), vecs @ q, atol=0.02)
+
+    def test_rescore_returns_exact_order_and_similarity(self):
+        vecs = _vectors()
+        q = normalize(np.random.default_rng(2).normal(size=64).astype(np.float32))
+        store = QuantizedVectorStore(vecs, "int8", 16, full=vecs)
+        rows = np.arange(50, 200)
+
+        top, sims = store.search_rows(rows, q, 5, rescore_factor=30)
+        expected = np.argsort(-(vecs[rows] @ q))[:5]
+        self.assertEqual(list(top), list(expected))
+        np.testing.assert_allclose(sims, vecs[rows[expected]] @ q, rtol=1e-5)
+
+    def test_full_vectors_are_memory_mapped(self):
+        vecs = _vectors(20)
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "full.npy")
+            full = save_full_vectors(vecs, path)
+            self.assertIsInstance(full, np.memmap)
+            np.testing.assert_array_equal(np.asarray(full), vecs)
+            store = build_vector_store(vecs, "int8", 16, rescore=True, full_path=path)
+            self.assertIsInstance(store.full, np.memmap)
+            del full, store
+
+    def test_lossless_store_skips_rescoring(self):
+        store = build_vector_store(_vectors(), "float32", 64, rescore=True, full_path=None)
+        self.assertIsNone(store.full)
+        with self.assertRaises(ValueError):
+            QuantizedVectorStore(_vectors(), "int4")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,336 @@
+"""
+products_vector 임베딩 인메모리 ANN 인덱스
+브랜드별 파티션 + IVF(Inverted File) 근사 최근접 탐색으로 match_products RPC 왕복을 대체
+벡터는 QuantizedVectorStore(vector_store.py)에 압축 저장 - 근사 탐색 후 상위 후보만 원본으로 재채점
+"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import (
+    PRODUCT_VECTOR_FK_COL, EMBED_MODEL, EMBED_DIM, EMBED_VECTOR_COL, SNAPSHOT_ENABLED,
+    ANN_NPROBE, ANN_MIN_IVF_SIZE, ANN_KMEANS_ITERS, ANN_INDEX_TTL_SEC, ANN_INDEX_RETRY_SEC,
+    VECTOR_STORE_DTYPE, VECTOR_STORE_DIM, VECTOR_RESCORE_ENABLED, VECTOR_FULL_PATH,
+)
+from catalog import fetch_all_rows
+from shared.applog import get_logger
+from vector_store import QuantizedVectorStore, build_vector_store
+
+log = get_logger("recsys.ann")
+
+
+def parse_embedding(value: Any) -> Optional[np.ndarray]:
+    """pgvector 컬럼 값("[0.1,0.2,...]" 문자열 또는 리스트)을 float32 벡터로 변환"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    vec = np.asarray(value, dtype=np.float32)
+    if vec.ndim != 1 or vec.shape[0] != EMBED_DIM:
+        return None
+    return vec
+
+
+def _normalize(mat: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (코사인 유사도 = 내적)"""
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def _kmeans(vectors: np.ndarray, nlist: int, iters: int, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """구면 k-means (정규화 벡터 기준) - (centroids, assignments) 반환"""
+    rng = np.random.default_rng(seed)
+    init = rng.choice(vectors.shape[0], size=nlist, replace=False)
+    centroids = vectors[init].copy()
+    assign = np.zeros(vectors.shape[0], dtype=np.int32)
+    for _ in range(iters):
+        assign = np.argmax(vectors @ centroids.T, axis=1).astype(np.int32)
+        for c in range(nlist):
+            members = vectors[assign == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+    return centroids, assign
+
+
+class _Partition:
+    """
+    하나의 검색 단위(브랜드 또는 전체)
+    rows: 공유 저장소(ProductVectorIndex._store)의 행 번호
+    vectors: IVF 학습용 행렬 (압축 공간, 구성 후 버림)
+    크기가 작으면 전수 탐색, 크면 IVF 리스트를 구성해 nprobe개 리스트만 탐색
+    """
+
+    def __init__(self, rows: np.ndarray, vectors: np.ndarray, iters: int):
+        self.rows = rows
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[np.ndarray] = []
+        if len(rows) >= ANN_MIN_IVF_SIZE:
+            nlist = max(1, int(np.sqrt(len(rows))))
+            self.centroids, assign = _kmeans(vectors[rows], nlist, iters)
+            self.lists = [rows[assign == c] for c in range(nlist)]
+
+    @classmethod
+    def restore(cls, rows: np.ndarray, centroids: Optional[np.ndarray], lists: List[np.ndarray]) -> "_Partition":
+        """스냅샷 배열로 복원 (k-means 재학습 없음)"""
+        part = cls.__new__(cls)
+        part.rows = rows
+        part.centroids = centroids
+        part.lists = lists
+        return part
+
+    def probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """질의 벡터와 가까운 IVF 리스트의 행 번호 반환 (전수 탐색이면 전체 행)"""
+        if self.centroids is None:
+            return self.rows
+        nprobe = min(nprobe, len(self.lists))
+        near = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self.lists[c] for c in near])
+
+
+class ProductVectorIndex:
+    """브랜드 파티션 IVF 인덱스 - filter_brands는 파티션 조회로 처리"""
+
+    ALL = None  # 브랜드 미지정 검색용 파티션 키
+
+    def __init__(
+        self,
+        nprobe: int = ANN_NPROBE,
+        kmeans_iters: int = ANN_KMEANS_ITERS,
+        dtype: str = VECTOR_STORE_DTYPE,
+        dim: int = VECTOR_STORE_DIM,
+        rescore: bool = VECTOR_RESCORE_ENABLED,
+        full_path: Optional[str] = VECTOR_FULL_PATH,
+    ):
+        self.nprobe = nprobe
+        self.kmeans_iters = kmeans_iters
+        self.store_options = {"dtype": dtype, "dim": dim, "rescore": rescore, "full_path": full_path}
+        self._ids: np.ndarray = np.zeros(0, dtype=np.int64)
+        self._store: Optional[QuantizedVectorStore] = None
+        self._partitions: Dict[Optional[str], _Partition] = {}
+        self.built_at: float = 0.0
+
+    def __len__(self) -> int:
+        return int(self._ids.shape[0])
+
+    @property
+    def brands(self) -> List[str]:
+        return [b for b in self._partitions if b is not self.ALL]
+
+    def build(self, rows: Iterable[Tuple[Any, Optional[str], np.ndarray]]) -> "ProductVectorIndex":
+        """(product_id, brand, embedding) 목록으로 인덱스 구성"""
+        ids, brands, vecs = [], [], []
+        for pid, brand, emb in rows:
+            ids.append(pid)
+            brands.append(brand)
+            vecs.append(emb)
+
+        self._ids = np.asarray(ids, dtype=np.int64)
+        if not vecs:
+            self._store, self._partitions = None, {}
+            self.built_at = time.time()
+            return self
+        self._store = build_vector_store(np.vstack(vecs), **self.store_options)
+        # IVF는 압축 공간(절단 차원)에서 학습/탐색
+        train = self._store.decode()
+
+        by_brand: Dict[str, List[int]] = {}
+        for row, brand in enumerate(brands):
+            if brand:
+                by_brand.setdefault(brand, []).append(row)
+
+        all_rows = np.arange(len(ids), dtype=np.int64)
+        self._partitions = {self.ALL: _Partition(all_rows, train, self.kmeans_iters)}
+        for brand, rs in by_brand.items():
+            self._partitions[brand] = _Partition(np.asarray(rs, dtype=np.int64), train, self.kmeans_iters)
+
+        self.built_at = time.time()
+        return self
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        스냅샷 저장용 배열 + 메타
+        파티션 행은 part_rows 하나로 이어 붙이고, IVF 파티션은 리스트 순서로 정렬해 list_offsets로 경계 표시
+        """
+        store = self._store
+        arrays: Dict[str, np.ndarray] = {"ids": self._ids}
+        if store is not None:
+            arrays["codes"] = store.codes
+            if store.scales is not None:
+                arrays["scales"] = store.scales
+            if store.full is not None:
+                arrays["full"] = store.full
+        part_rows: List[np.ndarray] = []
+        centroids: List[np.ndarray] = []
+        list_offsets: List[np.ndarray] = []
+        partitions: List[Dict[str, Any]] = []
+        n_rows = n_centroids = n_offsets = 0
+        for brand, part in self._partitions.items():
+            entry: Dict[str, Any] = {"brand": brand}
+            if part.centroids is None:
+                rows = part.rows
+            else:
+                rows = np.concatenate(part.lists)
+                bounds = np.cumsum([0] + [len(l) for l in part.lists]).astype(np.int64)
+                entry["centroids"] = [n_centroids, n_centroids + len(part.centroids)]
+                entry["lists"] = [n_offsets, n_offsets + len(bounds)]
+                centroids.append(part.centroids)
+                list_offsets.append(bounds)
+                n_centroids += len(part.centroids)
+                n_offsets += len(bounds)
+            entry["rows"] = [n_rows, n_rows + len(rows)]
+            part_rows.append(rows)
+            n_rows += len(rows)
+            partitions.append(entry)
+        dim = store.dim if store is not None else EMBED_DIM
+        arrays["part_rows"] = np.concatenate(part_rows) if part_rows else np.zeros(0, dtype=np.int64)
+        arrays["part_centroids"] = (
+            np.vstack(centroids).astype(np.float32) if centroids else np.zeros((0, dim), dtype=np.float32)
+        )
+        arrays["part_list_offsets"] = np.concatenate(list_offsets) if list_offsets else np.zeros(0, dtype=np.int64)
+        meta = {
+            "embed_model": EMBED_MODEL,
+            "dtype": store.dtype if store is not None else None,
+            "nprobe": self.nprobe,
+            "kmeans_iters": self.kmeans_iters,
+            "built_at": self.built_at,
+            "partitions": partitions,
+        }
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> "ProductVectorIndex":
+        """to_arrays 결과(스냅샷 mmap 배열)로 복원 - 배열은 복사하지 않음"""
+        index = cls(nprobe=meta["nprobe"], kmeans_iters=meta["kmeans_iters"], full_path=None)
+        index._ids = arrays["ids"]
+        if "codes" in arrays:
+            index._store = QuantizedVectorStore.from_arrays(
+                arrays["codes"], arrays.get("scales"), meta["dtype"], arrays.get("full"),
+            )
+        rows, centroids, offsets = arrays["part_rows"], arrays["part_centroids"], arrays["part_list_offsets"]
+        for entry in meta["partitions"]:
+            part_rows = rows[entry["rows"][0]:entry["rows"][1]]
+            if "centroids" in entry:
+                bounds = offsets[entry["lists"][0]:entry["lists"][1]]
+                lists = [part_rows[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+                part = _Partition.restore(part_rows, centroids[entry["centroids"][0]:entry["centroids"][1]], lists)
+            else:
+                part = _Partition.restore(part_rows, None, [])
+            index._partitions[entry["brand"]] = part
+        index.built_at = meta["built_at"]
+        return index
+
+    def search(
+        self,
+        query_emb: Sequence[float],
+        k: int,
+        brands: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        match_products RPC와 동일한 형태([{product_id, similarity}])로 상위 k개 반환
+        brands가 주어지면 해당 브랜드 파티션만 탐색
+        재채점 사용 시 similarity는 원본 벡터 기준 (RPC 값과 동일)
+        """
+        if not len(self) or k <= 0 or self._store is None:
+            return []
+        q = _normalize(np.asarray(query_emb, dtype=np.float32))
+        q_probe = self._store.prepare_query(q)
+
+        if brands:
+            parts = [self._partitions[b] for b in dict.fromkeys(brands) if b in self._partitions]
+        else:
+            parts = [self._partitions[self.ALL]]
+        if not parts:
+            return []
+
+        rows = np.concatenate([p.probe(q_probe, self.nprobe) for p in parts])
+        if not len(rows):
+            return []
+        top, sims = self._store.search_rows(rows, q, k)
+        return [
+            {"product_id": int(self._ids[rows[i]]), "similarity": float(s)}
+            for i, s in zip(top, sims)
+        ]
+
+
+async def load_product_index(sb) -> ProductVectorIndex:
+    """Supabase에서 products_vector 임베딩 + products 브랜드를 읽어 인덱스 구성"""
+    started = time.time()
+    products, pv_rows = await asyncio.gather(
+        fetch_all_rows(sb, "products", "id, brand"),
+        fetch_all_rows(
+            sb, "products_vector", f"{PRODUCT_VECTOR_FK_COL}, {EMBED_VECTOR_COL}", key_col=PRODUCT_VECTOR_FK_COL
+        ),
+    )
+    brand_map = {p["id"]: p.get("brand") for p in products}
+
+    rows = []
+    for r in pv_rows:
+        emb = parse_embedding(r.get(EMBED_VECTOR_COL))
+        if emb is None:
+            continue
+        pid = r[PRODUCT_VECTOR_FK_COL]
+        rows.append((pid, brand_map.get(pid), emb))
+
+    # k-means 구성은 CPU 작업이므로 이벤트 루프 밖에서 실행
+    index = await asyncio.to_thread(ProductVectorIndex(full_path=VECTOR_FULL_PATH).build, rows)
+    store = index._store
+    log.info(
+        "ann_index_built", vectors=len(index), brands=len(index.brands),
+        dtype=str(store.dtype) if store else None, dim=store.dim if store else None,
+        resident_mb=round((store.nbytes if store else 0) / 1e6, 1), sec=round(time.time() - started, 2),
+    )
+    return index
+
+
+# 인덱스 캐싱 (TTL 경과 시 백그라운드 재구성, 재구성 중에는 기존 인덱스로 응답)
+_product_index_cache: Optional[ProductVectorIndex] = None
+_index_build_task: Optional["asyncio.Task"] = None
+_index_retry_at = 0.0  # 구성 실패 후 이 시각까지 새로 시도하지 않음
+
+
+async def _rebuild_index(sb) -> Optional[ProductVectorIndex]:
+    global _product_index_cache, _index_retry_at
+    try:
+        _product_index_cache = await load_product_index(sb)
+    except Exception as e:
+        _index_retry_at = time.time() + ANN_INDEX_RETRY_SEC
+        log.warning("ann_index_load_failed", fallback="rpc", retry_sec=ANN_INDEX_RETRY_SEC, error=str(e))
+    return _product_index_cache
+
+
+async def get_product_index(sb, wait: bool = False) -> Optional[ProductVectorIndex]:
+    """
+    캐시된 인덱스 반환 - 구성 전/실패 시 None (호출 측은 RPC로 폴백)
+    wait: 첫 인덱스(또는 첫 스냅샷)가 준비될 때까지 기다릴지 (startup만 True)
+    """
+    if SNAPSHOT_ENABLED:
+        from snapshot import get_shared_product_index  # snapshot이 이 모듈을 import (순환 방지)
+        return await get_shared_product_index(sb, wait)
+    return await get_local_product_index(sb, wait)
+
+
+async def get_local_product_index(sb, wait: bool = False) -> Optional[ProductVectorIndex]:
+    """
+    이 프로세스가 직접 구성한 인덱스 (TTL 경과 시 백그라운드 재구성)
+    아직 없으면 백그라운드 구성만 시작하고 None → 요청은 구성을 기다리지 않고 RPC로 폴백
+    """
+    global _index_build_task
+    idx = _product_index_cache
+    if idx is not None and time.time() - idx.built_at < ANN_INDEX_TTL_SEC:
+        return idx
+    if time.time() < _index_retry_at:
+        # 직전 구성이 실패 → 요청마다 전체 로드 + k-means를 다시 시작하지 않음
+        return idx
+    if _index_build_task is None or _index_build_task.done():
+        _index_build_task = asyncio.create_task(_rebuild_index(sb))
+    if idx is not None or not wait:
+        return idx
+    return await asyncio.shield(_index_build_task)
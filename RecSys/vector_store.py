@@ -0,0 +1,187 @@
+"""
+제품 임베딩 압축 저장소 (ANN 인덱스용)
+- Matryoshka 절단: text-embedding-3-small은 앞쪽 차원만 잘라 재정규화해도 검색 품질이 유지됨 (dimensions 파라미터와 동일)
+- 스칼라 양자화: float16 또는 int8 (행별 scale, 대칭 양자화)
+- 재채점: 근사 점수 상위 후보만 원본 float32 벡터로 다시 계산 (원본은 디스크 파일을 mmap → 워커 간 페이지 캐시 공유)
+
+1536차원 float32 = 6KB/제품 → 512차원 int8 = 0.5KB/제품 (+ scale 4B)
+"""
+import os
+import tempfile
+from typing import Optional, Tuple
+
+import numpy as np
+
+from config import (
+    EMBED_DIM, VECTOR_STORE_DTYPE, VECTOR_STORE_DIM, VECTOR_RESCORE_ENABLED, VECTOR_RESCORE_FACTOR,
+    VECTOR_FULL_PATH,
+)
+from shared.applog import get_logger
+
+log = get_logger("recsys.vector_store")
+
+DTYPES = ("float32", "float16", "int8")
+
+
+def normalize(mat: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (코사인 유사도 = 내적)"""
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def truncate(mat: np.ndarray, dim: int) -> np.ndarray:
+    """Matryoshka 절단 후 재정규화"""
+    if dim >= mat.shape[-1]:
+        return mat
+    return normalize(np.ascontiguousarray(mat[..., :dim], dtype=np.float32))
+
+
+def quantize_int8(mat: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """행별 대칭 int8 양자화 - (codes, scales), 원본 ≈ codes * scale"""
+    scales = np.abs(mat).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(mat / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def save_full_vectors(vectors: np.ndarray, path: str) -> np.ndarray:
+    """원본 float32 벡터를 .npy로 저장 후 읽기 전용 mmap으로 반환 (임시 파일 → rename으로 원자적 교체)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".npy.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return np.load(path, mmap_mode="r")
+
+
+class QuantizedVectorStore:
+    """
+    정규화된 임베딩 행렬의 압축본 + (선택) 재채점용 원본
+    scores(rows, q): 압축 벡터로 근사 코사인 유사도
+    rescore(rows, q): 원본 벡터로 정확한 코사인 유사도 (full이 없으면 None)
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        dtype: str = VECTOR_STORE_DTYPE,
+        dim: int = VECTOR_STORE_DIM,
+        full: Optional[np.ndarray] = None,
+    ):
+        if dtype not in DTYPES:
+            raise ValueError(f"unsupported vector dtype: {dtype} (expected one of {DTYPES})")
+        vectors = normalize(np.asarray(vectors, dtype=np.float32))
+        self.dtype = dtype
+        self.dim = min(dim or vectors.shape[1], vectors.shape[1])
+        self.full = full
+        reduced = truncate(vectors, self.dim)
+        self.scales: Optional[np.ndarray] = None
+        if dtype == "int8":
+            self.codes, self.scales = quantize_int8(reduced)
+        else:
+            self.codes = reduced.astype(dtype)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        codes: np.ndarray,
+        scales: Optional[np.ndarray],
+        dtype: str,
+        full: Optional[np.ndarray] = None,
+    ) -> "QuantizedVectorStore":
+        """이미 압축된 배열로 복원 (스냅샷 mmap 배열을 복사 없이 사용)"""
+        store = cls.__new__(cls)
+        store.dtype = dtype
+        store.dim = int(codes.shape[1])
+        store.codes = codes
+        store.scales = scales
+        store.full = full
+        return store
+
+    def __len__(self) -> int:
+        return int(self.codes.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        """메모리에 상주하는 압축 벡터 크기 (mmap 원본 제외)"""
+        return int(self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0))
+
+    def prepare_query(self, query: np.ndarray) -> np.ndarray:
+        """정규화된 전체 차원 질의 → 압축 공간 질의 (절단 + 재정규화)"""
+        return truncate(np.asarray(query, dtype=np.float32), self.dim)
+
+    def decode(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """압축 벡터 복원 (float32) - IVF 학습 등 인덱스 구성용"""
+        codes = self.codes if rows is None else self.codes[rows]
+        out = codes.astype(np.float32)
+        if self.scales is not None:
+            out *= (self.scales if rows is None else self.scales[rows])[:, None]
+        return out
+
+    def scores(self, rows: np.ndarray, q: np.ndarray) -> np.ndarray:
+        """압축 벡터와 prepare_query 결과의 내적 (근사 코사인 유사도)"""
+        codes = self.codes[rows]
+        if self.scales is None:
+            return codes.astype(np.float32) @ q
+        return (codes.astype(np.float32) @ q) * self.scales[rows]
+
+    def rescore(self, rows: np.ndarray, query: np.ndarray) -> Optional[np.ndarray]:
+        """원본 벡터로 정확한 유사도 (원본이 없으면 None)"""
+        if self.full is None:
+            return None
+        # mmap은 정렬된 행 순서로 읽어야 디스크 접근이 순차적
+        order = np.argsort(rows)
+        exact = np.empty(len(rows), dtype=np.float32)
+        exact[order] = np.asarray(self.full[rows[order]], dtype=np.float32) @ query
+        return exact
+
+    def search_rows(self, rows: np.ndarray, query: np.ndarray, k: int, rescore_factor: int = VECTOR_RESCORE_FACTOR):
+        """
+        rows 중 query와 가장 가까운 k개 - (선택된 rows 인덱스, 유사도), 유사도 내림차순
+        원본이 있으면 근사 점수 상위 k * rescore_factor개를 원본으로 재채점
+        """
+        if not len(rows) or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        approx = self.scores(rows, self.prepare_query(query))
+        n = min(len(rows), k * max(rescore_factor, 1) if self.full is not None else k)
+        top = np.argpartition(-approx, n - 1)[:n] if n < len(rows) else np.arange(len(rows))
+        sims = approx[top]
+        exact = self.rescore(rows[top], query)
+        if exact is not None:
+            sims = exact
+        k = min(k, len(top))
+        best = np.argpartition(-sims, k - 1)[:k]
+        best = best[np.argsort(-sims[best])]
+        return top[best], sims[best]
+
+
+def build_vector_store(
+    vectors: np.ndarray,
+    dtype: str = VECTOR_STORE_DTYPE,
+    dim: int = VECTOR_STORE_DIM,
+    rescore: bool = VECTOR_RESCORE_ENABLED,
+    full_path: Optional[str] = VECTOR_FULL_PATH,
+) -> QuantizedVectorStore:
+    """
+    인덱스용 저장소 구성
+    재채점 사용 시 원본을 full_path에 저장 후 mmap (저장 실패 시 메모리에 유지)
+    float32 + 전체 차원이면 압축본이 곧 원본이므로 재채점 생략
+    """
+    vectors = normalize(np.asarray(vectors, dtype=np.float32))
+    full = None
+    lossless = dtype == "float32" and (not dim or dim >= vectors.shape[1])
+    if rescore and not lossless:
+        full = vectors
+        if full_path:
+            try:
+                full = save_full_vectors(vectors, full_path)
+            except OSError as e:
+                # 재채점용 원본은 메모리에 유지
+                log.warning("full_vectors_file_unavailable", path=full_path, error=str(e))
+    return QuantizedVectorStore(vectors, dtype, dim or EMBED_DIM, full)
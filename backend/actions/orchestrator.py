@@ -14,6 +14,9 @@ from models.persona import Persona
 
 
 from services.supabase_client import supabase_client
+from shared.applog import get_logger
+
+log = get_logger("backend.orchestrator")
 
 # [Translation Maps] DB(Eng) -> User(Kor)
 # 1. Skin Type
@@ -121,24 +124,23 @@ def orchestrator_node(state: GraphState) -> GraphState:
     target_brand = state.get("target_brand", "")
     target_persona = state["target_persona"]
     
-    # [Fix] Clean P prefix if exists (Handle both 'P1' and '1')
-    print(f"🧐 Orchestrator Input - Target Persona: {target_persona}")
-    
     crm_reason = state.get("crm_reason", "")
     
     # [로깅] 발송 의도 확인
-    print(f"📋 CRM Reason: {crm_reason}")
-    if crm_reason == "날씨":
-        print(f"  - Detail: {state.get('weather_detail', 'N/A')}")
+    log.info(
+        "orchestrator_input",
+        target_persona=target_persona,
+        target_brand=target_brand,
+        crm_reason=crm_reason,
+        weather_detail=state.get("weather_detail", "N/A") if crm_reason == "날씨" else None,
+    )
 
     # [Mock Data] 최근 이용 브랜드 랜덤 생성 (테스트용) -> 제거 또는 필요 시 다른 로직으로 대체
     # 여기서는 Mock 로직을 제거하고 단순히 target_brand가 없으면 기본 로직(빈 리스트 등)을 타게 수정하거나
     # determine_recommended_brand 내부에서도 Mock 사용을 제거해야 함.
     # 일단 요구사항에 따라 mock removal.
-    print("target_brand:", target_brand)
-    
     if target_brand=="":
-        print("⚠️ Target Brand is empty, using DB-based recommendation logic.")
+        log.debug("target_brand_empty", strategy="db_persona_brands")
         # [DB Query] Mock 대신 실제 DB 데이터 사용 (user_data 필터링 추가)
         recent_brands, similar_user_ids = get_persona_recent_brands(target_persona, user_data)
         recommended_brand = determine_recommended_brand(target_persona, recent_brands)
@@ -151,11 +153,12 @@ def orchestrator_node(state: GraphState) -> GraphState:
     state["similar_user_ids"] = similar_user_ids  # [NEW] 유사 유저 ID 저장
     state["retry_count"] = 0
     
-    print(f"🎯 Orchestrator 결과:")
-    print(f"  - Recommended Brand: {recommended_brand}")
-    print(f"  - Similar User IDs count: {len(similar_user_ids)}")
-    print(f"  - 🔍 [DEBUG] Saving to state - similar_user_ids: {similar_user_ids[:5]}...")
-    # print(f"  - Persona: {persona.name} ({persona.persona_id})")
+    log.info(
+        "orchestrator_result",
+        recommended_brand=recommended_brand,
+        similar_user_ids=len(similar_user_ids),
+        similar_user_ids_sample=lambda: similar_user_ids[:5],
+    )
     
     return state
 
@@ -170,13 +173,11 @@ def get_persona_recent_brands(personatype: str, target_user: CustomerProfile) ->
     try:
         # P 접두사 제거
         target_p = str(personatype)
-        print(f"\n🔎 [DB] Fetching users for persona: {target_p}")
         
         # [STEP 1] count 쿼리는 타임아웃 문제로 제거, 랜덤 offset 범위 사용
         # 페르소나당 대략 20,000~40,000명 정도 있다고 가정
         max_offset = 30000  # 충분히 큰 offset 범위
         random_offset = random.randint(0, max_offset)
-        print(f"🎲 Random offset: {random_offset}")
         
         # [STEP 2] 랜덤 offset부터 1000개 가져오기 (프로필 데이터 포함)
         query = supabase_client.client.table("user_data").select(
@@ -185,22 +186,25 @@ def get_persona_recent_brands(personatype: str, target_user: CustomerProfile) ->
         
         # Execute
         resp = query.execute()
-        
-        print(f"📊 DB Query returned {len(resp.data)} users")
             
         if not resp.data:
-            print(f"⚠️ No users found for persona '{target_p}'.")
+            log.warning("persona_users_not_found", persona=target_p, offset=random_offset)
             return [], []  # [FIX] 2개 값 반환
         
-        print(f"✅ Fetched {len(resp.data)} random users from persona '{target_p}'")
-        
         # [NEW] 유사 프로필 검사
-        print(f"\n🔍 Checking for similar profiles...")
-        print(f"🎯 Target User: {target_user.user_id}")
-        print(f"   - skin_type: {target_user.skin_type}")
-        print(f"   - skin_concerns: {target_user.skin_concerns}")
-        print(f"   - preferred_tone: {target_user.preferred_tone}")
-        print(f"   - keywords: {target_user.keywords}")
+        log.debug(
+            "persona_users_fetched",
+            persona=target_p,
+            offset=random_offset,
+            users=len(resp.data),
+            target_user=target_user.user_id,
+            target_profile=lambda: {
+                "skin_type": target_user.skin_type,
+                "skin_concerns": target_user.skin_concerns,
+                "preferred_tone": target_user.preferred_tone,
+                "keywords": target_user.keywords,
+            },
+        )
         
         similar_count = 0
         exact_match_count = 0
@@ -231,7 +235,6 @@ def get_persona_recent_brands(personatype: str, target_user: CustomerProfile) ->
                 db_keywords == user_keywords):
                 exact_match_count += 1
                 similar_user_ids.append(row.get('user_id'))  # [NEW] ID 저장
-                print(f"   ✅ EXACT MATCH: {row.get('user_id')}")
             
             # 부분 일치 검사 (skin_type + tone 일치)
             elif (db_skin_type == user_skin_type and db_tone == target_user.preferred_tone):
@@ -247,20 +250,21 @@ def get_persona_recent_brands(personatype: str, target_user: CustomerProfile) ->
         # 중복 제거 및 빈 값 제거
         all_brands = [b for b in all_brands if b]
         
-        print(f"\n📊 Similarity Check Results:")
-        print(f"   - Total checked: {len(resp.data)} users")
-        print(f"   - 🎯 Exact matches (all 4 attributes): {exact_match_count}")
-        print(f"   - 🔹 Partial matches (skin_type + tone): {similar_count}")
-        print(f"   - 📦 Total brand purchases collected: {len(all_brands)}")
-        print(f"   - Sample brands: {all_brands[:10]}...")
-        print(f"   - 👥 Similar user IDs (first 10): {similar_user_ids[:10]}")
+        # 행 단위 로그 대신 요약 1줄 (일치 ID 목록은 디버그 로그가 켜진 요청에서만)
+        log.debug(
+            "similarity_check",
+            checked=len(resp.data),
+            exact_matches=exact_match_count,
+            partial_matches=similar_count,
+            brand_purchases=len(all_brands),
+            sample_brands=lambda: all_brands[:10],
+            similar_user_ids=lambda: similar_user_ids[:10],
+        )
         
         return all_brands, similar_user_ids  # [NEW] 유사 유저 ID도 반환
 
     except Exception as e:
-        print(f"❌ Error fetching brands from DB: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("persona_brands_fetch_failed", persona=personatype, error=str(e))
         return [], []  # [FIX] 2개 값 반환
 
 
@@ -280,49 +284,46 @@ def determine_recommended_brand(personatype: int, recent_brands: List[str]) -> L
         점수순으로 정렬된 추천 브랜드 리스트
     """
     try:
-        print(f"\n🕵️ [Determine Brand] Starting...")
-        print(f"  Input - Persona: {personatype} (type: {type(personatype)})")
-        print(f"  Input - Recent Brands Count: {len(recent_brands)}")
-        print(f"  Input - Recent Brands: {recent_brands[:5]}..." if len(recent_brands) > 5 else f"  Input - Recent Brands: {recent_brands}")
+        log.debug("determine_brand_input", persona=personatype, recent_brands=len(recent_brands),
+                  sample=lambda: recent_brands[:5])
 
         # 현재 파일(orchestrator.py)이 있는 위치 기준 (Relative Path)
         current_dir = Path(__file__).parent
         json_path = current_dir / "persona_db.json"
         
         if not json_path.exists():
-            print(f"❌ Error: Persona DB file not found at {json_path}")
+            log.error("persona_db_not_found", path=str(json_path))
             return ["이니스프리"]
             
         with open(json_path, "r", encoding="utf-8") as f:
             persona_db = json.load(f)
-        
-        print(f"✅ Persona DB loaded. Available keys: {list(persona_db.keys())}")
             
         # 1. 타겟 페르소나 브랜드 식별
         key = str(personatype)
         if key.lower().startswith('p'):
             key = key[1:]
         
-        print(f"  Looking up persona key: '{key}'")
-        
         if key not in persona_db:
-            print(f"❌ Error: Persona '{key}' not found in DB!")
-            print(f"  Available personas: {list(persona_db.keys())}")
+            log.error("persona_not_found", persona=key, available=list(persona_db.keys()))
             return ["이니스프리"]
         
         target_brands = set(persona_db[key].get("recommended_brands", []))
-        print(f"  ✅ Persona '{key}' found. Recommended brands: {target_brands}")
             
         # 2. 최근 이용 브랜드 빈도 계산
         recent_counts = Counter(recent_brands)
-        print(f"  Recent brand frequencies: {dict(recent_counts.most_common(5))}")
         
         # 3. 랭킹 후보군 선정 (페르소나 브랜드 + 최근 이용 브랜드)
         candidate_brands = target_brands.union(recent_counts.keys())
-        print(f"  Total candidate brands: {len(candidate_brands)}")
+        log.debug(
+            "determine_brand_candidates",
+            persona=key,
+            persona_brands=lambda: sorted(target_brands),
+            recent_top5=lambda: dict(recent_counts.most_common(5)),
+            candidates=len(candidate_brands),
+        )
         
         if not candidate_brands:
-            print(f"⚠️ No candidate brands found. Returning default.")
+            log.warning("no_candidate_brands", persona=key, default="이니스프리")
             return ["이니스프리"]
             
         # 4. 점수 계산
@@ -345,20 +346,16 @@ def determine_recommended_brand(personatype: int, recent_brands: List[str]) -> L
         
         # 6. 최고 점수 브랜드들 추출 (동점자 처리)
         if not scored_brands:
-            print(f"⚠️ No scored brands. Returning default.")
+            log.warning("no_scored_brands", persona=key, default="이니스프리")
             return ["이니스프리"]
             
         max_score = scored_brands[0][1]
         top_brands = [brand for brand, score in scored_brands if score == max_score]
         
-        print(f"\n📊 Brand Ranking Results:")
-        print(f"  Top 5 Scored: {scored_brands[:5]}")
-        print(f"🏆 Final Selection (Score {max_score}): {top_brands}\n")
+        log.debug("brand_ranking", top5=lambda: scored_brands[:5], max_score=max_score, selected=top_brands)
         
         return top_brands
 
     except Exception as e:
-        print(f"❌ Exception in determine_recommended_brand: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("determine_brand_failed", persona=personatype, error=str(e))
         return ["이니스프리"]
\ No newline at end of file
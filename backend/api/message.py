@@ -10,7 +10,9 @@ from services.supabase_client import supabase_client
 from services.user_service import get_customer_from_db, get_customer_list
 from graph import message_workflow
 from typing import Optional
-import traceback
+from shared.applog import get_logger
+
+log = get_logger("backend.api.message")
 
 router = APIRouter()
 
@@ -49,7 +51,7 @@ async def generate_message(
         for msg in recent_msgs:
             # 브랜드가 일치하고, (옵션) 성공한 메시지인 경우
             if msg.get('brand_name') == request.targetBrand:
-                print(f"🚫 Duplicate message blocked for User {request.userId}, Brand {request.targetBrand}")
+                log.info("duplicate_message_blocked", user_id=request.userId, brand=request.targetBrand)
                 # 프론트엔드에서 처리하기 쉽도록 429 Too Many Requests 또는 409 Conflict 반환
                 # 여기서는 409 Conflict 사용
                 raise HTTPException(
@@ -59,7 +61,6 @@ async def generate_message(
 
     # 1. 고객 데이터 조회 (Supabase -> Fallback to Mock)
     db_user = supabase_client.get_user(request.userId)  
-    print(f"🧐 Fetching user data for ID: {request.userId}") 
     
     customer = None
     
@@ -85,12 +86,12 @@ async def generate_message(
                 # 나머지 필드는 모델 정의에서 Optional이나 Default가 있으므로 생략 가능
             )
         except Exception as e:
-            print(f"Error converting DB user data: {e}")
+            log.warning("user_conversion_failed", user_id=request.userId, error=str(e))
             customer = None
 
     # Fallback 없음: DB 실패 시 에러 처리
     if not customer:
-        print(f"User '{request.userId}' not found in DB.")
+        log.warning("user_not_found", user_id=request.userId)
         raise HTTPException(
             status_code=404,
             detail=f"고객 ID '{request.userId}'를 찾을 수 없습니다."
@@ -98,12 +99,14 @@ async def generate_message(
         
     # 2. LangGraph 워크플로우 실행
     try:
-        # [DEBUG] 프론트엔드에서 받은 요청 데이터 확인
-        print(f"\n📥 [API Request Debug]")
-        print(f"  - targetBrand: '{request.targetBrand}' (type: {type(request.targetBrand)})")
-        print(f"  - hasBrand: {request.hasBrand}")
-        print(f"  - persona: '{request.persona}'")
-        print(f"  - intention: '{request.intention}'")
+        log.info(
+            "message_request",
+            user_id=request.userId,
+            target_brand=request.targetBrand,
+            has_brand=request.hasBrand,
+            persona=request.persona,
+            intention=request.intention,
+        )
         
         initial_state = {
             "user_id": request.userId,
@@ -131,17 +134,11 @@ async def generate_message(
             "similar_user_ids": [],  # [FIX] 초기화 추가
         }
 
-        print("🔥 AI 메시지 생성 시작...")
-        
         result = await message_workflow.ainvoke(initial_state)
         
         # 3. 결과 검증
         if result.get("success", False):
-            # [DEBUG] 최종 API 응답 확인
             similar_ids_final = result.get("similar_user_ids", [])
-            print(f"🔍 [API DEBUG] Final result similar_user_ids: {len(similar_ids_final)} items")
-            if similar_ids_final:
-                print(f"   First 5: {similar_ids_final[:5]}")
             
             # [FIX] Dict를 직접 반환 (similar_user_ids 포함)
             # MessageResponse 모델 변환하지 않고 return_response_node의 결과를 그대로 반환
@@ -152,7 +149,7 @@ async def generate_message(
                 "similar_user_ids": similar_ids_final
             }
             
-            print(f"🔍 [API DEBUG] Returning API response with keys: {api_response.keys()}")
+            log.info("message_response", user_id=result["user_id"], similar_user_ids=len(similar_ids_final))
             
             return api_response
         else:
@@ -163,6 +160,5 @@ async def generate_message(
             )
     
     except Exception as e:
-        print(f"❌ 로직 에러: {e}")
-        traceback.print_exc()
+        log.exception("message_generation_failed", user_id=request.userId, error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
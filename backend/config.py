@@ -2,9 +2,16 @@
 Configuration management using pydantic-settings
 환경 변수 로드 및 애플리케이션 설정 관리
 """
+import os
+import sys
 from pydantic_settings import BaseSettings
 from typing import List
 
+# RecSys / backend 공용 모듈(shared/) import 경로 - 저장소 루트
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
 
 class Settings(BaseSettings):
     """애플리케이션 설정"""
@@ -23,6 +30,15 @@ class Settings(BaseSettings):
 
     RecSys_API_URL: str = "http://localhost:8001/recommend"
     
+    # Logging (shared/applog.py)
+    log_level: str = "INFO"             # DEBUG이면 노드별 상세 로그
+    log_debug_sample_rate: float = 1.0  # DEBUG 로그를 남길 요청 비율
+    log_format: str = "json"            # json | text
+    
+    # Event loop lag monitor (shared/loop_monitor.py)
+    loop_lag_interval_sec: float = 0.05  # 측정 주기
+    loop_lag_history: int = 6000         # 보관 표본 수 (주기 × 개수 = 최근 5분)
+    
     # CORS
     allowed_origins: str = "http://localhost:5173"
     
@@ -12,6 +12,9 @@ from actions.retrieve_crm import retrieve_crm_node
 # from actions.personalize import personalize_message_node # Removed
 from actions.return_response import return_response_node
 from config import settings
+from shared.applog import get_logger
+
+log = get_logger("backend.graph")
 
 
 def should_retry(state: GraphState) -> str:
@@ -37,19 +40,18 @@ def check_cache(state: GraphState) -> str:
     """
     CRM Cache Hit 여부에 따른 경로 분기
     """
-    # [EXTREME DEBUG] 모든 state 키 확인
-    print(f"\n🔀 [Check Cache Decision] ALL STATE KEYS:")
-    for key in ["cache_hit", "message", "message_template", "compliance_passed", "user_id"]:
-        value = state.get(key, "KEY_NOT_FOUND")
-        if isinstance(value, str):
-            preview = value[:50] if len(value) > 50 else value
-        else:
-            preview = value
-        print(f"   - {key}: {preview}")
-    
     cache_hit_value = state.get("cache_hit", False)
-    print(f"\n🔀 [Check Cache Decision] cache_hit={cache_hit_value} (type: {type(cache_hit_value)})")
-    print(f"🔀 [Check Cache Decision] Routing to: {'return_response' if cache_hit_value else 'message_writer'}")
+    # state 미리보기는 디버그 로그가 켜진 요청에서만 생성
+    log.debug(
+        "check_cache",
+        cache_hit=cache_hit_value,
+        route="return_response" if cache_hit_value else "message_writer",
+        state_preview=lambda: {
+            key: (value[:50] if isinstance(value, str) else value)
+            for key in ["cache_hit", "message", "message_template", "compliance_passed", "user_id"]
+            for value in [state.get(key, "KEY_NOT_FOUND")]
+        },
+    )
     
     if cache_hit_value:
         return "return_response" # Direct to return_response (Skipping personalize)
@@ -2,10 +2,20 @@
 Blooming CRM Message Generation System
 페르소나 기반 초개인화 CRM 메시지 생성 시스템
 """
-from fastapi import FastAPI
+from typing import Optional
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from config import settings
 from api.message import router as message_router
+from shared.applog import configure_logging, request_scope
+from shared.loop_monitor import LoopLagMonitor
+
+# 구조화 로깅 (레벨 게이팅 + 요청 단위 DEBUG 샘플링)
+configure_logging(settings.log_level, settings.log_debug_sample_rate, settings.log_format)
+
+# 이벤트 루프 지연 모니터 (동기 OpenAI/Supabase/RecSys 호출이 루프를 막는 정도 - GET /stats/event-loop)
+loop_monitor = LoopLagMonitor(settings.loop_lag_interval_sec, settings.loop_lag_history)
 
 # FastAPI 앱 생성
 app = FastAPI(
@@ -23,6 +33,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def log_context(request: Request, call_next):
+    """
+    요청마다 request_id(X-Request-ID 또는 생성)를 로그에 붙이고 DEBUG 샘플링을 1회 결정
+    """
+    with request_scope(request.headers.get("x-request-id")) as request_id:
+        response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
 # 라우터 등록
 app.include_router(message_router, tags=["Message Generation"])
 
@@ -39,11 +60,20 @@ async def root():
     }
 
 
+@app.get("/stats/event-loop", tags=["Health"])
+async def event_loop_stats(window: Optional[float] = None):
+    """
+    최근 window초(없으면 보관 중인 전체) 이벤트 루프 지연 p50/p95/p99/max (ms)
+    """
+    return loop_monitor.stats(window)
+
+
 @app.on_event("startup")
 async def startup_event():
     """
     애플리케이션 시작 시 실행
     """
+    loop_monitor.start()
     print("🌸 Blooming CRM API 서버가 시작되었습니다.")
     print(f"Environment: {settings.env}")
     print(f"OpenAI Model: {settings.openai_model}")
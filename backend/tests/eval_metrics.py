@@ -75,20 +75,31 @@ def evaluate_recsys_diversity(cfg: EvalConfig) -> Dict[str, Any]:
     per_user = []
     for user_id in cfg.user_ids:
         products_by_intent: Dict[str, Dict[str, Any]] = {}
+        # All intents in one RecSys pass; fall back to one call per intent on older RecSys builds
+        try:
+            results_by_intent = _post_json(
+                f"{cfg.recsys_base_url}/recommend/intents",
+                {"user_id": user_id, "intentions": cfg.intents},
+                timeout_s=120,
+            )
+        except Exception:
+            results_by_intent = {}
         for intent in cfg.intents:
-            payload = {
-                "user_id": user_id,
-                "intention": intent,
-            }
-            try:
-                result = _post_json(
-                    f"{cfg.recsys_base_url}/recommend",
-                    payload,
-                    timeout_s=120,
-                )
-            except Exception as exc:
-                products_by_intent[intent] = {"error": str(exc)}
-                continue
+            result = results_by_intent.get(intent)
+            if result is None:
+                payload = {
+                    "user_id": user_id,
+                    "intention": intent,
+                }
+                try:
+                    result = _post_json(
+                        f"{cfg.recsys_base_url}/recommend",
+                        payload,
+                        timeout_s=120,
+                    )
+                except Exception as exc:
+                    products_by_intent[intent] = {"error": str(exc)}
+                    continue
 
             product_data = result.get("product_data") or {}
             products_by_intent[intent] = {
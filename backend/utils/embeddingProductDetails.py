@@ -1,7 +1,8 @@
 import os
 import json
 import time
-from typing import Any, Dict, List, Optional
+import argparse
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import sys
 from pathlib import Path
 
@@ -27,6 +28,14 @@ SLEEP_BETWEEN_PAGES = 0.1                  # 너무 빠르면 DB/네트워크 
 # products_vector 테이블의 PK 컬럼명 (보통 product_id)
 VECTOR_PK_COL = "product_id"
 
+# 로컬 임베딩 (RecSys EMBED_PROVIDER=local과 같은 모델/접두어/컬럼이어야 함 - RecSys/config.py 참고)
+# 오프라인 CPU 실행, 벡터 공간이 OpenAI와 달라 별도 컬럼 embedding_local vector(384)에 저장
+EMBED_PROVIDER = os.getenv("EMBED_PROVIDER", "openai")   # openai | local
+LOCAL_EMBEDDING_MODEL = "intfloat/multilingual-e5-small"
+LOCAL_EMBEDDING_DIM = 384
+LOCAL_PASSAGE_PREFIX = "passage: "                        # e5 계열 문서 접두어 (쿼리는 "query: ")
+LOCAL_EMBED_BATCH_SIZE = 32
+
 # =========================
 # 유틸
 # =========================
@@ -139,16 +148,51 @@ def embed_texts(openai_client: OpenAI, texts: List[str], max_retries: int = 5) -
     raise RuntimeError("embedding 재시도 실패")
 
 
+def embed_texts_local(model, texts: List[str]) -> List[List[float]]:
+    """
+    로컬 sentence-transformer 임베딩 (CPU, 네트워크 없음)
+    """
+    vecs = model.encode(
+        [LOCAL_PASSAGE_PREFIX + t for t in texts],
+        batch_size=LOCAL_EMBED_BATCH_SIZE,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+    return [v.tolist() for v in vecs]
+
+
+def make_embedder(provider: str) -> Tuple[Callable[[List[str]], List[List[float]]], str, int]:
+    """
+    provider -> (임베딩 함수, products_vector 컬럼명, 차원)
+    """
+    if provider == "local":
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(LOCAL_EMBEDDING_MODEL, device="cpu")
+        return (lambda texts: embed_texts_local(model, texts)), "embedding_local", LOCAL_EMBEDDING_DIM
+    if provider == "openai":
+        oa = OpenAI(api_key=settings.openai_api_key)
+        return (lambda texts: embed_texts(oa, texts)), "embedding", EMBEDDING_DIM
+    raise ValueError(f"unknown embedding provider: {provider} (expected 'openai' or 'local')")
+
+
 # =========================
 # 메인 로직
 # =========================
 def main():
+    parser = argparse.ArgumentParser(description="products -> products_vector 임베딩 적재")
+    parser.add_argument(
+        "--provider", choices=["openai", "local"], default=EMBED_PROVIDER,
+        help="openai: embedding 컬럼 / local: embedding_local 컬럼 (기존 OpenAI 임베딩은 그대로 둠)",
+    )
+    args = parser.parse_args()
+
     supabase_url = settings.SUPABASE_URL
     supabase_key = settings.SUPABASE_KEY
-    openai_key = settings.openai_api_key
 
     sb: Client = create_client(supabase_url, supabase_key)
-    oa = OpenAI(api_key=openai_key)
+    embed, vector_col, vector_dim = make_embedder(args.provider)
+    print(f"🔧 provider={args.provider} column={vector_col} dim={vector_dim}")
 
     offset = 0
     total_processed = 0
@@ -178,19 +222,19 @@ def main():
         # 3) 임베딩은 배치로 나눠서 호출
         all_vectors: List[List[float]] = []
         for batch in chunk_list(contents, EMBED_BATCH_SIZE):
-            vectors = embed_texts(oa, batch)
+            vectors = embed(batch)
             all_vectors.extend(vectors)
 
         # 4) upsert payload 구성
         upserts = []
         for p, content, emb in zip(products, contents, all_vectors):
-            if len(emb) != EMBEDDING_DIM:
-                raise ValueError(f"임베딩 차원 불일치: got {len(emb)}, expected {EMBEDDING_DIM}")
+            if len(emb) != vector_dim:
+                raise ValueError(f"임베딩 차원 불일치: got {len(emb)}, expected {vector_dim}")
 
             upserts.append({
                 VECTOR_PK_COL: p["id"],          # products.id -> products_vector.product_id
                 "content": content,
-                "embedding": emb,               # vector 컬럼에 list[float] 넣기
+                vector_col: emb,                # vector 컬럼에 list[float] 넣기 (다른 제공자 컬럼은 건드리지 않음)
                 "metadata": build_metadata(p),
             })
 
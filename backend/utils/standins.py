@@ -0,0 +1,266 @@
+"""
+부하 테스트용 backend 대역 서버 (Supabase / OpenAI 동기 클라이언트를 프로세스 안의 가짜로 교체)
+/message 그래프 전체(orchestrator → RecSys → 메시지 생성 → 컴플라이언스 → 저장)를 API 키/네트워크 없이 실행
+RecSys 호출만 실제 HTTP로 나감 → RecSys/loadtest.py serve로 띄운 RecSys 대역 서버를 가리키게 함
+
+cd ../RecSys && python loadtest.py run --target message --concurrency 1 2 4 8 --llm-latency-ms 800  # 두 대역 서버를 직접 띄움
+
+# 직접 띄워서 측정
+python utils/standins.py --port 8000 --recsys-url http://127.0.0.1:8001/recommend --llm-latency-ms 800
+cd ../RecSys && python loadtest.py run --target message --url http://127.0.0.1:8000 --concurrency 1 2 4 8
+
+--llm-latency-ms: 채팅 완성 1회당 지연 (실제 클라이언트처럼 time.sleep → 이벤트 루프를 막음)
+crm_message_history는 메모리에 쌓이므로 같은 프로필/브랜드/intent 요청은 두 번째부터 CRM 캐시 적중
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+# backend 폴더를 path에 추가
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# RecSys/standins.py와 같은 ID 체계 (user_000001 ~) 와 브랜드
+BRANDS = ["설화수", "헤라", "라네즈", "이니스프리", "아이오페", "마몽드", "한율", "에뛰드", "프리메라", "에스트라"]
+SKIN_TYPES = ["Dry", "Oily", "Combination", "Sensitive", "Normal"]
+CONCERNS = ["Wrinkle", "Dullness", "Acne", "Pores", "Redness", "Dryness", "Elasticity"]
+TONES = ["Warm_Spring", "Warm_Autumn", "Cool_Summer", "Cool_Winter", "Neutral"]
+KEYWORDS = ["moisturizing", "soothing", "whitening", "antiaging", "lightweight", "premium", "affordable"]
+EMBED_DIM = 1536
+
+
+def build_tables(n_users: int, n_products: int, seed: int = 0) -> Dict[str, List[Dict[str, Any]]]:
+    rng = random.Random(seed)
+    customers, user_data = [], []
+    for i in range(1, n_users + 1):
+        profile = {
+            "user_id": f"user_{i:06d}",
+            "skin_type": [rng.choice(SKIN_TYPES)],
+            "skin_concerns": rng.sample(CONCERNS, rng.randint(1, 3)),
+            "preferred_tone": rng.choice(TONES),
+            "keywords": rng.sample(KEYWORDS, rng.randint(1, 3)),
+        }
+        persona_id = str(rng.randint(1, 5))
+        customers.append({
+            **profile, "name": "00", "age_group": rng.choice(["20s", "30s", "40s", "50s"]),
+            "membership_level": rng.choice(["VIP", "General", "New"]), "persona_id": persona_id,
+        })
+        user_data.append({**profile, "persona_id": persona_id, "brand_purchases": rng.sample(BRANDS, rng.randint(1, 4))})
+    products = [
+        {
+            "id": pid, "brand": rng.choice(BRANDS), "name": f"합성 제품 {pid}",
+            "category_major": "스킨케어", "category_middle": "크림", "category_small": "수분크림",
+            "price_original": 50000, "price_final": 40000, "discount_rate": 20,
+            "review_score": 4.5, "review_count": 100, "keywords": "보습, 진정",
+        }
+        for pid in range(1, n_products + 1)
+    ]
+    return {
+        "customers": customers,
+        "user_data": user_data,
+        "products": products,
+        "crm_message_history": [],
+        "compliance_check_history": [],
+        "regulation_rules": [],
+    }
+
+
+class FakeQuery:
+    """postgrest 동기 쿼리 빌더 중 backend가 쓰는 부분 (range는 테이블 크기를 넘으면 처음으로 되돌아감)"""
+
+    def __init__(self, sb: "FakeSupabase", table: str):
+        self.sb = sb
+        self.table = table
+        self.filters: List[Any] = []
+        self.order_by: Optional[tuple] = None
+        self.bounds: Optional[tuple] = None
+        self.max_rows: Optional[int] = None
+        self.payload: Optional[Any] = None
+
+    def select(self, *columns, **kwargs) -> "FakeQuery":
+        return self
+
+    def eq(self, col: str, value: Any) -> "FakeQuery":
+        self.filters.append(lambda r: r.get(col) == value or str(r.get(col)) == str(value))
+        return self
+
+    def in_(self, col: str, values: List[Any]) -> "FakeQuery":
+        wanted = {str(v) for v in values}
+        self.filters.append(lambda r: str(r.get(col)) in wanted)
+        return self
+
+    def overlaps(self, col: str, values: List[Any]) -> "FakeQuery":
+        self.filters.append(lambda r: bool(set(r.get(col) or []) & set(values)))
+        return self
+
+    def order(self, col: str, desc: bool = False) -> "FakeQuery":
+        self.order_by = (col, desc)
+        return self
+
+    def range(self, start: int, end: int) -> "FakeQuery":
+        self.bounds = (start, end)
+        return self
+
+    def limit(self, n: int) -> "FakeQuery":
+        self.max_rows = n
+        return self
+
+    def insert(self, payload: Any) -> "FakeQuery":
+        self.payload = payload
+        return self
+
+    def execute(self) -> SimpleNamespace:
+        self.sb.wait()
+        rows = self.sb.tables.setdefault(self.table, [])
+        if self.payload is not None:
+            new = self.payload if isinstance(self.payload, list) else [self.payload]
+            with self.sb.lock:
+                rows.extend(new)
+            return SimpleNamespace(data=new)
+        out = [r for r in rows if all(f(r) for f in self.filters)]
+        if self.order_by is not None:
+            col, desc = self.order_by
+            out.sort(key=lambda r: str(r.get(col)), reverse=desc)
+        if self.bounds is not None and out:
+            start = self.bounds[0] % len(out)
+            out = out[start:start + self.bounds[1] - self.bounds[0] + 1]
+        if self.max_rows is not None:
+            out = out[:self.max_rows]
+        return SimpleNamespace(data=out)
+
+
+class FakeSupabase:
+    """supabase.Client 대역 (latency_ms: 호출마다 time.sleep - 동기 클라이언트처럼 루프를 막음)"""
+
+    def __init__(self, tables: Dict[str, List[Dict[str, Any]]], latency_ms: float = 0.0):
+        self.tables = tables
+        self.latency = latency_ms / 1000.0
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, payload: Dict[str, Any]) -> "FakeRPC":
+        return FakeRPC(self)
+
+
+class FakeRPC:
+    """match_regulation_rules 등 - 규칙 DB가 비어 있으므로 항상 빈 결과"""
+
+    def __init__(self, sb: FakeSupabase):
+        self.sb = sb
+
+    def execute(self) -> SimpleNamespace:
+        self.sb.wait()
+        return SimpleNamespace(data=[])
+
+
+class FakeOpenAI:
+    """openai.OpenAI 대역 (chat.completions / embeddings)"""
+
+    def __init__(self, llm_latency_ms: float = 0.0, embed_latency_ms: float = 0.0):
+        self.llm_latency = llm_latency_ms / 1000.0
+        self.embed_latency = embed_latency_ms / 1000.0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat))
+        self.embeddings = SimpleNamespace(create=self._embed)
+
+    def _chat(self, model: str, messages: List[Dict[str, str]], response_format: Optional[Dict] = None, **kwargs):
+        if self.llm_latency > 0:
+            time.sleep(self.llm_latency)
+        if response_format and response_format.get("type") == "json_object":
+            # 컴플라이언스 판정: 항상 통과
+            content = json.dumps({
+                "passed": True, "violated_rules": [], "reasoning": "stand-in", "confidence": 0.99, "suggestions": "",
+            }, ensure_ascii=False)
+        else:
+            content = "{customer_name}님, 피부 고민에 맞춘 추천 제품을 소개해 드려요. 지금 확인해 보세요!"
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 2
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=60, total_tokens=prompt_tokens + 60),
+        )
+
+    def _embed(self, model: str, input: Any, **kwargs):
+        if self.embed_latency > 0:
+            time.sleep(self.embed_latency)
+        texts = input if isinstance(input, list) else [input]
+        data = []
+        for text in texts:
+            rng = random.Random(hashlib.sha256(text.encode("utf-8")).hexdigest())
+            data.append(SimpleNamespace(embedding=[rng.gauss(0, 1) for _ in range(EMBED_DIM)]))
+        return SimpleNamespace(data=data)
+
+
+def install(
+    n_users: int = 1000,
+    n_products: int = 1000,
+    db_latency_ms: float = 0.0,
+    llm_latency_ms: float = 0.0,
+    embed_latency_ms: float = 0.0,
+    recsys_url: Optional[str] = None,
+    seed: int = 0,
+) -> FakeSupabase:
+    """서비스 싱글턴의 Supabase/OpenAI 클라이언트를 대역으로 교체"""
+    from config import settings
+    from services import crm_history_service, llm_client, supabase_client, user_service
+    from actions import compliance_check
+
+    sb = FakeSupabase(build_tables(n_users, n_products, seed), db_latency_ms)
+    oa = FakeOpenAI(llm_latency_ms, embed_latency_ms)
+    supabase_client.supabase_client.client = sb
+    crm_history_service.crm_history_service.sb = sb
+    user_service.supabase = sb
+    llm_client.llm_client.client = oa
+    compliance_check.supabase = sb
+    compliance_check.SUPABASE_AVAILABLE = True
+    compliance_check.openai_client = oa
+    compliance_check.ALL_RULE_KEYWORDS = None
+    if recsys_url:
+        settings.RecSys_API_URL = recsys_url
+    return sb
+
+
+def main():
+    parser = argparse.ArgumentParser(description="backend /message server with local Supabase/OpenAI stand-ins")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--recsys-url", default="http://127.0.0.1:8001/recommend", help="RecSys 대역 서버 /recommend")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # 대역만 사용하므로 실제 키가 없어도 실행 (설정 검증 통과용 기본값), 요청 로그는 경고 이상만
+    os.environ.setdefault("OPENAI_API_KEY", "standin")
+    os.environ.setdefault("SUPABASE_URL", "http://localhost")
+    os.environ.setdefault("SUPABASE_KEY", "standin")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    import uvicorn
+    from main import app
+
+    install(args.users, args.products, args.db_latency_ms, args.llm_latency_ms, args.embed_latency_ms,
+            args.recsys_url, args.seed)
+    print(f"🧪 backend stand-in server: {args.users} customers, RecSys={args.recsys_url}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
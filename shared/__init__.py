@@ -0,0 +1,4 @@
+"""
+RecSys / backend 공용 모듈
+두 서비스의 config.py가 저장소 루트를 import 경로에 추가 → shared.applog, shared.loop_monitor로 import
+"""
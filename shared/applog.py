@@ -0,0 +1,151 @@
+"""
+구조화 로깅 (레벨 게이팅 + 요청 단위 샘플링)
+RecSys와 backend 공용 (shared/)
+
+- get_logger(name).info("event", key=value, ...) → JSON 한 줄 (LOG_FORMAT=text이면 key=value)
+- 필드 값으로 lambda를 넘기면 실제로 출력될 때만 호출 → 꺼진 디버그 페이로드는 계산하지 않음
+- request_scope(): 요청마다 DEBUG 출력 여부를 sample_rate 확률로 한 번 결정 (INFO 이상은 항상 출력)
+  요청 밖(startup, 배치 스크립트)에서는 호출마다 샘플링
+- log.enabled(): 여러 필드를 만드는 디버그 블록 전체를 건너뛸 때 사용
+
+설정: configure_logging(level, sample_rate, fmt) 또는 환경 변수 LOG_LEVEL / LOG_DEBUG_SAMPLE_RATE / LOG_FORMAT
+"""
+import contextvars
+import json
+import logging
+import os
+import random
+import sys
+import time
+import types
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+BASE_LOGGER = "blooming"
+
+_request_id: contextvars.ContextVar = contextvars.ContextVar("log_request_id", default=None)
+_sampled: contextvars.ContextVar = contextvars.ContextVar("log_sampled", default=None)
+_sample_rate = 1.0
+_configured = False
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            payload["request_id"] = record.request_id
+        payload.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        parts = [record.levelname, record.name, record.getMessage()]
+        if getattr(record, "request_id", None):
+            parts.append(f"request_id={record.request_id}")
+        parts.extend(f"{k}={v}" for k, v in getattr(record, "fields", {}).items())
+        line = " ".join(str(p) for p in parts)
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    sample_rate: Optional[float] = None,
+    fmt: Optional[str] = None,
+    stream=None,
+) -> None:
+    """로그 레벨 / 디버그 샘플링 비율 / 출력 형식 설정 (다시 호출하면 덮어씀)"""
+    global _sample_rate, _configured
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    rate = sample_rate if sample_rate is not None else float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+    fmt = (fmt or os.getenv("LOG_FORMAT", "json")).lower()
+
+    base = logging.getLogger(BASE_LOGGER)
+    for h in list(base.handlers):
+        base.removeHandler(h)
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(TextFormatter() if fmt == "text" else JsonFormatter())
+    base.addHandler(handler)
+    base.setLevel(getattr(logging, level, logging.INFO))
+    base.propagate = False
+    _sample_rate = min(max(rate, 0.0), 1.0)
+    _configured = True
+
+
+def _is_sampled() -> bool:
+    sampled = _sampled.get()
+    if sampled is None:
+        return _sample_rate >= 1.0 or random.random() < _sample_rate
+    return sampled
+
+
+@contextmanager
+def request_scope(request_id: Optional[str] = None, sample_rate: Optional[float] = None) -> Iterator[str]:
+    """요청 단위 컨텍스트 - request_id를 모든 로그에 붙이고 DEBUG 샘플링을 요청당 1회 결정"""
+    rate = _sample_rate if sample_rate is None else sample_rate
+    rid_token = _request_id.set(request_id or uuid.uuid4().hex[:12])
+    sampled_token = _sampled.set(rate >= 1.0 or random.random() < rate)
+    try:
+        yield _request_id.get()
+    finally:
+        _sampled.reset(sampled_token)
+        _request_id.reset(rid_token)
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+class StructLogger:
+    """event 이름 + 키워드 필드로 기록하는 로거"""
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(f"{BASE_LOGGER}.{name}")
+
+    def enabled(self, level: int = logging.DEBUG) -> bool:
+        """이 레벨 로그가 실제로 출력되는지 (DEBUG는 요청 샘플링 포함)"""
+        if not _configured:
+            configure_logging()
+        if not self._logger.isEnabledFor(level):
+            return False
+        return level > logging.DEBUG or _is_sampled()
+
+    def _log(self, level: int, event: str, fields: Dict[str, Any], exc_info: bool = False) -> None:
+        if not self.enabled(level):
+            return
+        # lambda 필드는 출력할 때만 계산
+        fields = {k: (v() if isinstance(v, types.LambdaType) else v) for k, v in fields.items()}
+        self._logger.log(
+            level, event, exc_info=exc_info,
+            extra={"fields": fields, "request_id": _request_id.get()},
+        )
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        self._log(logging.ERROR, event, fields)
+
+    def exception(self, event: str, **fields: Any) -> None:
+        """except 블록 안에서 호출 - traceback 포함"""
+        self._log(logging.ERROR, event, fields, exc_info=True)
+
+
+def get_logger(name: str) -> StructLogger:
+    return StructLogger(name)
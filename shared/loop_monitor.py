@@ -0,0 +1,87 @@
+"""
+이벤트 루프 지연(lag) 모니터 (RecSys / backend 공용 shared/, 외부 의존성 없음)
+interval마다 sleep을 걸고 실제로 깨어난 시각이 늦은 만큼을 기록
+→ 루프를 막는 동기 호출(CPU 작업, 동기 HTTP/DB 클라이언트)이나 과부하를 요청 지연과 분리해서 볼 수 있음
+
+monitor = LoopLagMonitor(); monitor.start()   # 실행 중인 루프 안에서
+monitor.stats(window_sec=30)                  # 최근 30초 p50/p95/p99/max (ms)
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """선형 보간 분위수 (numpy.percentile 기본값과 동일), q: 0~100"""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo, hi = math.floor(pos), math.ceil(pos)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+class LoopLagMonitor:
+    """
+    interval: 측정 주기 (초) - 짧을수록 정밀하지만 루프에 깨우기 작업이 늘어남
+    history: 보관할 최근 표본 수 (기본 50ms × 6000 = 최근 5분)
+    on_sample: 표본마다 호출 (예: Prometheus 히스토그램 observe)
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.05,
+        history: int = 6000,
+        on_sample: Optional[Callable[[float], None]] = None,
+    ):
+        self.interval = interval
+        self.on_sample = on_sample
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=history)  # (측정 시각 monotonic, lag 초)
+        self._task: Optional["asyncio.Task"] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> "asyncio.Task":
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def reset(self) -> None:
+        self._samples.clear()
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - started - self.interval)
+            self._samples.append((now, lag))
+            if self.on_sample is not None:
+                self.on_sample(lag)
+
+    def samples(self, window_sec: Optional[float] = None) -> List[float]:
+        if window_sec is None:
+            return [lag for _, lag in self._samples]
+        since = time.monotonic() - window_sec
+        return [lag for at, lag in self._samples if at >= since]
+
+    def stats(self, window_sec: Optional[float] = None) -> Dict[str, Any]:
+        values = sorted(self.samples(window_sec))
+        out: Dict[str, Any] = {"interval_ms": self.interval * 1000, "count": len(values)}
+        if values:
+            out.update({
+                "p50_ms": round(percentile(values, 50) * 1000, 3),
+                "p95_ms": round(percentile(values, 95) * 1000, 3),
+                "p99_ms": round(percentile(values, 99) * 1000, 3),
+                "max_ms": round(values[-1] * 1000, 3),
+                "mean_ms": round(sum(values) / len(values) * 1000, 3),
+            })
+        return out